@@ -1,4 +1,9 @@
-from django.contrib import admin
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse
 
 from crm.models import (
     Service,
@@ -7,10 +12,48 @@ from crm.models import (
     Contract,
     ActiveClient,
 )
+from crm.pagination import EstimatedCountPaginator
+from crm.search import SEARCH_MODELS, search
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """Базовый класс админки для больших таблиц.
+
+    Количество строк нефильтрованного списка оценивается по статистике
+    PostgreSQL, а второй COUNT(*) по всей таблице для фильтрованного списка не
+    выполняется. Поиск по моделям из поискового индекса (crm.search) идет по
+    триграммным индексам, а не по UPPER(...) LIKE '%...%' через всю таблицу;
+    этот же поиск используют виджеты автодополнения.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Порядок по первичному ключу нужен и списку, и пагинации автодополнения
+    ordering = ("-pk",)
+
+    def get_search_results(self, request: HttpRequest, queryset: QuerySet, search_term: str) -> Tuple[QuerySet, bool]:
+        if self.model not in SEARCH_MODELS or not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+
+        kind: str = SEARCH_MODELS[self.model][0]
+        ids = [result.pk for result in search(search_term, kinds=[kind], limit=settings.ADMIN_SEARCH_LIMIT)]
+        # Отметка для списка: найдено не больше ADMIN_SEARCH_LIMIT лучших совпадений
+        request.search_truncated = len(ids) >= settings.ADMIN_SEARCH_LIMIT  # type: ignore
+        return queryset.filter(pk__in=ids), False
+
+    def changelist_view(self, request: HttpRequest, extra_context: Optional[Dict[str, Any]] = None) -> HttpResponse:
+        response: HttpResponse = super().changelist_view(request, extra_context)
+        if getattr(request, "search_truncated", False):
+            self.message_user(
+                request,
+                f"Показаны {settings.ADMIN_SEARCH_LIMIT} лучших совпадений, уточните запрос",
+                messages.WARNING,
+            )
+        return response
 
 
 @admin.register(Service)
-class ServiceAdmin(admin.ModelAdmin):
+class ServiceAdmin(ScalableAdmin):
     list_display = (
         "pk",
         "name",
@@ -18,10 +61,12 @@ class ServiceAdmin(admin.ModelAdmin):
         "cost",
     )
     list_display_links = ("name",)
+    # Префиксный поиск без учета регистра: на PostgreSQL UPPER(name) LIKE 'X%' идет по crm_service_upper_name_idx
+    search_fields = ("name__istartswith",)
 
 
 @admin.register(Campaign)
-class CampaignAdmin(admin.ModelAdmin):
+class CampaignAdmin(ScalableAdmin):
     list_display = (
         "pk",
         "name",
@@ -30,10 +75,14 @@ class CampaignAdmin(admin.ModelAdmin):
         "budget",
     )
     list_display_links = ("name",)
+    list_select_related = ("service",)
+    autocomplete_fields = ("service",)
+    # Префиксный поиск без учета регистра: на PostgreSQL UPPER(name) LIKE 'X%' идет по crm_campaign_upper_name_idx
+    search_fields = ("name__istartswith",)
 
 
 @admin.register(PotentialClient)
-class PotentialClientAdmin(admin.ModelAdmin):
+class PotentialClientAdmin(ScalableAdmin):
     list_display = (
         "pk",
         "full_name",
@@ -42,10 +91,13 @@ class PotentialClientAdmin(admin.ModelAdmin):
         "campaign",
     )
     list_display_links = ("full_name",)
+    list_select_related = ("campaign",)
+    autocomplete_fields = ("campaign",)
+    search_fields = ("full_name", "email", "phone")
 
 
 @admin.register(Contract)
-class ContactAdmin(admin.ModelAdmin):
+class ContactAdmin(ScalableAdmin):
     list_display = (
         "pk",
         "name",
@@ -56,13 +108,19 @@ class ContactAdmin(admin.ModelAdmin):
         "amount",
     )
     list_display_links = ("name",)
+    list_select_related = ("service",)
+    autocomplete_fields = ("service",)
+    raw_id_fields = ("blob",)
+    search_fields = ("name",)
 
 
 @admin.register(ActiveClient)
-class ActiveClientAdmin(admin.ModelAdmin):
+class ActiveClientAdmin(ScalableAdmin):
     list_display = (
         "pk",
         "potential_client",
         "contract",
     )
     list_display_links = ("potential_client",)
+    list_select_related = ("potential_client", "contract")
+    autocomplete_fields = ("potential_client", "contract")
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CrmConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "crm"
+
+    def ready(self):
+        import crm.signals  # noqa: F401  pylint: disable=import-outside-toplevel,unused-import
+        import crm.tasks  # noqa: F401  pylint: disable=import-outside-toplevel,unused-import
@@ -0,0 +1,54 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence
+
+from django.db import connections
+from django.db.models import Exists, Model, OuterRef, QuerySet
+from django.db.models.functions import Upper
+
+from crm.models import ActiveClient, Campaign, Contract, PotentialClient, Service
+
+
+@dataclass(frozen=True)
+class AutocompleteSource:
+    """Источник подсказок для поля внешнего ключа"""
+
+    model: type
+    field: str
+    group_names: Sequence[str]
+    queryset: Callable[[], QuerySet]
+
+
+def free_contracts() -> QuerySet:
+    """Контракты, еще не привязанные к активному клиенту (NOT EXISTS)"""
+
+    return Contract.objects.filter(~Exists(ActiveClient.objects.filter(contract=OuterRef("pk"))))
+
+
+AUTOCOMPLETE_SOURCES: Dict[str, AutocompleteSource] = {
+    "service": AutocompleteSource(Service, "name", ("Marketer", "Manager"), Service.objects.all),
+    "campaign": AutocompleteSource(Campaign, "name", ("Operator",), Campaign.objects.all),
+    "potential_client": AutocompleteSource(PotentialClient, "full_name", ("Manager",), PotentialClient.objects.all),
+    "contract": AutocompleteSource(Contract, "name", ("Manager",), Contract.objects.all),
+    "free_contract": AutocompleteSource(Contract, "name", ("Manager",), free_contracts),
+}
+
+
+# SEARCH
+def autocomplete(source: AutocompleteSource, query: str, limit: int) -> List[Model]:
+    """Объекты источника, значение поля которых начинается с query без учета регистра.
+
+    Условие UPPER(поле) LIKE 'QUERY%' совпадает с выражением индекса из миграции
+    0008_autocomplete_indexes. На SQLite
+    LIKE не использует индекс по выражению, поэтому добавляется равносильное
+    условие на диапазон, которое его использует.
+    """
+
+    prefix: str = query.strip().upper()
+    if not prefix:
+        return []
+
+    queryset: QuerySet = source.queryset().annotate(upper_value=Upper(source.field))
+    queryset = queryset.filter(upper_value__startswith=prefix)
+    if connections[queryset.db].vendor == "sqlite":
+        queryset = queryset.filter(upper_value__gte=prefix, upper_value__lt=prefix[:-1] + chr(ord(prefix[-1]) + 1))
+    return list(queryset.only("pk", source.field).order_by("upper_value", "pk")[:limit])
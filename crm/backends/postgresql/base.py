@@ -0,0 +1,7 @@
+from django.db.backends.postgresql import base
+
+from crm.dbpool import ConnectionStatsMixin
+
+
+class DatabaseWrapper(ConnectionStatsMixin, base.DatabaseWrapper):
+    """Бэкенд PostgreSQL со статистикой открытия соединений"""
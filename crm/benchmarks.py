@@ -0,0 +1,406 @@
+import asyncio
+import json
+import math
+import platform
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+from urllib.parse import urlsplit
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import caches
+from django.db import connection, models, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+from crm import urls
+from crm.models import PotentialClient
+
+# Наборы данных бенчмарка: примерное общее количество строк и количество записей моделей
+DATASETS: Dict[str, Dict[str, int]] = {
+    "10k": {
+        "services": 20,
+        "campaigns": 100,
+        "potential_clients": 5_000,
+        "contracts": 2_500,
+        "active_clients": 2_000,
+    },
+    "100k": {
+        "services": 50,
+        "campaigns": 500,
+        "potential_clients": 50_000,
+        "contracts": 25_000,
+        "active_clients": 20_000,
+    },
+    "1m": {
+        "services": 200,
+        "campaigns": 2_000,
+        "potential_clients": 500_000,
+        "contracts": 250_000,
+        "active_clients": 200_000,
+    },
+}
+
+# Модель, первичный ключ которой подставляется в маршрут, если она отличается от модели представления
+ROUTE_MODELS: Dict[str, Type[models.Model]] = {
+    "create_active_client": PotentialClient,
+}
+
+# Параметры GET-запроса для маршрутов, которым они нужны
+ROUTE_QUERIES: Dict[str, Dict[str, str]] = {
+    "search": {"q": "ivanov"},
+    "statistics_breakdown": {"start": "2000-01-01"},
+    "autocomplete_service": {"q": "a"},
+    "autocomplete_campaign": {"q": "a"},
+    "autocomplete_potential_client": {"q": "a"},
+    "autocomplete_contract": {"q": "a"},
+    "autocomplete_free_contract": {"q": "a"},
+}
+
+# Маршруты, которые не замеряются: API загрузки без GET-страницы, отдача файлов,
+# которых нет у данных, сгенерированных без документов, и статус задач, которые не генерируются
+SKIPPED_ROUTES: Sequence[str] = ("document_upload", "document_upload_part", "contract_document", "job_details")
+
+GROUPS: Sequence[str] = ("Operator", "Marketer", "Manager")
+
+# Метрики, по которым ищутся регрессии, и допустимый рост в долях
+COMPARED_METRICS: Sequence[str] = ("p50_ms", "p95_ms", "queries", "peak_memory_kb")
+
+
+@dataclass
+class RouteResult:
+    """Результат замера одного маршрута"""
+
+    url: str
+    status: int
+    iterations: int
+    cold_ms: float
+    min_ms: float
+    mean_ms: float
+    p50_ms: float
+    p90_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    queries: int
+    peak_memory_kb: float
+
+
+@dataclass
+class Regression:
+    """Регрессия метрики маршрута относительно базового замера"""
+
+    dataset: str
+    route: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return (self.current - self.baseline) / self.baseline if self.baseline else math.inf
+
+    def __str__(self) -> str:
+        return f"{self.dataset} {self.route} {self.metric}: {self.baseline} -> {self.current} ({self.change:+.0%})"
+
+
+@dataclass
+class BenchmarkRun:
+    """Результаты бенчмарка по наборам данных"""
+
+    meta: Dict[str, Any] = field(default_factory=dict)
+    results: Dict[str, Dict[str, RouteResult]] = field(default_factory=dict)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "meta": self.meta,
+            "results": {
+                dataset: {route: asdict(result) for route, result in routes.items()}
+                for dataset, routes in self.results.items()
+            },
+        }
+
+    def save(self, path: Path) -> None:
+        path.write_text(json.dumps(self.to_json(), indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def percentile(values: Sequence[float], rank: float) -> float:
+    """Процентиль методом ближайшего ранга"""
+
+    ordered: List[float] = sorted(values)
+    index: int = max(0, math.ceil(rank / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def named_routes() -> Iterable[Tuple[str, URLPattern]]:
+    """Именованные маршруты crm/urls.py"""
+
+    for pattern in urls.urlpatterns:
+        if isinstance(pattern, URLPattern) and pattern.name and pattern.name not in SKIPPED_ROUTES:
+            yield pattern.name, pattern
+
+
+def route_url(name: str, pattern: URLPattern) -> Optional[str]:
+    """URL маршрута с первичным ключом первой записи модели представления"""
+
+    url_name: str = f"{urls.app_name}:{name}"
+    query: str = "&".join(f"{key}={value}" for key, value in ROUTE_QUERIES.get(name, {}).items())
+    suffix: str = f"?{query}" if query else ""
+    if "pk" not in pattern.pattern.converters:
+        return reverse(url_name) + suffix
+
+    view_class = getattr(pattern.callback, "view_class", None)
+    model: Optional[Type[models.Model]] = ROUTE_MODELS.get(name) or getattr(view_class, "model", None)
+    pk: Optional[int] = model.objects.order_by("pk").values_list("pk", flat=True).first() if model else None
+    if pk is None:
+        return None
+    return reverse(url_name, kwargs={"pk": pk}) + suffix
+
+
+def benchmark_user() -> User:
+    """Суперпользователь во всех группах, которому доступны все маршруты"""
+
+    user, _ = User.objects.get_or_create(username="benchmark", defaults={"is_superuser": True, "is_staff": True})
+    user.groups.set([Group.objects.get_or_create(name=name)[0] for name in GROUPS])
+    return user
+
+
+def timed_request(client: Client, url: str) -> Tuple[float, int]:
+    started: float = time.perf_counter()
+    response = client.get(url)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return (time.perf_counter() - started) * 1000, response.status_code
+
+
+def benchmark_route(client: Client, url: str, iterations: int) -> RouteResult:
+    """Замер маршрута: холодный запрос, задержки, число запросов к БД и пик памяти.
+
+    Пик памяти снимается отдельным запросом под tracemalloc, чтобы трассировка
+    не искажала задержки.
+    """
+
+    for alias in caches:
+        caches[alias].clear()
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        cold_ms, status = timed_request(client, url)
+    # Журнал запросов очищается в начале каждого запроса, поэтому число считается сразу
+    query_count: int = len(queries)
+
+    timings: List[float] = [timed_request(client, url)[0] for _ in range(iterations)]
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        timed_request(client, url)
+        peak: int = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return RouteResult(
+        url=url,
+        status=status,
+        iterations=iterations,
+        cold_ms=round(cold_ms, 3),
+        min_ms=round(min(timings), 3),
+        mean_ms=round(statistics.fmean(timings), 3),
+        p50_ms=round(percentile(timings, 50), 3),
+        p90_ms=round(percentile(timings, 90), 3),
+        p95_ms=round(percentile(timings, 95), 3),
+        p99_ms=round(percentile(timings, 99), 3),
+        max_ms=round(max(timings), 3),
+        queries=query_count,
+        peak_memory_kb=round(peak / 1024, 1),
+    )
+
+
+def benchmark_routes(
+    iterations: int,
+    routes: Optional[Sequence[str]] = None,
+    progress: Optional[Callable[[str, RouteResult], None]] = None,
+) -> Dict[str, RouteResult]:
+    """Замер всех (или перечисленных) именованных маршрутов на текущих данных"""
+
+    client = Client()
+    client.force_login(benchmark_user())
+    results: Dict[str, RouteResult] = {}
+    for name, pattern in named_routes():
+        if routes and name not in routes:
+            continue
+        url: Optional[str] = route_url(name, pattern)
+        if url is None:
+            continue
+        results[name] = benchmark_route(client, url, iterations)
+        if progress is not None:
+            progress(name, results[name])
+    return results
+
+
+def run_meta(iterations: int) -> Dict[str, Any]:
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "iterations": iterations,
+    }
+
+
+def load_results(path: Path) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    return json.loads(path.read_text(encoding="utf-8"))["results"]
+
+
+def compare_results(
+    baseline: Dict[str, Dict[str, Dict[str, Any]]],
+    current: Dict[str, Dict[str, Dict[str, Any]]],
+    threshold: float,
+    metrics: Sequence[str] = COMPARED_METRICS,
+) -> List[Regression]:
+    """Поиск метрик, выросших относительно базового замера больше чем на threshold.
+
+    Число запросов к БД сравнивается строго: любой рост считается регрессией.
+    """
+
+    regressions: List[Regression] = []
+    for dataset, routes in current.items():
+        for route, result in routes.items():
+            base: Optional[Dict[str, Any]] = baseline.get(dataset, {}).get(route)
+            if base is None:
+                continue
+            for metric in metrics:
+                allowed: float = 0 if metric == "queries" else threshold
+                if result[metric] > base[metric] * (1 + allowed):
+                    regressions.append(Regression(dataset, route, metric, base[metric], result[metric]))
+    return regressions
+
+
+# SERVERS
+# Пары маршрутов для сравнения: синхронное представление под WSGI и асинхронное под ASGI
+SERVER_ROUTES: Sequence[Tuple[str, str]] = (
+    ("services", "async_services"),
+    ("potential_clients", "async_potential_clients"),
+    ("contracts", "async_contracts"),
+    ("active_clients", "async_active_clients"),
+    ("contract_details", "async_contract_details"),
+    ("active_client_details", "async_active_client_details"),
+    ("statistics", "async_statistics"),
+)
+
+
+@dataclass
+class LoadResult:
+    """Результат нагрузочного теста одного URL"""
+
+    url: str
+    concurrency: int
+    requests: int
+    errors: int
+    duration: float
+    requests_per_second: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def session_cookie(user: User) -> str:
+    """Сессия пользователя для запросов нагрузочного теста"""
+
+    client = Client()
+    client.force_login(user)
+    return f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+
+
+def route_path(name: str) -> Optional[str]:
+    for route_name, pattern in named_routes():
+        if route_name == name:
+            return route_url(name, pattern)
+    return None
+
+
+async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, bool]:
+    """Чтение ответа HTTP/1.1: код статуса и признак закрытия соединения"""
+
+    head: bytes = await reader.readuntil(b"\r\n\r\n")
+    lines: List[str] = head.decode("latin-1").split("\r\n")
+    status: int = int(lines[0].split()[1])
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if ":" in line:
+            key, value = line.split(":", 1)
+            headers[key.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size: int = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    else:
+        await reader.read()
+        return status, True
+    return status, headers.get("connection", "").lower() == "close"
+
+
+async def load_test(url: str, cookie: str, concurrency: int, duration: float) -> LoadResult:
+    """Нагрузка URL concurrency соединениями с keep-alive в течение duration секунд"""
+
+    parts = urlsplit(url)
+    path: str = parts.path + (f"?{parts.query}" if parts.query else "")
+    request: bytes = (
+        f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nCookie: {cookie}\r\nConnection: keep-alive\r\n\r\n"
+    ).encode()
+    timings: List[float] = []
+    errors: int = 0
+    deadline: float = time.perf_counter() + duration
+
+    async def worker() -> None:
+        nonlocal errors
+        connection: Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = None
+        while time.perf_counter() < deadline:
+            started: float = time.perf_counter()
+            try:
+                if connection is None:
+                    connection = await asyncio.open_connection(parts.hostname, parts.port or 80)
+                reader, writer = connection
+                writer.write(request)
+                await writer.drain()
+                status, close = await _read_response(reader)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                errors += 1
+                connection = None
+                continue
+            if status == 200:
+                timings.append((time.perf_counter() - started) * 1000)
+            else:
+                errors += 1
+            if close:
+                writer.close()
+                connection = None
+        if connection is not None:
+            connection[1].close()
+
+    started: float = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed: float = time.perf_counter() - started
+    return LoadResult(
+        url=url,
+        concurrency=concurrency,
+        requests=len(timings),
+        errors=errors,
+        duration=round(elapsed, 3),
+        requests_per_second=round(len(timings) / elapsed, 1),
+        p50_ms=round(percentile(timings, 50), 3) if timings else 0.0,
+        p95_ms=round(percentile(timings, 95), 3) if timings else 0.0,
+        p99_ms=round(percentile(timings, 99), 3) if timings else 0.0,
+    )
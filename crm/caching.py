@@ -0,0 +1,218 @@
+import hashlib
+import logging
+import random
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import connections, transaction
+from django.db.models import Model
+from django.http import HttpRequest, HttpResponse
+
+from crm.permissions import group_membership
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "crm:generation:{namespace}"
+
+
+# NAMESPACES
+def model_namespace(model: Type[Model]) -> str:
+    """Пространство ключей модели"""
+
+    return model._meta.model_name  # type: ignore
+
+
+def initial_generation() -> int:
+    # Начало со времени в микросекундах: после вытеснения счетчика из кэша поколения не повторяются
+    return time.time_ns() // 1000
+
+
+def get_generations(namespaces: Sequence[str]) -> str:
+    """Текущие поколения пространств ключей одним get_many, строкой для ключа кэша.
+
+    Отсутствующий счетчик создается через add, поэтому параллельные процессы
+    получают одно и то же значение.
+    """
+
+    if not namespaces:
+        return ""
+    cache: BaseCache = caches[settings.GENERATION_CACHE_ALIAS]
+    keys: List[str] = [GENERATION_KEY.format(namespace=namespace) for namespace in namespaces]
+    generations: Dict[str, Any] = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, initial_generation(), None)
+            generations[key] = cache.get(key)
+    return ".".join(str(generations[key]) for key in keys)
+
+
+def bump_generation(namespace: str) -> None:
+    """Переход пространства ключей на новое поколение.
+
+    Ключи, построенные с прежним поколением, перестают читаться во всех
+    процессах, использующих общий кэш. incr атомарен в Redis, в файловом кэше
+    параллельные увеличения могут совпасть, но поколение все равно меняется.
+    """
+
+    cache: BaseCache = caches[settings.GENERATION_CACHE_ALIAS]
+    key: str = GENERATION_KEY.format(namespace=namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, initial_generation(), None):
+            cache.incr(key)
+
+
+def bump_generation_on_commit(namespace: str) -> None:
+    """Смена поколения после фиксации транзакции.
+
+    До фиксации другой процесс успел бы закэшировать старые данные уже под
+    новым поколением.
+    """
+
+    transaction.on_commit(lambda: bump_generation(namespace))
+
+
+def get_role(user) -> str:
+    """Роль пользователя для разделения закэшированных ответов"""
+
+    if user.is_superuser:
+        return "superuser"
+    return ",".join(sorted(group_membership.get_groups(user))) or "user"
+
+
+def jittered(timeout: float, jitter: float) -> float:
+    """Время жизни со случайным разбросом, чтобы истечения не совпадали"""
+
+    return timeout * random.uniform(1 - jitter, 1 + jitter)
+
+
+def start_background_refresh(refresh: Callable[[], None]) -> None:
+    """Запуск обновления закэшированного значения в фоновом потоке"""
+
+    def run() -> None:
+        try:
+            refresh()
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def detached_request(request: HttpRequest) -> HttpRequest:
+    """Копия GET-запроса для фонового обновления.
+
+    Исходный запрос к этому времени уже обработан и может переиспользоваться
+    сервером, поэтому фоновый поток получает свой объект с тем же путем,
+    параметрами, заголовками и пользователем.
+    """
+
+    clone = HttpRequest()
+    clone.method = "GET"
+    clone.path = request.path
+    clone.path_info = request.path_info
+    clone.GET = request.GET.copy()
+    clone.META = {key: value for key, value in request.META.items() if isinstance(value, (str, int, float))}
+    clone.COOKIES = dict(request.COOKIES)
+    clone.user = request.user  # type: ignore
+    clone.resolver_match = request.resolver_match
+    return clone
+
+
+def wait_for_entry(cache: BaseCache, key: str, lock_key: str) -> Optional[Dict[str, Any]]:
+    """Ожидание значения, которое вычисляет воркер, захвативший блокировку"""
+
+    deadline: float = time.monotonic() + settings.CACHE_WAIT_TIME
+    while time.monotonic() < deadline:
+        time.sleep(settings.CACHE_POLL_INTERVAL)
+        entry: Optional[Dict[str, Any]] = cache.get(key)
+        if entry is not None or not cache.get(lock_key):
+            return entry
+    return None
+
+
+def stale_while_revalidate(
+    timeout: Optional[int] = None,
+    stale_timeout: Optional[int] = None,
+    jitter: Optional[float] = None,
+    key_prefix: str = "crm:swr",
+    namespaces: Sequence[str] = (),
+) -> Callable:
+    """Декоратор кэширования ответа представления по схеме stale-while-revalidate.
+
+    Свежий ответ отдается из кэша. Устаревший ответ тоже отдается из кэша, а его
+    обновление запускается в фоне только одним воркером, захватившим блокировку.
+    При промахе ответ тоже вычисляет только владелец блокировки, остальные
+    отдают ответ прошлого поколения или ждут появления нового. Ключ кэша
+    учитывает роль пользователя, анонимные запросы не кэшируются. Если заданы
+    namespaces, ключ включает их поколения, и запись в любую из моделей сразу
+    сбрасывает ответ во всех процессах.
+    """
+
+    def decorator(view_func: Callable) -> Callable:
+        @wraps(view_func)
+        def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            if request.method not in ("GET", "HEAD") or not request.user.is_authenticated:
+                return view_func(request, *args, **kwargs)
+
+            cache: BaseCache = caches[settings.SWR_CACHE_ALIAS]
+            fresh_time: float = timeout if timeout is not None else settings.CACHE_TIME
+            stale_time: float = stale_timeout if stale_timeout is not None else settings.CACHE_STALE_TIME
+            spread: float = jitter if jitter is not None else settings.CACHE_JITTER
+
+            raw_key: str = f"{request.get_full_path()}:{get_role(request.user)}"
+            # Последний ответ без учета поколений, который отдается, пока новое поколение вычисляется
+            latest_key: str = f"{key_prefix}:latest:{hashlib.md5(raw_key.encode()).hexdigest()}"
+            raw_key = f"{raw_key}:{get_generations(namespaces)}"
+            key: str = f"{key_prefix}:{hashlib.md5(raw_key.encode()).hexdigest()}"
+            lock_key: str = f"{key}:lock"
+
+            def compute(current: HttpRequest) -> HttpResponse:
+                response = view_func(current, *args, **kwargs)
+                if hasattr(response, "render") and callable(response.render):
+                    response = response.render()
+                if response.status_code == 200 and not response.streaming:
+                    entry: Dict[str, Any] = {
+                        "content": response.content,
+                        "content_type": response["Content-Type"],
+                        "fresh_until": time.time() + jittered(fresh_time, spread),
+                    }
+                    expires: float = fresh_time + jittered(stale_time, spread)
+                    cache.set_many({key: entry, latest_key: entry}, expires)
+                return response
+
+            def cached(entry: Dict[str, Any]) -> HttpResponse:
+                return HttpResponse(entry["content"], content_type=entry["content_type"])
+
+            entry: Optional[Dict[str, Any]] = cache.get(key)
+            if entry is None:
+                if cache.add(lock_key, 1, settings.CACHE_LOCK_TIME):
+                    try:
+                        return compute(request)
+                    finally:
+                        cache.delete(lock_key)
+                entry = cache.get(latest_key) or wait_for_entry(cache, key, lock_key)
+                return cached(entry) if entry is not None else compute(request)
+
+            if entry["fresh_until"] < time.time() and cache.add(lock_key, 1, settings.CACHE_LOCK_TIME):
+                background: HttpRequest = detached_request(request)
+
+                def refresh() -> None:
+                    try:
+                        compute(background)
+                    except Exception:  # pylint: disable=broad-exception-caught
+                        logger.exception("Не удалось обновить кэш %s", background.path)
+                    finally:
+                        cache.delete(lock_key)
+
+                start_background_refresh(refresh)
+
+            return cached(entry)
+
+        return wrapper
+
+    return decorator
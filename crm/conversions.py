@@ -0,0 +1,115 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Set, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Value
+
+from crm.models import ActiveClient, Contract, PotentialClient
+from crm.signals import post_bulk_create
+
+# Пара (id потенциального клиента, id контракта)
+Conversion = Tuple[int, int]
+
+# Попытки конвертации при гонке с параллельной записью тех же клиентов или контрактов
+CONVERSION_ATTEMPTS = 3
+
+
+@dataclass
+class ConversionConflict:
+    """Строка конвертации, которая не может быть выполнена"""
+
+    row: int
+    potential_client: int
+    contract: int
+    error: str
+
+
+@dataclass
+class ConversionReport:
+    """Отчет о массовой конвертации потенциальных клиентов"""
+
+    created: List[ActiveClient] = field(default_factory=list)
+    conflicts: List[ConversionConflict] = field(default_factory=list)
+
+
+def _load_state(conversions: Sequence[Conversion]) -> Dict[Tuple[str, int], bool]:
+    """Существование клиентов и контрактов и их занятость одним запросом.
+
+    Возвращает {("client" | "contract", id): уже привязан к активному клиенту}.
+    """
+
+    clients = (
+        PotentialClient.objects.filter(pk__in={client_id for client_id, _ in conversions})
+        .annotate(kind=Value("client"), taken=Exists(ActiveClient.objects.filter(potential_client=OuterRef("pk"))))
+        .values_list("kind", "pk", "taken")
+        .order_by()
+    )
+    contracts = (
+        Contract.objects.filter(pk__in={contract_id for _, contract_id in conversions})
+        .annotate(kind=Value("contract"), taken=Exists(ActiveClient.objects.filter(contract=OuterRef("pk"))))
+        .values_list("kind", "pk", "taken")
+        .order_by()
+    )
+    return {(kind, pk): bool(taken) for kind, pk, taken in clients.union(contracts, all=True)}
+
+
+def validate_conversions(conversions: Sequence[Conversion]) -> Tuple[List[Conversion], List[ConversionConflict]]:
+    """Разделение строк на допустимые и конфликтующие по ограничениям OneToOne"""
+
+    state: Dict[Tuple[str, int], bool] = _load_state(conversions) if conversions else {}
+    valid: List[Conversion] = []
+    conflicts: List[ConversionConflict] = []
+    seen_clients: Set[int] = set()
+    seen_contracts: Set[int] = set()
+
+    for row, (client_id, contract_id) in enumerate(conversions, start=1):
+        error: str = ""
+        if ("client", client_id) not in state:
+            error = "Потенциальный клиент не найден"
+        elif ("contract", contract_id) not in state:
+            error = "Контракт не найден"
+        elif state["client", client_id]:
+            error = "Потенциальный клиент уже стал активным"
+        elif state["contract", contract_id]:
+            error = "Контракт уже привязан к активному клиенту"
+        elif client_id in seen_clients:
+            error = "Потенциальный клиент повторяется в запросе"
+        elif contract_id in seen_contracts:
+            error = "Контракт повторяется в запросе"
+
+        if error:
+            conflicts.append(ConversionConflict(row, client_id, contract_id, error))
+            continue
+        seen_clients.add(client_id)
+        seen_contracts.add(contract_id)
+        valid.append((client_id, contract_id))
+    return valid, conflicts
+
+
+def convert_potential_clients(conversions: Sequence[Conversion]) -> ConversionReport:
+    """Массовое создание активных клиентов из пар (потенциальный клиент, контракт).
+
+    Строки проверяются одним запросом, допустимые вставляются через bulk_create
+    в одной транзакции, конфликтующие попадают в отчет. Статистика обновляется
+    один раз сигналом post_bulk_create. Если параллельный запрос успел занять
+    клиента или контракт, транзакция откатывается и проверка повторяется.
+    """
+
+    attempts: int = CONVERSION_ATTEMPTS
+    while True:
+        attempts -= 1
+        try:
+            with transaction.atomic():
+                valid, conflicts = validate_conversions(conversions)
+                created: List[ActiveClient] = ActiveClient.objects.bulk_create(
+                    [
+                        ActiveClient(potential_client_id=client_id, contract_id=contract_id)
+                        for client_id, contract_id in valid
+                    ]
+                )
+                post_bulk_create.send(sender=ActiveClient, instances=created)
+        except IntegrityError:
+            if not attempts:
+                raise
+            continue
+        return ConversionReport(created=created, conflicts=conflicts)
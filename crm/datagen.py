@@ -0,0 +1,337 @@
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate, islice
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Type
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, models, transaction
+from django.db.models import Max
+
+from crm import caching, fragments, versioning
+from crm.models import Service, Campaign, PotentialClient, Contract, ActiveClient
+from crm.search import rebuild_index
+from crm.statistics import rebuild_buckets, rebuild_snapshot
+
+# Количество записей каждой модели для предопределенных масштабов
+SCALES: Dict[str, Dict[str, int]] = {
+    "tiny": {
+        "services": 5,
+        "campaigns": 20,
+        "potential_clients": 200,
+        "contracts": 120,
+        "active_clients": 100,
+    },
+    "small": {
+        "services": 20,
+        "campaigns": 200,
+        "potential_clients": 20_000,
+        "contracts": 12_000,
+        "active_clients": 10_000,
+    },
+    "medium": {
+        "services": 100,
+        "campaigns": 2_000,
+        "potential_clients": 1_000_000,
+        "contracts": 600_000,
+        "active_clients": 500_000,
+    },
+    "large": {
+        "services": 500,
+        "campaigns": 10_000,
+        "potential_clients": 5_000_000,
+        "contracts": 3_000_000,
+        "active_clients": 2_000_000,
+    },
+}
+
+# Модели генератора и их ключи в отчете
+MODEL_KEYS: Sequence[Tuple[Type[models.Model], str]] = (
+    (Service, "services"),
+    (Campaign, "campaigns"),
+    (PotentialClient, "potential_clients"),
+    (Contract, "contracts"),
+    (ActiveClient, "active_clients"),
+)
+
+PLACEHOLDER_DOCUMENTS = 16
+PLACEHOLDER_PATH = "documents/generated/placeholder_{}.pdf"
+PLACEHOLDER_CONTENT = b"%PDF-1.4\n% placeholder contract document\n%%EOF\n"
+
+FIRST_NAMES: Sequence[str] = (
+    "Alexander", "Maria", "Ivan", "Anna", "Dmitry", "Elena", "Sergey", "Olga", "Andrey", "Natalia",
+    "Mikhail", "Tatiana", "Nikolay", "Irina", "Pavel", "Svetlana", "Alexey", "Ekaterina", "Artem", "Yulia",
+)
+LAST_NAMES: Sequence[str] = (
+    "Ivanov", "Smirnov", "Kuznetsov", "Popov", "Vasiliev", "Petrov", "Sokolov", "Mikhailov", "Novikov",
+    "Fedorov", "Morozov", "Volkov", "Alekseev", "Lebedev", "Semenov", "Egorov", "Pavlov", "Kozlov",
+)
+EMAIL_DOMAINS: Sequence[str] = ("gmail.com", "yandex.ru", "mail.ru", "icloud.com", "outlook.com")
+SERVICE_KINDS: Sequence[str] = (
+    "Consulting", "Audit", "Support", "Hosting", "Training", "Design", "Development", "Analytics",
+)
+# Каналы продвижения и их доли среди кампаний
+PROMOTION_CHANNELS: Dict[str, float] = {
+    "Search ads": 0.3,
+    "Social networks": 0.25,
+    "Email": 0.15,
+    "Display ads": 0.12,
+    "Partners": 0.1,
+    "Offline": 0.08,
+}
+VALIDITY_PERIODS: Dict[int, float] = {6: 0.2, 12: 0.5, 24: 0.2, 36: 0.1}
+
+
+@dataclass
+class GenerationReport:
+    """Отчет о сгенерированных данных"""
+
+    created: Dict[str, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return sum(self.created.values())
+
+    @property
+    def rows_per_second(self) -> float:
+        return round(self.total / self.elapsed, 1) if self.elapsed else 0.0
+
+
+def zipf_weights(size: int, exponent: float = 1.1) -> List[float]:
+    """Накопленные веса распределения Ципфа: несколько популярных значений и длинный хвост"""
+
+    return list(accumulate(1 / (rank**exponent) for rank in range(1, size + 1)))
+
+
+def money(rng: random.Random, median: float, sigma: float) -> Decimal:
+    """Денежная сумма с логнормальным распределением"""
+
+    return Decimal(str(round(rng.lognormvariate(0, sigma) * median, 2)))
+
+
+class DataGenerator:
+    """Генератор синтетических данных CRM.
+
+    Все значения получаются из random.Random с заданным seed, поэтому один и тот
+    же масштаб и seed дают одинаковые данные. Записи создаются через bulk_create
+    пачками, связи строятся по первичным ключам, которые читаются потоком из БД,
+    так что память не зависит от масштаба.
+    """
+
+    def __init__(
+        self,
+        counts: Dict[str, int],
+        seed: int = 0,
+        batch_size: int = 5000,
+        write_documents: bool = True,
+        progress: Optional[Callable[[str, int], None]] = None,
+    ) -> None:
+        self.counts = counts
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.write_documents = write_documents
+        self.progress = progress
+        self.report = GenerationReport()
+
+    # HELPERS
+    def bulk_insert(self, model: Type[models.Model], key: str, objects: Iterator[models.Model]) -> int:
+        """Вставка объектов пачками с сообщением о прогрессе"""
+
+        created: int = 0
+        while True:
+            batch: List[models.Model] = list(islice(objects, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size)  # type: ignore
+                # Новые строки дают новые ключи разметки, сбрасываются только зависящие от них строки
+                fragments.invalidate_dependents_on_commit(model, batch)
+            created += len(batch)
+            if self.progress is not None:
+                self.progress(key, created)
+        self.report.created[key] = created
+        return created
+
+    @staticmethod
+    def last_pk(model: Type[models.Model]) -> int:
+        return model.objects.aggregate(last=Max("pk"))["last"] or 0  # type: ignore
+
+    @classmethod
+    def ids_or_existing(cls, model: Type[models.Model], after: int) -> List[int]:
+        """Ключи новых записей, а если их нет - всех существующих"""
+
+        return list(cls.new_pks(model, after)) or list(cls.new_pks(model, 0))
+
+    @staticmethod
+    def new_pks(model: Type[models.Model], after: int) -> Iterator[int]:
+        """Потоковое чтение первичных ключей записей, созданных после after"""
+
+        queryset = model.objects.filter(pk__gt=after).order_by("pk").values_list("pk", flat=True)  # type: ignore
+        return queryset.iterator(chunk_size=10_000)
+
+    def placeholder_documents(self) -> List[str]:
+        """Небольшой пул файлов-заглушек, на которые ссылаются контракты"""
+
+        names: List[str] = [PLACEHOLDER_PATH.format(number) for number in range(PLACEHOLDER_DOCUMENTS)]
+        if self.write_documents:
+            for name in names:
+                if not default_storage.exists(name):
+                    default_storage.save(name, ContentFile(PLACEHOLDER_CONTENT))
+        return names
+
+    # MODELS
+    def services(self) -> Iterator[Service]:
+        for number in range(self.counts.get("services", 0)):
+            kind: str = self.rng.choice(SERVICE_KINDS)
+            yield Service(
+                name=f"{kind} #{number + 1}",
+                description=f"{kind} service generated for load testing",
+                cost=money(self.rng, 5000, 0.8),
+            )
+
+    def campaigns(self, service_ids: List[int]) -> Iterator[Campaign]:
+        channels: List[str] = list(PROMOTION_CHANNELS)
+        channel_weights: List[float] = list(accumulate(PROMOTION_CHANNELS.values()))
+        service_weights: List[float] = zipf_weights(len(service_ids))
+        for number in range(self.counts.get("campaigns", 0)):
+            channel: str = self.rng.choices(channels, cum_weights=channel_weights)[0]
+            yield Campaign(
+                name=f"{channel} campaign #{number + 1}",
+                service_id=self.rng.choices(service_ids, cum_weights=service_weights)[0],
+                promotion_channel=channel,
+                budget=money(self.rng, 20000, 1.0),
+            )
+
+    def potential_clients(self, campaign_ids: List[int], offset: int) -> Iterator[PotentialClient]:
+        campaign_weights: List[float] = zipf_weights(len(campaign_ids))
+        for number in range(offset, offset + self.counts.get("potential_clients", 0)):
+            first_name: str = self.rng.choice(FIRST_NAMES)
+            last_name: str = self.rng.choice(LAST_NAMES)
+            yield PotentialClient(
+                full_name=f"{last_name} {first_name}",
+                phone=f"7{number:010d}",
+                email=f"{first_name}.{last_name}.{number}@{self.rng.choice(EMAIL_DOMAINS)}".lower(),
+                campaign_id=self.rng.choices(campaign_ids, cum_weights=campaign_weights)[0],
+            )
+
+    def contracts(self, service_ids: List[int], documents: List[str]) -> Iterator[Contract]:
+        periods: List[int] = list(VALIDITY_PERIODS)
+        period_weights: List[float] = list(accumulate(VALIDITY_PERIODS.values()))
+        service_weights: List[float] = zipf_weights(len(service_ids))
+        start: date = date.today() - timedelta(days=730)
+        for number in range(self.counts.get("contracts", 0)):
+            # Контракты чаще заключаются ближе к текущей дате
+            day: date = start + timedelta(days=int(730 * self.rng.betavariate(2, 1)))
+            yield Contract(
+                name=f"Contract #{number + 1}",
+                service_id=self.rng.choices(service_ids, cum_weights=service_weights)[0],
+                document=self.rng.choice(documents),
+                conclusion_date=day,
+                validity_period=self.rng.choices(periods, cum_weights=period_weights)[0],
+                amount=money(self.rng, 15000, 0.9),
+            )
+
+    def active_clients(self, potential_clients_after: int, contracts_after: int) -> Iterator[ActiveClient]:
+        limit: int = min(
+            self.counts.get("active_clients", 0),
+            self.counts.get("potential_clients", 0),
+            self.counts.get("contracts", 0),
+        )
+        if not limit:
+            return
+        total: int = self.counts["potential_clients"]
+        conversion: float = limit / total
+        contract_ids: Iterator[int] = self.new_pks(Contract, contracts_after)
+        created: int = 0
+        potential_client_ids: Iterator[int] = self.new_pks(PotentialClient, potential_clients_after)
+        for number, potential_client_id in enumerate(potential_client_ids):
+            if created >= limit:
+                break
+            # Клиенты конвертируются с вероятностью conversion, в конце добираются до limit
+            if self.rng.random() >= conversion and total - number > limit - created:
+                continue
+            contract_id: Optional[int] = next(contract_ids, None)
+            if contract_id is None:
+                break
+            created += 1
+            yield ActiveClient(potential_client_id=potential_client_id, contract_id=contract_id)
+
+    def run(self) -> GenerationReport:
+        started: float = time.monotonic()
+
+        services_after: int = self.last_pk(Service)
+        self.bulk_insert(Service, "services", self.services())
+        service_ids: List[int] = self.ids_or_existing(Service, services_after)
+
+        campaigns_after: int = self.last_pk(Campaign)
+        if service_ids:
+            self.bulk_insert(Campaign, "campaigns", self.campaigns(service_ids))
+        campaign_ids: List[int] = self.ids_or_existing(Campaign, campaigns_after)
+
+        potential_clients_after: int = self.last_pk(PotentialClient)
+        if campaign_ids:
+            self.bulk_insert(
+                PotentialClient,
+                "potential_clients",
+                self.potential_clients(campaign_ids, PotentialClient.objects.count()),
+            )
+
+        contracts_after: int = self.last_pk(Contract)
+        if service_ids:
+            self.bulk_insert(Contract, "contracts", self.contracts(service_ids, self.placeholder_documents()))
+
+        self.bulk_insert(
+            ActiveClient, "active_clients", self.active_clients(potential_clients_after, contracts_after)
+        )
+
+        self.bump_versions()
+        self.report.elapsed = time.monotonic() - started
+        return self.report
+
+    def bump_versions(self) -> None:
+        """Смена версий таблиц и поколений кэша один раз для каждой дополненной модели.
+
+        Без этого условные GET-запросы списков отвечали бы 304, а закэшированные
+        ответы показывали бы данные до генерации.
+        """
+
+        for model, key in MODEL_KEYS:
+            if self.report.created.get(key):
+                versioning.bump_table_version(model)
+                caching.bump_generation_on_commit(caching.model_namespace(model))
+
+
+def generate_crm_data(
+    scale: str = "tiny",
+    seed: int = 0,
+    batch_size: int = 5000,
+    counts: Optional[Dict[str, int]] = None,
+    write_documents: bool = True,
+    rebuild: bool = True,
+    progress: Optional[Callable[[str, int], None]] = None,
+) -> GenerationReport:
+    """Генерация синтетических данных указанного масштаба.
+
+    bulk_create не отправляет сигналы моделей, поэтому после генерации снимок и
+    корзины статистики и поисковый индекс SQLite пересчитываются целиком, а версии
+    таблиц и поколения кэша меняются генератором.
+    """
+
+    if scale not in SCALES:
+        raise ValueError(f"Неизвестный масштаб {scale}, доступны: {', '.join(SCALES)}")
+
+    generator = DataGenerator({**SCALES[scale], **(counts or {})}, seed, batch_size, write_documents, progress)
+    report: GenerationReport = generator.run()
+
+    if rebuild:
+        rebuild_snapshot()
+        rebuild_buckets(batch_size)
+        # Таблица FTS5 есть только на SQLite, триграммные индексы PostgreSQL СУБД обновляет сама
+        if connection.vendor == "sqlite":
+            rebuild_index()
+
+    return report
@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Any, DefaultDict, Dict, List, Optional
+
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+from crm.metrics import escape_label
+
+# Состояние соединений клиентов текущей БД по данным сервера PostgreSQL
+SERVER_STATS_SQL = """
+    SELECT
+        count(*),
+        count(*) FILTER (WHERE state = 'active'),
+        count(*) FILTER (WHERE state = 'idle'),
+        count(*) FILTER (WHERE state = 'idle in transaction'),
+        count(*) FILTER (WHERE wait_event_type = 'Lock'),
+        COALESCE(EXTRACT(EPOCH FROM percentile_cont(0.5) WITHIN GROUP (ORDER BY now() - backend_start)), 0),
+        COALESCE(EXTRACT(EPOCH FROM max(now() - backend_start)), 0),
+        current_setting('max_connections')::int
+    FROM pg_stat_activity
+    WHERE datname = current_database() AND backend_type = 'client backend'
+"""
+SERVER_STATS_FIELDS = (
+    "connections",
+    "active",
+    "idle",
+    "idle_in_transaction",
+    "waiting_on_locks",
+    "median_connection_age",
+    "max_connection_age",
+    "max_connections",
+)
+
+
+class ConnectionStats:
+    """Потокобезопасные счетчики соединений процесса.
+
+    Доля переиспользования считается как 1 - открытые соединения / запросы:
+    при постоянных соединениях (CONN_MAX_AGE) или пуле новое соединение
+    открывается лишь для малой части запросов.
+    """
+
+    COUNTERS = ("opened", "connect_time", "connect_max", "health_check_failures")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests: int = 0
+        self.totals: DefaultDict[str, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(self.COUNTERS, 0))
+
+    def request(self) -> None:
+        with self.lock:
+            self.requests += 1
+
+    def opened(self, alias: str, seconds: float) -> None:
+        with self.lock:
+            totals: Dict[str, float] = self.totals[alias]
+            totals["opened"] += 1
+            totals["connect_time"] += seconds
+            totals["connect_max"] = max(totals["connect_max"], seconds)
+
+    def health_check_failed(self, alias: str) -> None:
+        with self.lock:
+            self.totals[alias]["health_check_failures"] += 1
+
+    def reset(self) -> None:
+        with self.lock:
+            self.requests = 0
+            self.totals.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Счетчики по псевдонимам БД с долей переиспользования и средним временем открытия"""
+
+        with self.lock:
+            requests: int = self.requests
+            totals: Dict[str, Dict[str, float]] = {alias: dict(data) for alias, data in self.totals.items()}
+        for data in totals.values():
+            data["reuse_ratio"] = max(0.0, 1 - data["opened"] / requests) if requests else 0.0
+            data["connect_avg"] = data["connect_time"] / data["opened"] if data["opened"] else 0.0
+        return totals
+
+
+stats = ConnectionStats()
+
+
+class ConnectionStatsMixin:
+    """Миксин бэкенда БД, замеряющий открытие соединений и отказы проверки.
+
+    При включенном пуле psycopg get_new_connection берет соединение из пула,
+    поэтому замер показывает время ожидания свободного соединения.
+    """
+
+    alias: str
+    connection: Any
+
+    def get_new_connection(self, conn_params: Dict[str, Any]) -> Any:
+        started: float = time.perf_counter()
+        connection: Any = super().get_new_connection(conn_params)  # type: ignore
+        stats.opened(self.alias, time.perf_counter() - started)
+        return connection
+
+    def close_if_health_check_failed(self) -> None:
+        connected: bool = self.connection is not None
+        super().close_if_health_check_failed()  # type: ignore
+        if connected and self.connection is None:
+            stats.health_check_failed(self.alias)
+
+
+def pool_stats(connection: BaseDatabaseWrapper) -> Optional[Dict[str, Any]]:
+    """Статистика пула psycopg (Django 5.1+), если он настроен"""
+
+    pool: Any = getattr(connection, "pool", None)
+    if pool is None:
+        return None
+    data: Dict[str, Any] = dict(pool.get_stats())
+    data["saturation"] = (data["pool_size"] - data["pool_available"]) / data["pool_max"] if data["pool_max"] else 0.0
+    return data
+
+
+def server_stats(connection: BaseDatabaseWrapper) -> Optional[Dict[str, Any]]:
+    """Соединения клиентов по данным сервера: состояние, возраст и загрузка относительно max_connections"""
+
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(SERVER_STATS_SQL)
+        data: Dict[str, Any] = dict(zip(SERVER_STATS_FIELDS, cursor.fetchone()))
+    data["median_connection_age"] = float(data["median_connection_age"])
+    data["max_connection_age"] = float(data["max_connection_age"])
+    data["saturation"] = data["connections"] / data["max_connections"] if data["max_connections"] else 0.0
+    return data
+
+
+def render_prometheus(connection: BaseDatabaseWrapper) -> str:
+    """Статистика соединений процесса и пула в текстовом формате Prometheus"""
+
+    lines: List[str] = []
+    families = (
+        ("crm_db_connections_opened_total", "counter", "opened", "New database connections"),
+        ("crm_db_connect_seconds_total", "counter", "connect_time", "Time spent opening or acquiring connections"),
+        ("crm_db_connect_seconds_max", "gauge", "connect_max", "Slowest connection open or acquire"),
+        ("crm_db_health_check_failures_total", "counter", "health_check_failures", "Connections closed by checks"),
+        ("crm_db_connection_reuse_ratio", "gauge", "reuse_ratio", "Share of requests served without a new connection"),
+    )
+    totals: Dict[str, Dict[str, float]] = stats.snapshot()
+    for name, kind, key, description in families:
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for alias, data in totals.items():
+            lines.append(f'{name}{{database="{escape_label(alias)}"}} {data[key]:.6g}')
+
+    pool: Optional[Dict[str, Any]] = pool_stats(connection)
+    for key, value in (pool or {}).items():
+        lines.append(f"# TYPE crm_db_pool_{key} gauge")
+        lines.append(f'crm_db_pool_{key}{{database="{escape_label(connection.alias)}"}} {value:.6g}')
+    return "\n".join(lines) + "\n"
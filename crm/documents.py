@@ -0,0 +1,245 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from crm.models import DocumentBlob, DocumentUpload
+
+BLOB_PATH = "documents/blobs/{}/{}{}"
+PARTS_DIR = "documents/parts"
+
+
+class UploadError(Exception):
+    """Ошибка загрузки части документа"""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def blob_name(sha256: str, filename: str) -> str:
+    """Имя файла в хранилище по его SHA-256 с расширением исходного файла"""
+
+    return BLOB_PATH.format(sha256[:2], sha256, Path(filename).suffix.lower()[:10])
+
+
+def parts_path(upload: DocumentUpload) -> Path:
+    return Path(default_storage.path(PARTS_DIR)) / f"{upload.pk}.part"
+
+
+class HashStates:
+    """SHA-256 загрузок по частям, накопленный в процессе.
+
+    Хеш обновляется каждой принятой частью, поэтому после последней части
+    файл не читается заново. Если часть пришла в другой процесс, он один раз
+    дочитывает уже записанное начало файла и дальше тоже считает по частям.
+    Хранится не больше DOCUMENT_HASH_STATES загрузок, давно не обновлявшиеся
+    вытесняются.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.states: OrderedDict[Any, Tuple[int, Any]] = OrderedDict()
+
+    def take(self, upload_pk: Any, path: Path, offset: int) -> Any:
+        """Хеш первых offset байт файла загрузки"""
+
+        with self.lock:
+            received, digest = self.states.pop(upload_pk, (0, None))
+        if digest is None or received > offset:
+            received, digest = 0, hashlib.sha256()
+        if received < offset:
+            _hash_range(digest, path, received, offset)
+        return digest
+
+    def put(self, upload_pk: Any, offset: int, digest: Any) -> None:
+        with self.lock:
+            self.states[upload_pk] = (offset, digest)
+            while len(self.states) > settings.DOCUMENT_HASH_STATES:
+                self.states.popitem(last=False)
+
+    def discard(self, upload_pk: Any) -> None:
+        with self.lock:
+            self.states.pop(upload_pk, None)
+
+
+hash_states = HashStates()
+
+
+def _hash_range(digest: Any, path: Path, start: int, end: int) -> None:
+    with open(path, "rb") as file:
+        file.seek(start)
+        remaining: int = end - start
+        while remaining > 0 and (block := file.read(min(settings.DOCUMENT_BLOCK_SIZE, remaining))):
+            digest.update(block)
+            remaining -= len(block)
+
+
+def _deduplicate(path: Path, sha256: str, size: int, filename: str) -> DocumentBlob:
+    """Перенос собранного файла в хранилище по SHA-256, если такого содержимого еще нет.
+
+    Вызывается в транзакции. Найденный файл без ссылок блокируется, и его
+    touched_at обновляется: очистка не удалит его, пока новый контракт не
+    возьмет ссылку. Если очистка успела удалить строку, файл сохраняется заново.
+    """
+
+    now = timezone.now()
+    blob: Optional[DocumentBlob] = DocumentBlob.objects.select_for_update().filter(sha256=sha256).first()
+    if blob is not None:
+        DocumentBlob.objects.filter(pk=blob.pk).update(touched_at=now)
+        blob.touched_at = now
+        path.unlink(missing_ok=True)
+        return blob
+
+    name: str = blob_name(sha256, filename)
+    target = Path(default_storage.path(name))
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(path, target)
+    try:
+        with transaction.atomic():
+            return DocumentBlob.objects.create(sha256=sha256, file=name, size=size)
+    except IntegrityError:
+        # Такой же файл одновременно сохранила другая загрузка, он уже на месте
+        blob = DocumentBlob.objects.select_for_update().get(sha256=sha256)
+        DocumentBlob.objects.filter(pk=blob.pk).update(touched_at=now)
+        return blob
+
+
+def store_blob(chunks: Iterable[bytes], filename: str) -> DocumentBlob:
+    """Сохранение документа из потока частей с вычислением SHA-256 по ходу записи"""
+
+    directory = Path(default_storage.path(PARTS_DIR))
+    directory.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size: int = 0
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".part", delete=False) as file:
+        try:
+            for chunk in chunks:
+                digest.update(chunk)
+                file.write(chunk)
+                size += len(chunk)
+        except BaseException:
+            os.unlink(file.name)
+            raise
+    with transaction.atomic():
+        return _deduplicate(Path(file.name), digest.hexdigest(), size, filename)
+
+
+def _check_chunk(upload: DocumentUpload, start: int, length: int) -> None:
+    if start != upload.received:
+        raise UploadError(f"Ожидалась часть со смещения {upload.received}", status=409)
+    if length > settings.DOCUMENT_CHUNK_MAX_SIZE or start + length > upload.size:
+        raise UploadError("Часть превышает допустимый размер", status=413)
+
+
+def _read_chunk(stream: BinaryIO, length: int) -> BinaryIO:
+    """Чтение части из тела запроса во временный файл блоками DOCUMENT_BLOCK_SIZE"""
+
+    chunk = tempfile.SpooledTemporaryFile(max_size=settings.DOCUMENT_BLOCK_SIZE)  # pylint: disable=consider-using-with
+    written: int = 0
+    while written < length:
+        block: bytes = stream.read(min(settings.DOCUMENT_BLOCK_SIZE, length - written))
+        if not block:
+            break
+        chunk.write(block)
+        written += len(block)
+    if written != length:
+        chunk.close()
+        raise UploadError("Часть получена не полностью")
+    chunk.seek(0)
+    return chunk
+
+
+def append_chunk(
+    upload_pk: str, stream: BinaryIO, start: int, length: int
+) -> Tuple[DocumentUpload, Optional[DocumentBlob]]:
+    """Дозапись части загрузки, начинающейся с байта start.
+
+    Части принимаются строго по порядку, поэтому клиент после обрыва узнает
+    смещение из статуса загрузки и продолжает с него. Тело запроса сначала
+    читается целиком без блокировок, и строка загрузки блокируется только на
+    время дозаписи в файл. SHA-256 накапливается по частям, после последней
+    части файл дедуплицируется и загрузка удаляется в той же транзакции.
+    """
+
+    _check_chunk(DocumentUpload.objects.get(pk=upload_pk), start, length)
+    with _read_chunk(stream, length) as chunk, transaction.atomic():
+        upload: DocumentUpload = DocumentUpload.objects.select_for_update().get(pk=upload_pk)
+        _check_chunk(upload, start, length)
+
+        path: Path = parts_path(upload)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        digest = hash_states.take(upload.pk, path, start)
+        with open(path, "ab") as file:
+            file.truncate(start)
+            while block := chunk.read(settings.DOCUMENT_BLOCK_SIZE):
+                file.write(block)
+                digest.update(block)
+
+        upload.received = start + length
+        upload.save(update_fields=["received", "updated_at"])
+        if upload.received < upload.size:
+            hash_states.put(upload.pk, upload.received, digest)
+            return upload, None
+
+        blob: DocumentBlob = _deduplicate(path, digest.hexdigest(), upload.size, upload.filename)
+        DocumentUpload.objects.filter(pk=upload.pk).delete()
+        return upload, blob
+
+
+def upload_state(upload: DocumentUpload, blob: Optional[DocumentBlob] = None) -> Dict[str, Any]:
+    """Состояние загрузки для ответа клиенту: смещение следующей части и итоговый файл"""
+
+    state: Dict[str, Any] = {"id": str(upload.pk), "offset": upload.received, "size": upload.size}
+    if blob is not None:
+        state["sha256"] = blob.sha256
+    return state
+
+
+def retain_blob(blob_id: Optional[int]) -> None:
+    if blob_id is not None:
+        DocumentBlob.objects.filter(pk=blob_id).update(ref_count=F("ref_count") + 1, touched_at=timezone.now())
+
+
+def release_blob(blob_id: Optional[int]) -> None:
+    if blob_id is not None:
+        DocumentBlob.objects.filter(pk=blob_id, ref_count__gt=0).update(
+            ref_count=F("ref_count") - 1, touched_at=timezone.now()
+        )
+
+
+def cleanup_documents() -> Tuple[int, int]:
+    """Удаление брошенных загрузок и файлов без ссылок, пролежавших дольше льготного времени"""
+
+    now = timezone.now()
+    uploads: int = 0
+    expired = DocumentUpload.objects.filter(updated_at__lt=now - timedelta(seconds=settings.DOCUMENT_UPLOAD_EXPIRY))
+    for upload in expired:
+        hash_states.discard(upload.pk)
+        parts_path(upload).unlink(missing_ok=True)
+        upload.delete()
+        uploads += 1
+
+    blobs: int = 0
+    cutoff = now - timedelta(seconds=settings.DOCUMENT_BLOB_GRACE_TIME)
+    for blob in DocumentBlob.objects.filter(ref_count=0, touched_at__lt=cutoff).iterator():
+        # Повторная проверка под блокировкой на случай ссылки или дедупликации во время очистки
+        with transaction.atomic():
+            locked: Optional[DocumentBlob] = (
+                DocumentBlob.objects.select_for_update().filter(pk=blob.pk, ref_count=0, touched_at__lt=cutoff).first()
+            )
+            if locked is not None and not locked.contracts.exists():
+                locked.delete()
+                default_storage.delete(locked.file.name)
+                blobs += 1
+    return uploads, blobs
@@ -0,0 +1,135 @@
+import mimetypes
+import os
+import re
+from typing import BinaryIO, Optional, Tuple
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# Заголовки передачи файла веб-серверу: nginx и Apache/lighttpd
+SENDFILE_HEADERS = {
+    "nginx": "X-Accel-Redirect",
+    "apache": "X-Sendfile",
+}
+
+RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+class RangeNotSatisfiable(Exception):
+    """Запрошенный диапазон лежит за пределами файла"""
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Первый и последний байт одиночного диапазона из заголовка Range.
+
+    Несколько диапазонов и неизвестные единицы игнорируются, тогда отдается
+    весь файл, как допускает RFC 9110.
+    """
+
+    match = RANGE.fullmatch(header.strip())
+    if match is None or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Суффиксный диапазон: последние N байт
+        length: int = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start: int = int(first)
+    end: int = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def read_range(file: BinaryIO, start: int, length: int):
+    """Чтение диапазона файла блоками DOCUMENT_BLOCK_SIZE"""
+
+    with file:
+        file.seek(start)
+        while length > 0:
+            block: bytes = file.read(min(settings.DOCUMENT_BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def file_etag(sha256: Optional[str], stat: os.stat_result) -> str:
+    """ETag по SHA-256 содержимого, а для файлов вне хранилища без дубликатов - по времени изменения и размеру"""
+
+    return quote_etag(sha256 or f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+
+
+def serve_file(request: HttpRequest, name: str, filename: str, sha256: Optional[str] = None) -> HttpResponse:
+    """Отдача файла из хранилища с поддержкой Range, ETag и передачи веб-серверу.
+
+    При DOCUMENT_SENDFILE ответ без тела содержит заголовок X-Accel-Redirect
+    или X-Sendfile, и файл отправляет веб-сервер. Иначе весь файл отдается
+    через FileResponse (wsgi.file_wrapper позволяет серверу использовать
+    sendfile), а диапазон читается блоками.
+    """
+
+    try:
+        path: str = default_storage.path(name)
+        stat: os.stat_result = os.stat(path)
+    except (OSError, ValueError) as error:
+        raise Http404("Файл не найден") from error
+
+    etag: str = file_etag(sha256, stat)
+    conditional: Optional[HttpResponse] = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if conditional is not None:
+        return conditional
+
+    content_type: str = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    response: HttpResponse
+    backend: str = settings.DOCUMENT_SENDFILE
+    if backend:
+        response = HttpResponse(content_type=content_type)
+        # nginx принимает в X-Accel-Redirect URI, а mod_xsendfile - путь в файловой системе как есть:
+        # байты пути передаются без изменений, заголовки WSGI кодируются в latin-1
+        location: str = (
+            quote(settings.DOCUMENT_SENDFILE_PREFIX + name)
+            if backend == "nginx"
+            else os.fsencode(path).decode("latin-1")
+        )
+        response[SENDFILE_HEADERS[backend]] = location
+    else:
+        response = range_response(request, path, stat.st_size, etag, content_type)
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Cache-Control"] = "private, no-cache"
+    response["Content-Disposition"] = f"inline; filename*=UTF-8''{quote(filename)}"
+    return response
+
+
+def range_response(request: HttpRequest, path: str, size: int, etag: str, content_type: str) -> HttpResponse:
+    header: str = request.headers.get("Range", "")
+    if_range: str = request.headers.get("If-Range", "")
+    try:
+        byte_range: Optional[Tuple[int, int]] = parse_range(header, size) if header and if_range in ("", etag) else None
+    except RangeNotSatisfiable:
+        not_satisfiable = HttpResponse(status=416)
+        not_satisfiable["Content-Range"] = f"bytes */{size}"
+        return not_satisfiable
+
+    response: HttpResponse
+    if byte_range is None:
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(open(path, "rb"), start, end - start + 1), status=206, content_type=content_type
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+    response["Accept-Ranges"] = "bytes"
+    return response
@@ -0,0 +1,178 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+
+from crm.autocomplete import free_contracts
+from crm.documents import store_blob
+from crm.models import ActiveClient, Campaign, Contract, DocumentBlob, PotentialClient
+from crm.widgets import AutocompleteSelect
+
+
+class BreakdownFilterForm(forms.Form):
+    """Форма выбора периода разбивки статистики"""
+
+    start = forms.DateField(required=False, label="С")
+    end = forms.DateField(required=False, label="По")
+
+
+class SearchForm(forms.Form):
+    """Форма поиска клиентов и контрактов"""
+
+    q = forms.CharField(max_length=100, label="Поиск")
+
+
+class LeadImportForm(forms.Form):
+    """Форма загрузки файла потенциальных клиентов"""
+
+    file = forms.FileField(label="Файл CSV или JSONL")
+    campaign = forms.ModelChoiceField(
+        queryset=Campaign.objects.all(),
+        required=False,
+        label="Рекламная кампания",
+        help_text="Для строк без колонки campaign",
+    )
+
+
+class CampaignForm(forms.ModelForm):
+    """Форма рекламной кампании с подсказками услуг"""
+
+    class Meta:
+        model = Campaign
+        fields = "__all__"
+        widgets = {"service": AutocompleteSelect("service")}
+
+
+class PotentialClientForm(forms.ModelForm):
+    """Форма потенциального клиента с подсказками рекламных кампаний"""
+
+    class Meta:
+        model = PotentialClient
+        fields = "__all__"
+        widgets = {"campaign": AutocompleteSelect("campaign")}
+
+
+class ActiveClientForm(forms.ModelForm):
+    """Форма конвертации клиента с подсказками только свободных контрактов"""
+
+    class Meta:
+        model = ActiveClient
+        fields = ("contract",)
+        widgets = {"contract": AutocompleteSelect("free_contract")}
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.fields["contract"].queryset = free_contracts()
+
+
+class ActiveClientUpdateForm(forms.ModelForm):
+    """Форма активного клиента с подсказками клиентов и контрактов"""
+
+    class Meta:
+        model = ActiveClient
+        fields = "__all__"
+        widgets = {
+            "potential_client": AutocompleteSelect("potential_client"),
+            "contract": AutocompleteSelect("contract"),
+        }
+
+
+class ContractForm(forms.ModelForm):
+    """Форма контракта с документом, хранимым без дубликатов.
+
+    Документ можно приложить файлом или указать SHA-256 документа, ранее
+    загруженного по частям. В обоих случаях контракт ссылается на общий
+    DocumentBlob, а одинаковые файлы хранятся один раз.
+    """
+
+    document = forms.FileField(required=False, label="Документ")
+    document_sha256 = forms.CharField(
+        required=False,
+        max_length=64,
+        label="SHA-256 загруженного документа",
+        help_text="Для документов, загруженных по частям",
+    )
+
+    class Meta:
+        model = Contract
+        fields = ("name", "service", "conclusion_date", "validity_period", "amount")
+        widgets = {"service": AutocompleteSelect("service")}
+
+    def clean(self) -> Dict[str, Any]:
+        cleaned_data: Dict[str, Any] = super().clean()
+        sha256: str = cleaned_data.get("document_sha256", "").lower()
+        self.blob: Optional[DocumentBlob] = None
+        if sha256:
+            self.blob = DocumentBlob.objects.filter(sha256=sha256).first()
+            if self.blob is None:
+                self.add_error("document_sha256", "Документ с таким SHA-256 не загружен")
+        elif not isinstance(cleaned_data.get("document"), UploadedFile) and not self.instance.document:
+            self.add_error("document", "Приложите документ")
+        return cleaned_data
+
+    def save(self, commit: bool = True) -> Contract:
+        uploaded = self.cleaned_data.get("document")
+        if self.blob is None and isinstance(uploaded, UploadedFile):
+            self.blob = store_blob(uploaded.chunks(), uploaded.name)
+        if self.blob is not None:
+            self.instance.blob = self.blob
+            self.instance.document = self.blob.file.name
+        return super().save(commit)
+
+
+class DocumentUploadForm(forms.Form):
+    """Форма начала загрузки документа по частям"""
+
+    filename = forms.CharField(max_length=200)
+    size = forms.IntegerField(min_value=1)
+
+    def clean_size(self) -> int:
+        size: int = self.cleaned_data["size"]
+        if size > settings.DOCUMENT_UPLOAD_MAX_SIZE:
+            raise forms.ValidationError("Документ превышает допустимый размер")
+        return size
+
+
+class ConversionsField(forms.Field):
+    """Поле пар (id потенциального клиента, id контракта).
+
+    Принимает текст по паре через запятую в строке или список пар либо
+    объектов {"potential_client": id, "contract": id} из JSON API.
+    """
+
+    widget = forms.Textarea
+
+    def to_python(self, value: Any) -> List[Tuple[int, int]]:
+        if value in self.empty_values:
+            return []
+        rows: List[Any] = value if isinstance(value, list) else [
+            line.split(",") for line in str(value).splitlines() if line.strip()
+        ]
+        conversions: List[Tuple[int, int]] = []
+        for number, row in enumerate(rows, start=1):
+            try:
+                if isinstance(row, dict):
+                    row = (row["potential_client"], row["contract"])
+                client_id, contract_id = (int(item) for item in row)
+            except (KeyError, TypeError, ValueError) as error:
+                raise forms.ValidationError(
+                    f"Строка {number}: нужны id потенциального клиента и id контракта"
+                ) from error
+            conversions.append((client_id, contract_id))
+        return conversions
+
+
+class BulkConversionForm(forms.Form):
+    """Форма массовой конвертации потенциальных клиентов в активных"""
+
+    conversions = ConversionsField(
+        label="Клиенты и контракты",
+        help_text="По строке на клиента: id потенциального клиента, id контракта",
+    )
+
+    def clean_conversions(self) -> List[Tuple[int, int]]:
+        conversions: List[Tuple[int, int]] = self.cleaned_data["conversions"]
+        if len(conversions) > settings.BULK_CONVERSION_MAX_ROWS:
+            raise forms.ValidationError(f"Не больше {settings.BULK_CONVERSION_MAX_ROWS} строк за раз")
+        return conversions
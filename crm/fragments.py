@@ -0,0 +1,220 @@
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, DefaultDict, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Type
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import transaction
+from django.db.models import Model
+from django.template.loader import render_to_string
+from django.utils.safestring import SafeString, mark_safe
+
+from crm.metrics import UNRESOLVED_VIEW, escape_label
+from crm.models import ActiveClient, PotentialClient
+
+
+@dataclass(frozen=True)
+class FragmentDependency:
+    """Строки model, разметка которых зависит от объектов source.
+
+    Строки находятся условием lookup=значение атрибута attribute объекта source.
+    """
+
+    source: Type[Model]
+    model: Type[Model]
+    lookup: str
+    attribute: str
+
+
+FRAGMENT_DEPENDENCIES: Sequence[FragmentDependency] = (
+    # Строка активного клиента выводит имя потенциального клиента
+    FragmentDependency(PotentialClient, ActiveClient, "potential_client", "pk"),
+    # Строка потенциального клиента выводит ссылку конвертации, пока он не стал активным
+    FragmentDependency(ActiveClient, PotentialClient, "pk", "potential_client_id"),
+)
+
+
+def fragment_cache() -> BaseCache:
+    return caches[settings.FRAGMENT_CACHE_ALIAS]
+
+
+def fragment_key(model: Type[Model], pk: Any, version: int) -> str:
+    return f"crm:fragment:{model._meta.label_lower}:{pk}:{version}"
+
+
+def object_fragment_key(obj: Model) -> str:
+    return fragment_key(type(obj), obj.pk, obj.version)  # type: ignore
+
+
+# INVALIDATION
+def invalidate_objects(model: Type[Model], pks: Iterable[Any]) -> None:
+    """Удаление разметки строк с текущими версиями объектов одним запросом к БД"""
+
+    pks = {pk for pk in pks if pk is not None}
+    if not pks:
+        return
+    rows = model._base_manager.filter(pk__in=pks).values_list("pk", "version")
+    keys: List[str] = [fragment_key(model, pk, version) for pk, version in rows]
+    if keys:
+        fragment_cache().delete_many(keys)
+
+
+def dependent_values(
+    source: Type[Model], instances: Sequence[Model], previous: Sequence[Dict[str, Any]] = ()
+) -> List[Tuple[FragmentDependency, Set[Any]]]:
+    """Значения условий поиска строк, которые выводят данные объектов source.
+
+    previous - значения атрибутов до сохранения: строка, на которую объект
+    ссылался раньше, тоже меняется.
+    """
+
+    found: List[Tuple[FragmentDependency, Set[Any]]] = []
+    for dependency in FRAGMENT_DEPENDENCIES:
+        if dependency.source is not source:
+            continue
+        values = {getattr(instance, dependency.attribute) for instance in instances}
+        values.update(values_before.get(dependency.attribute) for values_before in previous)
+        values.discard(None)
+        if values:
+            found.append((dependency, values))
+    return found
+
+
+def _invalidate_found(found: Sequence[Tuple[FragmentDependency, Set[Any]]]) -> None:
+    for dependency, values in found:
+        pks = dependency.model._base_manager.filter(**{f"{dependency.lookup}__in": values}).values_list("pk", flat=True)
+        invalidate_objects(dependency.model, pks)
+
+
+def invalidate_dependents(
+    source: Type[Model], instances: Sequence[Model], previous: Sequence[Dict[str, Any]] = ()
+) -> None:
+    """Удаление разметки строк, которые выводят данные измененных объектов source"""
+
+    _invalidate_found(dependent_values(source, instances, previous))
+
+
+def invalidate_dependents_on_commit(
+    source: Type[Model], instances: Sequence[Model], previous: Sequence[Dict[str, Any]] = ()
+) -> None:
+    """Удаление разметки зависимых строк после фиксации транзакции.
+
+    Версии зависимых строк не меняются, поэтому до фиксации другой процесс
+    успел бы снова закэшировать их старую разметку под тем же ключом. Значения
+    атрибутов берутся сразу, пока объекты не изменились.
+    """
+
+    found = dependent_values(source, instances, previous)
+    if found:
+        transaction.on_commit(lambda: _invalidate_found(found))
+
+
+# STATISTICS
+class FragmentStats:
+    """Потокобезопасные счетчики попаданий в кэш разметки строк по представлениям"""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.totals: DefaultDict[str, Dict[str, float]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    def record(self, view: str, hits: int, misses: int) -> None:
+        with self.lock:
+            totals: Dict[str, float] = self.totals[view]
+            totals["hits"] += hits
+            totals["misses"] += misses
+
+    def reset(self) -> None:
+        with self.lock:
+            self.totals.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Счетчики по представлениям с долей попаданий"""
+
+        with self.lock:
+            totals: Dict[str, Dict[str, float]] = {view: dict(data) for view, data in self.totals.items()}
+        for data in totals.values():
+            requested: float = data["hits"] + data["misses"]
+            data["hit_ratio"] = data["hits"] / requested if requested else 0.0
+        return totals
+
+
+stats = FragmentStats()
+
+
+def render_prometheus() -> str:
+    """Попадания в кэш разметки строк в текстовом формате Prometheus"""
+
+    lines: List[str] = []
+    families = (
+        ("crm_fragment_hits_total", "counter", "hits", "Row fragments served from cache"),
+        ("crm_fragment_misses_total", "counter", "misses", "Row fragments rendered and cached"),
+        ("crm_fragment_hit_ratio", "gauge", "hit_ratio", "Share of row fragments served from cache"),
+    )
+    totals: Dict[str, Dict[str, float]] = stats.snapshot()
+    for name, kind, key, description in families:
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for view, data in totals.items():
+            lines.append(f'{name}{{view="{escape_label(view)}"}} {data[key]:.6g}')
+    return "\n".join(lines) + "\n"
+
+
+class FragmentCacheMixin:
+    """Миксин кэширования разметки строк списка.
+
+    Разметка строки рендерится шаблоном fragment_template_name с объектом в
+    переменной object и кэшируется по ключу (модель, pk, версия), поэтому
+    изменение объекта сразу дает новый ключ. Строки страницы читаются из кэша
+    одним get_many, недостающие рендерятся и записываются одним set_many.
+    Строки, которые выводят данные других объектов, сбрасываются сигналами по
+    FRAGMENT_DEPENDENCIES. Поле version должно быть в only_fields.
+    """
+
+    fragment_template_name: Optional[str] = None
+
+    def get_fragment_template_name(self) -> str:
+        if self.fragment_template_name:
+            return self.fragment_template_name
+        return f"crm/{self.model._meta.model_name}_row.html"  # type: ignore
+
+    def get_fragment_view_name(self) -> str:
+        match = getattr(self.request, "resolver_match", None)  # type: ignore
+        return match.view_name if match is not None and match.view_name else UNRESOLVED_VIEW
+
+    def render_fragments(self, objects: Sequence[Model], cached: Dict[str, str]) -> Dict[str, str]:
+        """Рендеринг строк, которых нет в кэше"""
+
+        template_name: str = self.get_fragment_template_name()
+        return {
+            key: render_to_string(template_name, {"object": obj})
+            for key, obj in zip(map(object_fragment_key, objects), objects)
+            if key not in cached
+        }
+
+    def collect_fragments(
+        self, objects: Sequence[Model], cached: Dict[str, str], rendered: Dict[str, str]
+    ) -> List[SafeString]:
+        stats.record(self.get_fragment_view_name(), len(cached), len(rendered))
+        return [mark_safe(cached.get(key) or rendered[key]) for key in map(object_fragment_key, objects)]
+
+    def get_fragments(self, objects: Sequence[Model]) -> List[SafeString]:
+        cache: BaseCache = fragment_cache()
+        cached: Dict[str, str] = cache.get_many([object_fragment_key(obj) for obj in objects])
+        rendered: Dict[str, str] = self.render_fragments(objects, cached)
+        if rendered:
+            cache.set_many(rendered, settings.FRAGMENT_CACHE_TIME)
+        return self.collect_fragments(objects, cached, rendered)
+
+    async def aget_fragments(self, objects: Sequence[Model]) -> List[SafeString]:
+        cache: BaseCache = fragment_cache()
+        cached: Dict[str, str] = await cache.aget_many([object_fragment_key(obj) for obj in objects])
+        rendered: Dict[str, str] = self.render_fragments(objects, cached)
+        if rendered:
+            await cache.aset_many(rendered, settings.FRAGMENT_CACHE_TIME)
+        return self.collect_fragments(objects, cached, rendered)
+
+    def get_context_data(self, **kwargs) -> Dict[str, Any]:
+        context: Dict[str, Any] = super().get_context_data(**kwargs)  # type: ignore
+        context["rows"] = self.get_fragments(context["object_list"])
+        return context
@@ -0,0 +1,229 @@
+import csv
+import io
+import json
+import time
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from crm.models import Campaign, PotentialClient
+from crm.signals import post_bulk_create
+
+Row = Tuple[int, Dict[str, Any]]
+
+
+@dataclass
+class ImportReport:
+    """Отчет об импорте потенциальных клиентов"""
+
+    processed: int = 0
+    created: int = 0
+    duplicates: int = 0
+    errors: int = 0
+    skipped: int = 0
+    last_line: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return round(self.processed / self.elapsed, 1) if self.elapsed else 0.0
+
+
+def detect_format(file_name: str) -> str:
+    """Определение формата файла по расширению"""
+
+    return "jsonl" if Path(file_name).suffix.lower() in (".jsonl", ".ndjson", ".json") else "csv"
+
+
+def iter_rows(stream: TextIO, file_format: str) -> Iterator[Row]:
+    """Потоковое чтение строк CSV или JSONL с номерами строк"""
+
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as ex:
+            row = {"__error__": f"Некорректный JSON: {ex.msg}"}
+        if not isinstance(row, dict):
+            row = {"__error__": "Строка должна быть JSON-объектом"}
+        yield line_number, row
+
+
+class LeadImporter:
+    """Импорт потенциальных клиентов пачками через bulk_create.
+
+    Каждая пачка проверяется по правилам полей PotentialClient, очищается от
+    дублей по email и телефону (внутри пачки и с уже сохраненными клиентами)
+    и записывается в отдельной транзакции. После каждой пачки сохраняется
+    контрольная точка, по которой прерванный импорт продолжается.
+    """
+
+    def __init__(
+        self,
+        campaign: Optional[Campaign] = None,
+        chunk_size: int = 1000,
+        errors_file: Optional[TextIO] = None,
+        checkpoint_path: Optional[Path] = None,
+        progress: Optional[Callable[[ImportReport], None]] = None,
+    ) -> None:
+        self.campaign = campaign
+        self.chunk_size = chunk_size
+        self.checkpoint_path = checkpoint_path
+        self.progress = progress
+        self.errors_writer = csv.writer(errors_file) if errors_file is not None else None
+        # Файл отчета открывается на дозапись: при продолжении импорта заголовок уже есть
+        if self.errors_writer is not None and errors_file is not None and errors_file.tell() == 0:
+            self.errors_writer.writerow(["line", "error", "row"])
+
+    # CHECKPOINT
+    def load_checkpoint(self) -> int:
+        """Номер последней импортированной строки из контрольной точки"""
+
+        if self.checkpoint_path is None or not self.checkpoint_path.exists():
+            return 0
+        return json.loads(self.checkpoint_path.read_text(encoding="utf-8")).get("line", 0)
+
+    def save_checkpoint(self, report: ImportReport) -> None:
+        if self.checkpoint_path is None:
+            return
+        state: Dict[str, Any] = {
+            "line": report.last_line,
+            "created": report.created,
+            "duplicates": report.duplicates,
+            "errors": report.errors,
+        }
+        temporary: Path = self.checkpoint_path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(state), encoding="utf-8")
+        temporary.replace(self.checkpoint_path)
+
+    # VALIDATION
+    def report_error(self, report: ImportReport, line: int, error: Any, row: Dict[str, Any]) -> None:
+        report.errors += 1
+        if self.errors_writer is not None:
+            self.errors_writer.writerow(
+                [line, json.dumps(error, ensure_ascii=False), json.dumps(row, ensure_ascii=False)]
+            )
+
+    def build(self, row: Dict[str, Any]) -> PotentialClient:
+        """Создание и проверка экземпляра клиента без обращения к БД"""
+
+        if "__error__" in row:
+            raise ValidationError(row["__error__"])
+
+        campaign_id: Any = row.get("campaign") or (self.campaign.pk if self.campaign else None)
+        potential_client = PotentialClient(
+            full_name=str(row.get("full_name") or "").strip(),
+            phone=str(row.get("phone") or "").strip(),
+            email=str(row.get("email") or "").strip().lower(),
+        )
+        errors: Dict[str, List[str]] = {}
+        try:
+            potential_client.campaign_id = int(campaign_id)
+        except (TypeError, ValueError):
+            errors["campaign"] = ["Некорректная рекламная кампания"]
+        try:
+            potential_client.full_clean(exclude=["campaign"], validate_unique=False, validate_constraints=False)
+        except ValidationError as ex:
+            errors.update(ex.message_dict)
+        if errors:
+            raise ValidationError(errors)
+        return potential_client
+
+    def process_chunk(self, rows: List[Row], report: ImportReport) -> None:
+        candidates: List[Tuple[int, Dict[str, Any], PotentialClient]] = []
+        for line, row in rows:
+            try:
+                candidates.append((line, row, self.build(row)))
+            except ValidationError as ex:
+                self.report_error(report, line, getattr(ex, "message_dict", None) or ex.messages, row)
+
+        campaign_ids: Set[int] = {client.campaign_id for _, _, client in candidates}
+        existing_campaigns: Set[int] = set(Campaign.objects.filter(pk__in=campaign_ids).values_list("pk", flat=True))
+
+        emails: Set[str] = {client.email for _, _, client in candidates}
+        phones: Set[str] = {client.phone for _, _, client in candidates}
+        seen_emails: Set[str] = set()
+        seen_phones: Set[str] = set()
+        # Сохраненные вручную email могут быть в любом регистре, сравнение идет по индексу crm_pc_email_lower_idx
+        existing = PotentialClient.objects.annotate(email_lower=Lower("email")).filter(
+            Q(email_lower__in=emails) | Q(phone__in=phones)
+        )
+        for email, phone in existing.values_list("email_lower", "phone"):
+            seen_emails.add(email)
+            seen_phones.add(phone)
+
+        new_clients: List[PotentialClient] = []
+        for line, row, client in candidates:
+            if client.campaign_id not in existing_campaigns:
+                self.report_error(report, line, {"campaign": ["Рекламная кампания не найдена"]}, row)
+            elif client.email in seen_emails or client.phone in seen_phones:
+                report.duplicates += 1
+                if self.errors_writer is not None:
+                    self.errors_writer.writerow([line, json.dumps("duplicate"), json.dumps(row, ensure_ascii=False)])
+            else:
+                seen_emails.add(client.email)
+                seen_phones.add(client.phone)
+                new_clients.append(client)
+
+        with transaction.atomic():
+            created: List[PotentialClient] = PotentialClient.objects.bulk_create(
+                new_clients, batch_size=self.chunk_size
+            )
+            post_bulk_create.send(sender=PotentialClient, instances=created)
+        report.created += len(created)
+
+    def run(self, rows: Iterable[Row]) -> ImportReport:
+        """Импорт строк с продолжением от контрольной точки"""
+
+        report = ImportReport()
+        started: float = time.monotonic()
+        resume_from: int = self.load_checkpoint()
+        iterator: Iterator[Row] = iter(rows)
+
+        while True:
+            chunk: List[Row] = list(islice(iterator, self.chunk_size))
+            if not chunk:
+                break
+            pending: List[Row] = [(line, row) for line, row in chunk if line > resume_from]
+            report.skipped += len(chunk) - len(pending)
+            if pending:
+                self.process_chunk(pending, report)
+                report.processed += len(pending)
+                report.last_line = pending[-1][0]
+                self.save_checkpoint(report)
+            if self.progress is not None:
+                self.progress(report)
+
+        report.elapsed = time.monotonic() - started
+        return report
+
+
+def import_leads(
+    stream: Any,
+    file_format: str,
+    campaign: Optional[Campaign] = None,
+    chunk_size: int = 1000,
+    errors_file: Optional[TextIO] = None,
+    checkpoint_path: Optional[Path] = None,
+    progress: Optional[Callable[[ImportReport], None]] = None,
+) -> ImportReport:
+    """Импорт потенциальных клиентов из бинарного или текстового потока CSV/JSONL"""
+
+    text_stream: TextIO = (
+        stream if isinstance(stream, io.TextIOBase) else io.TextIOWrapper(stream, encoding="utf-8-sig")
+    )
+    importer = LeadImporter(campaign, chunk_size, errors_file, checkpoint_path, progress)
+    return importer.run(iter_rows(text_stream, file_format))
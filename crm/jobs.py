@@ -0,0 +1,266 @@
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, Optional, Sequence, Set
+
+import django
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import F, QuerySet
+from django.utils import timezone
+
+from crm.models import Job
+
+JobHandler = Callable[[Job, "Progress"], Any]
+
+# Обработчики задач по типу, регистрируются декоратором job_handler
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+POOLS = ("thread", "process")
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Регистрация обработчика задач типа kind"""
+
+    def register(handler: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = handler
+        return handler
+
+    return register
+
+
+class Progress:
+    """Отчет о прогрессе задачи, записываемый в БД не чаще JOB_PROGRESS_INTERVAL"""
+
+    def __init__(self, job: Job) -> None:
+        self.job = job
+        self.reported_at: float = 0.0
+
+    def __call__(self, percent: float, message: str = "", force: bool = False) -> None:
+        now: float = time.monotonic()
+        if not force and now - self.reported_at < settings.JOB_PROGRESS_INTERVAL:
+            return
+        self.reported_at = now
+        self.job.progress = max(0, min(100, int(percent)))
+        self.job.message = message[:200]
+        leased(self.job).update(progress=self.job.progress, message=self.job.message, heartbeat_at=timezone.now())
+
+
+def enqueue(
+    kind: str,
+    payload: Optional[Dict[str, Any]] = None,
+    user: Any = None,
+    priority: int = 0,
+    max_attempts: Optional[int] = None,
+) -> Job:
+    """Постановка задачи в очередь"""
+
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Неизвестный тип задачи {kind}")
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        user=user if user is not None and user.is_authenticated else None,
+        priority=priority,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def claim_job(worker: str) -> Optional[Job]:
+    """Захват следующей готовой задачи.
+
+    SKIP LOCKED пропускает строки, заблокированные другими воркерами, а
+    условное обновление по статусу защищает от двойного захвата в БД без
+    блокировок строк (SQLite).
+    """
+
+    with transaction.atomic():
+        job: Optional[Job] = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.QUEUED, run_after__lte=timezone.now())
+            .order_by("-priority", "run_after", "pk")
+            .first()
+        )
+        if job is None:
+            return None
+        now = timezone.now()
+        claimed: int = Job.objects.filter(pk=job.pk, status=Job.Status.QUEUED).update(
+            status=Job.Status.RUNNING,
+            attempts=job.attempts + 1,
+            worker=worker,
+            started_at=now,
+            heartbeat_at=now,
+            error="",
+        )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def leased(job: Job) -> QuerySet[Job]:
+    """Задача, пока она выполняется этим захватом.
+
+    Если воркер перестал подавать сигналы, задача возвращается в очередь и
+    захватывается снова с другим worker и attempts, поэтому запоздавший
+    результат прежнего захвата не перезаписывает ее состояние.
+    """
+
+    return Job.objects.filter(pk=job.pk, status=Job.Status.RUNNING, worker=job.worker, attempts=job.attempts)
+
+
+def finish_job(job: Job, fields: Sequence[str]) -> Job:
+    """Запись итогового состояния задачи, только если захват еще действует"""
+
+    if not leased(job).update(**{field: getattr(job, field) for field in fields}):
+        job.refresh_from_db()
+    return job
+
+
+def run_job(job: Job) -> Job:
+    """Выполнение захваченной задачи с повтором или отметкой об ошибке"""
+
+    progress = Progress(job)
+    try:
+        result: Any = JOB_HANDLERS[job.kind](job, progress)
+    except Exception:  # pylint: disable=broad-exception-caught
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay: float = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            job.status = Job.Status.QUEUED
+            job.run_after = timezone.now() + timedelta(seconds=delay)
+            job.message = f"Повтор через {int(delay)} с"
+        else:
+            job.status = Job.Status.FAILED
+            job.finished_at = timezone.now()
+        return finish_job(job, ["status", "run_after", "message", "error", "finished_at"])
+
+    job.status = Job.Status.SUCCEEDED
+    job.result = result
+    job.progress = 100
+    job.finished_at = timezone.now()
+    return finish_job(job, ["status", "result", "progress", "finished_at"])
+
+
+def run_job_by_id(job_id: int) -> str:
+    """Выполнение задачи в потоке или процессе пула воркера"""
+
+    close_old_connections()
+    try:
+        return run_job(Job.objects.get(pk=job_id)).status
+    finally:
+        close_old_connections()
+
+
+def run_next_job(worker: str) -> Optional[Job]:
+    """Захват и выполнение одной задачи в текущем потоке"""
+
+    job: Optional[Job] = claim_job(worker)
+    return run_job(job) if job is not None else None
+
+
+def requeue_stale_jobs() -> int:
+    """Возврат в очередь задач, воркер которых перестал подавать сигналы.
+
+    Задачи, исчерпавшие попытки, отмечаются ошибкой, иначе задача, роняющая
+    воркер, выполнялась бы бесконечно.
+    """
+
+    now = timezone.now()
+    stale: QuerySet[Job] = Job.objects.filter(
+        status=Job.Status.RUNNING, heartbeat_at__lt=now - timedelta(seconds=settings.JOB_STALE_TIMEOUT)
+    )
+    failed: int = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.Status.FAILED, finished_at=now, message="Воркер не отвечал, попытки исчерпаны"
+    )
+    return failed + stale.filter(attempts__lt=F("max_attempts")).update(
+        status=Job.Status.QUEUED, message="Воркер не отвечал, задача возвращена в очередь"
+    )
+
+
+class Worker:
+    """Воркер очереди задач с пулом потоков или процессов.
+
+    Главный поток захватывает задачи, пока в пуле есть свободные места,
+    обновляет сигнал жизни выполняемых задач и возвращает в очередь задачи
+    остановившихся воркеров. Процессы запускаются через spawn, поэтому не
+    наследуют соединения с БД, и настраивают Django до загрузки crm.jobs.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        pool: str = "thread",
+        poll_interval: float = 1.0,
+        burst: bool = False,
+        log: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.concurrency = concurrency
+        self.pool = pool
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.log = log or (lambda message: None)
+        self.name: str = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = threading.Event()
+
+    def create_executor(self) -> Executor:
+        if self.pool == "process":
+            return ProcessPoolExecutor(self.concurrency, mp_context=get_context("spawn"), initializer=django.setup)
+        return ThreadPoolExecutor(self.concurrency, thread_name_prefix="crm-worker")
+
+    def stop(self, *args: Any) -> None:
+        self.stopping.set()
+
+    def run(self) -> int:
+        """Цикл воркера, возвращает количество выполненных задач"""
+
+        running: Dict[Future, int] = {}
+        done: int = 0
+        with self.create_executor() as executor:
+            while not self.stopping.is_set():
+                finished: Set[Future] = {future for future in running if future.done()}
+                for future in finished:
+                    job_id: int = running.pop(future)
+                    self.log(f"#{job_id}: {future.result() if future.exception() is None else future.exception()}")
+                    done += 1
+
+                claimed: bool = False
+                try:
+                    requeue_stale_jobs()
+                    while len(running) < self.concurrency and not self.stopping.is_set():
+                        job: Optional[Job] = claim_job(self.name)
+                        if job is None:
+                            break
+                        claimed = True
+                        self.log(f"{job}: запуск, попытка {job.attempts}")
+                        running[executor.submit(run_job_by_id, job.pk)] = job.pk
+                    if running:
+                        Job.objects.filter(pk__in=running.values()).update(heartbeat_at=timezone.now())
+                except DatabaseError as error:
+                    # Временная недоступность БД или блокировка SQLite не должна останавливать воркер
+                    self.log(f"Ошибка БД: {error}")
+                    close_old_connections()
+                    claimed = False
+
+                if not running:
+                    # Очередь пуста: в режиме burst воркер завершается
+                    if self.burst:
+                        break
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                if not claimed:
+                    wait(list(running), timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+
+            for future, job_id in running.items():
+                try:
+                    self.log(f"#{job_id}: {future.result()}")
+                except Exception as error:  # pylint: disable=broad-exception-caught
+                    # Упавший процесс пула не должен прерывать остановку воркера
+                    self.log(f"#{job_id}: {error!r}")
+                done += 1
+        return done
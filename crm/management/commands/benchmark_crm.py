@@ -0,0 +1,89 @@
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from crm.benchmarks import (
+    DATASETS,
+    BenchmarkRun,
+    Regression,
+    RouteResult,
+    benchmark_routes,
+    compare_results,
+    load_results,
+    run_meta,
+)
+from crm.datagen import generate_crm_data
+
+
+class Command(BaseCommand):
+    """Команда замера производительности маршрутов CRM на сгенерированных данных"""
+
+    help = (
+        "Замеряет задержки, число запросов и пик памяти всех именованных маршрутов crm на тестовой БД "
+        "с наборами данных 10k/100k/1m строк и сравнивает результаты с базовым замером"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--datasets", nargs="+", choices=list(DATASETS), default=["10k"], help="Наборы данных для замера"
+        )
+        parser.add_argument("--iterations", type=int, default=20, help="Количество запросов к каждому маршруту")
+        parser.add_argument("--routes", nargs="+", help="Замерять только перечисленные маршруты")
+        parser.add_argument("--seed", type=int, default=0, help="Seed генератора данных")
+        parser.add_argument("--output", type=Path, help="Файл JSON для сохранения результатов")
+        parser.add_argument("--baseline", type=Path, help="Файл JSON базового замера для поиска регрессий")
+        parser.add_argument("--current", type=Path, help="Сравнить готовый файл результатов вместо нового замера")
+        parser.add_argument("--threshold", type=float, default=0.2, help="Допустимый рост метрик, доля")
+
+    def report_route(self, name: str, result: RouteResult) -> None:
+        self.stdout.write(
+            f"  {name:<32} {result.status} p50={result.p50_ms}ms p95={result.p95_ms}ms "
+            f"queries={result.queries} peak={result.peak_memory_kb}KB"
+        )
+
+    def run_benchmarks(self, options: Dict[str, Any]) -> BenchmarkRun:
+        run = BenchmarkRun(meta=run_meta(options["iterations"]))
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        setup_test_environment(debug=False)
+        try:
+            for dataset in options["datasets"]:
+                old_config = runner.setup_databases()
+                try:
+                    self.stdout.write(f"Генерация набора {dataset}...")
+                    generate_crm_data(counts=DATASETS[dataset], seed=options["seed"], write_documents=False)
+                    run.results[dataset] = benchmark_routes(
+                        options["iterations"], options["routes"], progress=self.report_route
+                    )
+                finally:
+                    runner.teardown_databases(old_config)
+        finally:
+            teardown_test_environment()
+        return run
+
+    def handle(self, *args, **options) -> None:
+        if options["iterations"] < 1:
+            raise CommandError("Количество запросов должно быть положительным")
+
+        current: Dict[str, Dict[str, Dict[str, Any]]]
+        if options["current"] is not None:
+            current = load_results(options["current"])
+        else:
+            run: BenchmarkRun = self.run_benchmarks(options)
+            if options["output"] is not None:
+                run.save(options["output"])
+                self.stdout.write(self.style.SUCCESS(f"Результаты сохранены в {options['output']}"))
+            current = run.to_json()["results"]
+
+        baseline: Optional[Path] = options["baseline"]
+        if baseline is None:
+            return
+
+        regressions: List[Regression] = compare_results(load_results(baseline), current, options["threshold"])
+        for regression in regressions:
+            self.stdout.write(self.style.WARNING(str(regression)))
+        if regressions:
+            raise CommandError(f"Найдено регрессий: {len(regressions)}")
+        self.stdout.write(self.style.SUCCESS("Регрессий не найдено"))
@@ -0,0 +1,60 @@
+import asyncio
+import json
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from crm.benchmarks import SERVER_ROUTES, LoadResult, benchmark_user, load_test, route_path, session_cookie
+
+
+class Command(BaseCommand):
+    """Команда сравнения пропускной способности WSGI и ASGI развертываний"""
+
+    help = (
+        "Нагружает запущенные серверы множеством keep-alive соединений: синхронные представления "
+        "через WSGI (gunicorn) и их асинхронные версии через ASGI (uvicorn). Серверы должны работать "
+        "с той же БД, что и команда"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--wsgi-url", default="http://127.0.0.1:8000", help="Адрес WSGI сервера")
+        parser.add_argument("--asgi-url", default="http://127.0.0.1:8001", help="Адрес ASGI сервера")
+        parser.add_argument("--routes", nargs="+", help="Замерять только перечисленные синхронные маршруты")
+        parser.add_argument("--concurrency", type=int, default=100, help="Количество одновременных соединений")
+        parser.add_argument("--duration", type=float, default=10.0, help="Длительность нагрузки на маршрут, с")
+        parser.add_argument("--output", type=Path, help="Файл JSON для сохранения результатов")
+
+    def report(self, server: str, result: LoadResult) -> None:
+        self.stdout.write(
+            f"  {server:<5} {result.url:<60} {result.requests_per_second} req/s "
+            f"p50={result.p50_ms}ms p95={result.p95_ms}ms p99={result.p99_ms}ms errors={result.errors}"
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options["concurrency"] < 1 or options["duration"] <= 0:
+            raise CommandError("Количество соединений и длительность должны быть положительными")
+
+        cookie: str = session_cookie(benchmark_user())
+        results: Dict[str, Dict[str, Any]] = {}
+        for sync_name, async_name in SERVER_ROUTES:
+            if options["routes"] and sync_name not in options["routes"]:
+                continue
+            sync_path: Optional[str] = route_path(sync_name)
+            async_path: Optional[str] = route_path(async_name)
+            if sync_path is None or async_path is None:
+                self.stdout.write(self.style.WARNING(f"  {sync_name}: нет данных для маршрута"))
+                continue
+
+            self.stdout.write(sync_name)
+            pair: List[LoadResult] = []
+            for server, url in (("wsgi", options["wsgi_url"] + sync_path), ("asgi", options["asgi_url"] + async_path)):
+                result: LoadResult = asyncio.run(load_test(url, cookie, options["concurrency"], options["duration"]))
+                self.report(server, result)
+                pair.append(result)
+            results[sync_name] = {"wsgi": asdict(pair[0]), "asgi": asdict(pair[1])}
+
+        if options["output"] is not None:
+            options["output"].write_text(json.dumps(results, indent=2, ensure_ascii=False))
+            self.stdout.write(self.style.SUCCESS(f"Результаты сохранены в {options['output']}"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from crm.documents import cleanup_documents
+
+
+class Command(BaseCommand):
+    """Команда очистки брошенных загрузок и файлов документов без ссылок"""
+
+    help = (
+        "Удаляет загрузки по частям, не обновлявшиеся дольше DOCUMENT_UPLOAD_EXPIRY, и файлы документов, "
+        "на которые не ссылается ни один контракт дольше DOCUMENT_BLOB_GRACE_TIME"
+    )
+
+    def handle(self, *args, **options) -> None:
+        uploads, blobs = cleanup_documents()
+        self.stdout.write(self.style.SUCCESS(f"Удалено загрузок: {uploads}, файлов документов: {blobs}"))
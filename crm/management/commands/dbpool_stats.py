@@ -0,0 +1,49 @@
+import json
+from typing import Any, Dict, Optional
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connections
+
+from crm.dbpool import pool_stats, server_stats
+
+
+class Command(BaseCommand):
+    """Команда отчета о соединениях с БД"""
+
+    help = (
+        "Показывает настройки переиспользования соединений, статистику пула psycopg и состояние "
+        "соединений клиентов на сервере PostgreSQL: возраст соединений, ожидание блокировок и "
+        "загрузку относительно max_connections. Счетчики веб-процессов доступны на /metrics/"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--database", default="default", help="Псевдоним БД")
+        parser.add_argument("--json", action="store_true", help="Вывести отчет в формате JSON")
+
+    def handle(self, *args, **options) -> None:
+        connection = connections[options["database"]]
+        pool: Optional[Dict[str, Any]] = pool_stats(connection)
+        server: Optional[Dict[str, Any]] = server_stats(connection)
+        report: Dict[str, Any] = {
+            "database": connection.alias,
+            "vendor": connection.vendor,
+            "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+            "conn_health_checks": connection.settings_dict["CONN_HEALTH_CHECKS"],
+            "pool": pool,
+            "server": server,
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"{report['database']} ({report['vendor']}): CONN_MAX_AGE={report['conn_max_age']} "
+            f"CONN_HEALTH_CHECKS={report['conn_health_checks']}"
+        )
+        for title, section in (("Пул", pool), ("Сервер", server)):
+            if section is None:
+                self.stdout.write(f"{title}: нет данных")
+                continue
+            self.stdout.write(f"{title}:")
+            for key, value in section.items():
+                self.stdout.write(f"  {key:<24} {round(value, 3) if isinstance(value, float) else value}")
@@ -0,0 +1,53 @@
+from typing import Dict
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from crm.datagen import SCALES, GenerationReport, generate_crm_data
+
+MODEL_KEYS = ("services", "campaigns", "potential_clients", "contracts", "active_clients")
+
+
+class Command(BaseCommand):
+    """Команда генерации синтетических данных CRM для нагрузочного тестирования"""
+
+    help = "Генерирует услуги, кампании, клиентов и контракты заданного масштаба через bulk_create"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--scale", choices=list(SCALES), default="small", help="Предопределенный масштаб")
+        parser.add_argument("--seed", type=int, default=0, help="Seed генератора случайных чисел")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Размер пачки bulk_create")
+        for key in MODEL_KEYS:
+            parser.add_argument(
+                f"--{key.replace('_', '-')}", type=int, dest=key, help=f"Количество записей {key} вместо масштаба"
+            )
+        parser.add_argument("--no-documents", action="store_true", help="Не записывать файлы-заглушки документов")
+        parser.add_argument(
+            "--no-rebuild", action="store_true", help="Не пересчитывать статистику и поисковый индекс"
+        )
+
+    def handle(self, *args, **options) -> None:
+        counts: Dict[str, int] = {key: options[key] for key in MODEL_KEYS if options[key] is not None}
+        if any(count < 0 for count in counts.values()):
+            raise CommandError("Количество записей не может быть отрицательным")
+
+        def progress(key: str, created: int) -> None:
+            self.stdout.write(f"{key}: {created}", ending="\r")
+            self.stdout.flush()
+
+        report: GenerationReport = generate_crm_data(
+            scale=options["scale"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            counts=counts,
+            write_documents=not options["no_documents"],
+            rebuild=not options["no_rebuild"],
+            progress=progress if options["verbosity"] > 1 else None,
+        )
+
+        for key, created in report.created.items():
+            self.stdout.write(f"{key}: {created}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано записей: {report.total} за {report.elapsed:.1f} с ({report.rows_per_second} строк/с)"
+            )
+        )
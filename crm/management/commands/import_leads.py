@@ -0,0 +1,58 @@
+from pathlib import Path
+from typing import Optional
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from crm.imports import ImportReport, detect_format, import_leads
+from crm.models import Campaign
+
+
+class Command(BaseCommand):
+    """Команда импорта потенциальных клиентов из CSV/JSONL"""
+
+    help = "Импортирует потенциальных клиентов из CSV или JSONL пачками с продолжением от контрольной точки"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("path", type=Path, help="Файл CSV или JSONL")
+        parser.add_argument("--format", choices=("csv", "jsonl"), help="Формат файла, по умолчанию по расширению")
+        parser.add_argument("--campaign", type=int, help="Рекламная кампания для строк без колонки campaign")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Размер пачки")
+        parser.add_argument("--errors", type=Path, help="Файл отчета об ошибках, по умолчанию <path>.errors.csv")
+        parser.add_argument("--checkpoint", type=Path, help="Файл контрольной точки, по умолчанию <path>.checkpoint")
+        parser.add_argument("--restart", action="store_true", help="Начать импорт заново, игнорируя контрольную точку")
+
+    def handle(self, *args, **options) -> None:
+        path: Path = options["path"]
+        if not path.exists():
+            raise CommandError(f"Файл {path} не найден")
+
+        campaign: Optional[Campaign] = None
+        if options["campaign"] is not None:
+            campaign = Campaign.objects.filter(pk=options["campaign"]).first()
+            if campaign is None:
+                raise CommandError(f"Рекламная кампания {options['campaign']} не найдена")
+
+        checkpoint: Path = options["checkpoint"] or path.with_name(f"{path.name}.checkpoint")
+        if options["restart"] and checkpoint.exists():
+            checkpoint.unlink()
+        errors_path: Path = options["errors"] or path.with_name(f"{path.name}.errors.csv")
+
+        with path.open("rb") as stream, errors_path.open("a", encoding="utf-8", newline="") as errors_file:
+            report: ImportReport = import_leads(
+                stream,
+                options["format"] or detect_format(path.name),
+                campaign=campaign,
+                chunk_size=options["chunk_size"],
+                errors_file=errors_file,
+                checkpoint_path=checkpoint,
+            )
+        # Импорт завершен, повторный запуск с тем же файлом должен начинаться сначала
+        checkpoint.unlink(missing_ok=True)
+
+        self.stdout.write(
+            f"Обработано: {report.processed}, создано: {report.created}, дублей: {report.duplicates}, "
+            f"ошибок: {report.errors}, пропущено по контрольной точке: {report.skipped}"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Скорость: {report.rows_per_second} строк/с"))
+        if report.errors or report.duplicates:
+            self.stdout.write(self.style.WARNING(f"Отчет об ошибках: {errors_path}"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from crm.search import rebuild_index
+
+
+class Command(BaseCommand):
+    """Команда перестроения поискового индекса"""
+
+    help = "Перестраивает поисковый индекс потенциальных клиентов и контрактов"
+
+    def handle(self, *args, **options) -> None:
+        if connection.vendor != "sqlite":
+            self.stdout.write("Триграммные индексы PostgreSQL обновляются СУБД, перестроение не нужно")
+            return
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Поисковый индекс перестроен"))
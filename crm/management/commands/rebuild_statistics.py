@@ -0,0 +1,36 @@
+from typing import Dict
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from crm.jobs import enqueue
+from crm.statistics import rebuild_buckets, rebuild_snapshot
+
+
+class Command(BaseCommand):
+    """Команда пересчета снимка и корзин статистики с выводом найденных расхождений"""
+
+    help = "Пересчитывает снимок и корзины статистики с нуля и сообщает о расхождениях"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--background", action="store_true", help="Поставить пересчет в очередь фоновых задач")
+
+    def handle(self, *args, **options) -> None:
+        if options["background"]:
+            job = enqueue("rebuild_statistics")
+            self.stdout.write(self.style.SUCCESS(f"Пересчет поставлен в очередь: задача #{job.pk}"))
+            return
+
+        drift: Dict[str, tuple] = rebuild_snapshot()
+
+        if drift:
+            for field_name, (stored, actual) in drift.items():
+                self.stdout.write(self.style.WARNING(f"{field_name}: {stored} -> {actual}"))
+            self.stdout.write(self.style.SUCCESS(f"Снимок статистики пересчитан, расхождений: {len(drift)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Снимок статистики актуален"))
+
+        buckets_drift: int = rebuild_buckets()
+        if buckets_drift:
+            self.stdout.write(self.style.WARNING(f"Корзины статистики пересчитаны, расхождений: {buckets_drift}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Корзины статистики актуальны"))
@@ -0,0 +1,39 @@
+import signal
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from crm.jobs import POOLS, Worker
+
+
+class Command(BaseCommand):
+    """Команда запуска воркера фоновых задач CRM"""
+
+    help = "Выполняет задачи из очереди в БД на пуле потоков или процессов без внешнего брокера"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--concurrency", type=int, default=4, help="Количество одновременно выполняемых задач")
+        parser.add_argument("--pool", choices=POOLS, default="thread", help="Пул потоков или процессов")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Интервал опроса очереди в секундах")
+        parser.add_argument("--burst", action="store_true", help="Завершиться, когда очередь опустеет")
+
+    def handle(self, *args, **options) -> None:
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency должен быть не меньше 1")
+
+        worker = Worker(
+            concurrency=options["concurrency"],
+            pool=options["pool"],
+            poll_interval=options["poll_interval"],
+            burst=options["burst"],
+            log=self.stdout.write,
+        )
+        # Выполняемые задачи дорабатывают, новые не захватываются
+        handlers = {signum: signal.signal(signum, worker.stop) for signum in (signal.SIGINT, signal.SIGTERM)}
+
+        self.stdout.write(f"Воркер {worker.name}: {options['pool']} x {options['concurrency']}")
+        try:
+            done: int = worker.run()
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS(f"Воркер остановлен, выполнено задач: {done}"))
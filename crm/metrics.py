@@ -0,0 +1,274 @@
+import math
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+from typing import Any, Callable, DefaultDict, Deque, Dict, Iterable, Iterator, List, NamedTuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+UNRESOLVED_VIEW = "<unresolved>"
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class RequestSample(NamedTuple):
+    """Замер одного запроса"""
+
+    view: str
+    duration: float
+    queries: int
+    query_time: float
+    slowest_query: float
+    render_time: float
+    response_bytes: int
+
+
+class QueryTimer:
+    """Обертка выполнения SQL (connection.execute_wrapper), считающая запросы и их время"""
+
+    def __init__(self) -> None:
+        self.queries: int = 0
+        self.total: float = 0.0
+        self.slowest: float = 0.0
+
+    def __call__(self, execute: Callable, sql: str, params: Any, many: bool, context: Dict[str, Any]) -> Any:
+        started: float = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed: float = time.perf_counter() - started
+            self.queries += 1
+            self.total += elapsed
+            self.slowest = max(self.slowest, elapsed)
+
+
+class MetricsRegistry:
+    """Потокобезопасное хранилище метрик запросов.
+
+    Счетчики (количество запросов и суммы по замерам) только растут, как требует
+    Prometheus. Последние замеры хранятся в кольцевом буфере, по которому
+    считаются квантили длительности и самый медленный SQL-запрос.
+    """
+
+    COUNTERS = ("requests", "sampled", "queries", "query_time", "duration", "render_time", "response_bytes")
+
+    def __init__(self, buffer_size: int) -> None:
+        self.lock = threading.Lock()
+        self.samples: Deque[RequestSample] = deque(maxlen=buffer_size)
+        self.totals: DefaultDict[str, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(self.COUNTERS, 0))
+
+    def count(self, view: str) -> None:
+        with self.lock:
+            self.totals[view]["requests"] += 1
+
+    def record(self, sample: RequestSample) -> None:
+        with self.lock:
+            self.samples.append(sample)
+            totals: Dict[str, float] = self.totals[sample.view]
+            totals["sampled"] += 1
+            totals["queries"] += sample.queries
+            totals["query_time"] += sample.query_time
+            totals["duration"] += sample.duration
+            totals["render_time"] += sample.render_time
+            totals["response_bytes"] += sample.response_bytes
+
+    def reset(self) -> None:
+        with self.lock:
+            self.samples.clear()
+            self.totals.clear()
+
+    def snapshot(self) -> tuple:
+        with self.lock:
+            return {view: dict(totals) for view, totals in self.totals.items()}, list(self.samples)
+
+    def render_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+
+        totals, samples = self.snapshot()
+        lines: List[str] = []
+
+        def family(name: str, kind: str, description: str, values: Iterable[tuple]) -> None:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in values:
+                label_text: str = ",".join(f'{key}="{escape_label(str(label))}"' for key, label in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value:.6g}" if label_text else f"{name} {value:.6g}")
+
+        def counter(name: str, key: str, description: str) -> None:
+            family(name, "counter", description, (({"view": view}, data[key]) for view, data in totals.items()))
+
+        counter("crm_requests_total", "requests", "Requests handled by view")
+        counter("crm_sampled_requests_total", "sampled", "Requests measured by sampling")
+        counter("crm_sampled_queries_total", "queries", "SQL queries issued by sampled requests")
+        counter("crm_sampled_query_seconds_total", "query_time", "SQL time of sampled requests")
+        counter("crm_sampled_duration_seconds_total", "duration", "Total time of sampled requests")
+        counter("crm_sampled_render_seconds_total", "render_time", "Template render time of sampled requests")
+        counter("crm_sampled_response_bytes_total", "response_bytes", "Response size of sampled requests")
+
+        by_view: DefaultDict[str, List[RequestSample]] = defaultdict(list)
+        for sample in samples:
+            by_view[sample.view].append(sample)
+
+        family(
+            "crm_request_duration_seconds",
+            "gauge",
+            "Request duration quantiles over the ring buffer",
+            (
+                ({"view": view, "quantile": quantile}, nearest_rank([sample.duration for sample in items], quantile))
+                for view, items in by_view.items()
+                for quantile in QUANTILES
+            ),
+        )
+        family(
+            "crm_slowest_query_seconds",
+            "gauge",
+            "Slowest SQL query over the ring buffer",
+            (({"view": view}, max(sample.slowest_query for sample in items)) for view, items in by_view.items()),
+        )
+        family(
+            "crm_request_queries_max",
+            "gauge",
+            "Maximum SQL queries per request over the ring buffer",
+            (({"view": view}, max(sample.queries for sample in items)) for view, items in by_view.items()),
+        )
+        return "\n".join(lines) + "\n"
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def nearest_rank(values: List[float], quantile: float) -> float:
+    ordered: List[float] = sorted(values)
+    return ordered[max(0, math.ceil(quantile * len(ordered)) - 1)]
+
+
+registry = MetricsRegistry(settings.METRICS_BUFFER_SIZE)
+
+
+class RequestMetricsMiddleware:
+    """Middleware сбора метрик запросов.
+
+    Количество запросов считается для каждого запроса, а подробный замер
+    (SQL через connection.execute_wrapper, время рендеринга шаблона, размер
+    ответа) выполняется только для доли METRICS_SAMPLE_RATE запросов, чтобы
+    накладные расходы оставались в пределах процента. Поддерживает WSGI и ASGI
+    без перевода асинхронных представлений в синхронный режим.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        self.is_async: bool = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def view_name(request: HttpRequest) -> str:
+        match = getattr(request, "resolver_match", None)
+        return match.view_name if match is not None and match.view_name else UNRESOLVED_VIEW
+
+    @staticmethod
+    def install_wrappers(timer: QueryTimer) -> ExitStack:
+        """Подключение счетчика ко всем соединениям текущего потока"""
+
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        return stack
+
+    def record(self, request: HttpRequest, timer: QueryTimer, started: float, response_bytes: int) -> None:
+        registry.record(
+            RequestSample(
+                view=self.view_name(request),
+                duration=time.perf_counter() - started,
+                queries=timer.queries,
+                query_time=timer.total,
+                slowest_query=timer.slowest,
+                render_time=getattr(request, "_metrics_render_time", 0.0),
+                response_bytes=response_bytes,
+            )
+        )
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if self.is_async:
+            return self.__acall__(request)
+
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            response: HttpResponse = self.get_response(request)
+            registry.count(self.view_name(request))
+            return response
+
+        setattr(request, "_metrics_sampled", True)
+        timer = QueryTimer()
+        started: float = time.perf_counter()
+        stack: ExitStack = self.install_wrappers(timer)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            stack.close()
+            raise
+        registry.count(self.view_name(request))
+
+        if getattr(response, "file_to_stream", None) is not None:
+            # Файл отправляет сервер через wsgi.file_wrapper (sendfile), обертка отключила бы его
+            stack.close()
+            self.record(request, timer, started, int(response.get("Content-Length", 0)))
+        elif response.streaming and not response.is_async:
+            # Потоковый ответ читает БД во время отправки, поэтому замер продолжается до ее конца
+            response.streaming_content = counted_stream(
+                response.streaming_content, stack, lambda size: self.record(request, timer, started, size)
+            )
+        else:
+            stack.close()
+            self.record(request, timer, started, 0 if response.streaming else len(response.content))
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            response: HttpResponse = await self.get_response(request)
+            registry.count(self.view_name(request))
+            return response
+
+        setattr(request, "_metrics_sampled", True)
+        timer = QueryTimer()
+        started: float = time.perf_counter()
+        # Запросы async ORM выполняются в потоке sync_to_async, поэтому счетчик подключается в нем
+        stack: ExitStack = await sync_to_async(self.install_wrappers)(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        registry.count(self.view_name(request))
+        self.record(request, timer, started, 0 if response.streaming else len(response.content))
+        return response
+
+    def process_template_response(self, request: HttpRequest, response: Any) -> Any:
+        if not getattr(request, "_metrics_sampled", False):
+            return response
+        render_started: float = time.perf_counter()
+
+        def rendered(_response: Any) -> None:
+            setattr(request, "_metrics_render_time", time.perf_counter() - render_started)
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+def counted_stream(content: Iterable[bytes], stack: ExitStack, finish: Callable[[int], None]) -> Iterator[bytes]:
+    """Подсчет размера потокового ответа с записью замера после его отправки"""
+
+    size: int = 0
+    try:
+        for chunk in content:
+            size += len(chunk)
+            yield chunk
+    finally:
+        stack.close()
+        finish(size)
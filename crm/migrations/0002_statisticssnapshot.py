@@ -0,0 +1,70 @@
+# Generated by Django 5.0.4 on 2026-10-18 04:31
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def create_snapshot(apps, schema_editor):
+    StatisticsSnapshot = apps.get_model("crm", "StatisticsSnapshot")
+    PotentialClient = apps.get_model("crm", "PotentialClient")
+    ActiveClient = apps.get_model("crm", "ActiveClient")
+    Contract = apps.get_model("crm", "Contract")
+    Campaign = apps.get_model("crm", "Campaign")
+    db = schema_editor.connection.alias
+
+    StatisticsSnapshot.objects.using(db).create(
+        pk=1,
+        potential_clients=PotentialClient.objects.using(db).count(),
+        active_clients=ActiveClient.objects.using(db).count(),
+        total_income=Contract.objects.using(db).aggregate(total=Sum("amount"))["total"] or 0,
+        total_expenses=Campaign.objects.using(db).aggregate(total=Sum("budget"))["total"] or 0,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crm", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatisticsSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "potential_clients",
+                    models.BigIntegerField(default=0, verbose_name="потенциальные клиенты"),
+                ),
+                (
+                    "active_clients",
+                    models.BigIntegerField(default=0, verbose_name="активные клиенты"),
+                ),
+                (
+                    "total_income",
+                    models.DecimalField(
+                        decimal_places=2, default=0, max_digits=20, verbose_name="доходы"
+                    ),
+                ),
+                (
+                    "total_expenses",
+                    models.DecimalField(
+                        decimal_places=2, default=0, max_digits=20, verbose_name="расходы"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Снимок статистики",
+                "verbose_name_plural": "Снимки статистики",
+            },
+        ),
+        migrations.RunPython(create_snapshot, migrations.RunPython.noop),
+    ]
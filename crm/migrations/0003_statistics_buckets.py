@@ -0,0 +1,144 @@
+# Generated by Django 5.0.4 on 2026-10-18 04:33
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_buckets(apps, schema_editor):
+    Contract = apps.get_model("crm", "Contract")
+    StatisticsBucket = apps.get_model("crm", "StatisticsBucket")
+    StatisticsContribution = apps.get_model("crm", "StatisticsContribution")
+    db = schema_editor.connection.alias
+
+    buckets = defaultdict(lambda: [0, Decimal(0)])
+    contributions = []
+    rows = Contract.objects.using(db).values(
+        "pk",
+        "conclusion_date",
+        "service_id",
+        "amount",
+        campaign=F("activeclient__potential_client__campaign_id"),
+        channel=F("activeclient__potential_client__campaign__promotion_channel"),
+    )
+    for row in rows.iterator():
+        key = (
+            row["conclusion_date"],
+            row["campaign"] or 0,
+            row["channel"] or "",
+            row["service_id"],
+        )
+        buckets[key][0] += 1
+        buckets[key][1] += row["amount"]
+        contributions.append(
+            StatisticsContribution(
+                contract_id=row["pk"],
+                day=key[0],
+                campaign_id=key[1],
+                promotion_channel=key[2],
+                service_id=key[3],
+                amount=row["amount"],
+            )
+        )
+
+    StatisticsContribution.objects.using(db).bulk_create(contributions, batch_size=1000)
+    StatisticsBucket.objects.using(db).bulk_create(
+        [
+            StatisticsBucket(
+                day=day,
+                campaign_id=campaign_id,
+                promotion_channel=channel,
+                service_id=service_id,
+                contracts=contracts,
+                income=income,
+            )
+            for (day, campaign_id, channel, service_id), (contracts, income) in buckets.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crm", "0002_statisticssnapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatisticsBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="день")),
+                (
+                    "campaign_id",
+                    models.BigIntegerField(default=0, verbose_name="id рекламной кампании"),
+                ),
+                (
+                    "promotion_channel",
+                    models.CharField(
+                        blank=True, default="", max_length=100, verbose_name="канал продвижения"
+                    ),
+                ),
+                ("service_id", models.BigIntegerField(verbose_name="id услуги")),
+                ("contracts", models.BigIntegerField(default=0, verbose_name="контракты")),
+                (
+                    "income",
+                    models.DecimalField(
+                        decimal_places=2, default=0, max_digits=20, verbose_name="доходы"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Корзина статистики",
+                "verbose_name_plural": "Корзины статистики",
+            },
+        ),
+        migrations.CreateModel(
+            name="StatisticsContribution",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("contract_id", models.BigIntegerField(unique=True, verbose_name="id контракта")),
+                ("day", models.DateField(verbose_name="день")),
+                (
+                    "campaign_id",
+                    models.BigIntegerField(default=0, verbose_name="id рекламной кампании"),
+                ),
+                (
+                    "promotion_channel",
+                    models.CharField(
+                        blank=True, default="", max_length=100, verbose_name="канал продвижения"
+                    ),
+                ),
+                ("service_id", models.BigIntegerField(verbose_name="id услуги")),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, max_digits=10, verbose_name="сумма"),
+                ),
+            ],
+            options={
+                "verbose_name": "Вклад контракта",
+                "verbose_name_plural": "Вклады контрактов",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="statisticsbucket",
+            constraint=models.UniqueConstraint(
+                fields=("day", "campaign_id", "promotion_channel", "service_id"),
+                name="crm_statisticsbucket_key",
+            ),
+        ),
+        migrations.RunPython(fill_buckets, migrations.RunPython.noop),
+    ]
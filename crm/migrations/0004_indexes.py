@@ -0,0 +1,40 @@
+# Generated by Django 5.0.4 on 2026-10-18 04:35
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crm", "0003_statistics_buckets"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="campaign",
+            index=models.Index(
+                fields=["promotion_channel", "budget"], name="crm_campaign_channel_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contract",
+            index=models.Index(fields=["conclusion_date", "service"], name="crm_contract_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="potentialclient",
+            index=models.Index(Lower("email"), name="crm_pc_email_lower_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="potentialclient",
+            index=models.Index(fields=["phone"], name="crm_pc_phone_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="statisticsbucket",
+            index=models.Index(fields=["campaign_id", "day"], name="crm_bucket_campaign_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="statisticsbucket",
+            index=models.Index(fields=["promotion_channel", "day"], name="crm_bucket_channel_idx"),
+        ),
+    ]
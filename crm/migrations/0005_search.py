@@ -0,0 +1,53 @@
+# Generated by Django 5.0.4 on 2026-10-18 04:40
+
+from django.db import migrations
+
+# Копия схемы поиска на момент миграции: дальнейшие изменения crm.search не должны менять уже примененную миграцию
+SEARCH_TABLE = "crm_search"
+
+TRIGRAM_INDEXES = (
+    ("crm_pc_name_trgm_idx", "crm_potentialclient", "full_name"),
+    ("crm_pc_email_trgm_idx", "crm_potentialclient", "email"),
+    ("crm_pc_phone_trgm_idx", "crm_potentialclient", "phone"),
+    ("crm_contract_name_trgm_idx", "crm_contract", "name"),
+)
+
+
+def create_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for index_name, table, column in TRIGRAM_INDEXES:
+            schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gin ({column} gin_trgm_ops)")
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            "kind UNINDEXED, object_id UNINDEXED, title, body, tokenize = 'trigram')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (kind, object_id, title, body) "
+            "SELECT 'potential_client', id, full_name, email || ' ' || phone FROM crm_potentialclient"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (kind, object_id, title, body) SELECT 'contract', id, name, '' FROM crm_contract"
+        )
+
+
+def drop_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        for index_name, _, _ in TRIGRAM_INDEXES:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {index_name}")
+    elif vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crm", "0004_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search, drop_search),
+    ]
@@ -0,0 +1,128 @@
+# Generated by Django 5.0.4 on 2026-10-18 04:56
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crm", "0005_search"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="contract",
+            name="document",
+            field=models.FileField(
+                max_length=200, upload_to="documents/", verbose_name="документ"
+            ),
+        ),
+        migrations.CreateModel(
+            name="DocumentBlob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "sha256",
+                    models.CharField(
+                        max_length=64, unique=True, verbose_name="SHA-256"
+                    ),
+                ),
+                (
+                    "file",
+                    models.FileField(
+                        max_length=200,
+                        upload_to="documents/blobs/",
+                        verbose_name="файл",
+                    ),
+                ),
+                ("size", models.PositiveBigIntegerField(verbose_name="размер")),
+                (
+                    "ref_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="количество ссылок"
+                    ),
+                ),
+                (
+                    "touched_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="изменение ссылок"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Файл документа",
+                "verbose_name_plural": "Файлы документов",
+                "indexes": [
+                    models.Index(
+                        fields=["ref_count", "touched_at"],
+                        name="crm_blob_unreferenced_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="contract",
+            name="blob",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="contracts",
+                to="crm.documentblob",
+                verbose_name="файл документа",
+            ),
+        ),
+        migrations.CreateModel(
+            name="DocumentUpload",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "filename",
+                    models.CharField(max_length=200, verbose_name="имя файла"),
+                ),
+                ("size", models.PositiveBigIntegerField(verbose_name="размер")),
+                (
+                    "received",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="получено байт"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="последняя часть"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Загрузка документа",
+                "verbose_name_plural": "Загрузки документов",
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.4 on 2026-10-18 05:20
+
+from django.db import migrations
+
+# Индексы префиксного поиска без учета регистра: имя индекса, таблица, колонка
+AUTOCOMPLETE_INDEXES = (
+    ("crm_service_upper_name_idx", "crm_service", "name"),
+    ("crm_campaign_upper_name_idx", "crm_campaign", "name"),
+    ("crm_pc_upper_name_idx", "crm_potentialclient", "full_name"),
+    ("crm_contract_upper_name_idx", "crm_contract", "name"),
+)
+
+
+def create_indexes(apps, schema_editor):
+    # Для PostgreSQL индекс строится с text_pattern_ops, иначе LIKE 'X%' не использует его при сопоставлении, отличном от C
+    opclass = " text_pattern_ops" if schema_editor.connection.vendor == "postgresql" else ""
+    for index_name, table, column in AUTOCOMPLETE_INDEXES:
+        schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} (UPPER({column}){opclass})")
+
+
+def drop_indexes(apps, schema_editor):
+    for index_name, _, _ in AUTOCOMPLETE_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crm", "0007_jobs"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,131 @@
+# Generated by Django 5.0.4 on 2026-10-18 05:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crm", "0008_autocomplete_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TableVersion",
+            fields=[
+                (
+                    "table",
+                    models.CharField(
+                        max_length=100,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="таблица",
+                    ),
+                ),
+                ("version", models.BigIntegerField(default=0, verbose_name="версия")),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="дата изменения"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Версия таблицы",
+                "verbose_name_plural": "Версии таблиц",
+            },
+        ),
+        migrations.AddField(
+            model_name="activeclient",
+            name="updated_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="дата изменения",
+            ),
+        ),
+        migrations.AddField(
+            model_name="activeclient",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=1, editable=False, verbose_name="версия"
+            ),
+        ),
+        migrations.AddField(
+            model_name="campaign",
+            name="updated_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="дата изменения",
+            ),
+        ),
+        migrations.AddField(
+            model_name="campaign",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=1, editable=False, verbose_name="версия"
+            ),
+        ),
+        migrations.AddField(
+            model_name="contract",
+            name="updated_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="дата изменения",
+            ),
+        ),
+        migrations.AddField(
+            model_name="contract",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=1, editable=False, verbose_name="версия"
+            ),
+        ),
+        migrations.AddField(
+            model_name="potentialclient",
+            name="updated_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="дата изменения",
+            ),
+        ),
+        migrations.AddField(
+            model_name="potentialclient",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=1, editable=False, verbose_name="версия"
+            ),
+        ),
+        migrations.AddField(
+            model_name="service",
+            name="updated_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="дата изменения",
+            ),
+        ),
+        migrations.AddField(
+            model_name="service",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=1, editable=False, verbose_name="версия"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contract",
+            index=models.Index(
+                fields=["id"], include=("name", "version"), name="crm_contract_list_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="potentialclient",
+            index=models.Index(
+                fields=["id"], include=("full_name", "version"), name="crm_pc_list_idx"
+            ),
+        ),
+    ]
@@ -1,7 +1,27 @@
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+
+class VersionedModel(models.Model):
+    """Абстрактная модель с отметкой и номером версии изменения.
 
+    Поля обновляются сигналом pre_save и используются для ETag и
+    Last-Modified условных GET-запросов.
+    """
 
-class Service(models.Model):
+    updated_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name="дата изменения")
+    version = models.PositiveIntegerField(default=1, editable=False, verbose_name="версия")
+
+    class Meta:
+        abstract = True
+
+
+class Service(VersionedModel):
     """Модель услуги"""
 
     name = models.CharField(max_length=100, verbose_name="название")
@@ -16,7 +36,7 @@ class Service(models.Model):
         return self.name
 
 
-class Campaign(models.Model):
+class Campaign(VersionedModel):
     """Модель рекламной компании"""
 
     name = models.CharField(max_length=100, verbose_name="название")
@@ -27,12 +47,15 @@ class Campaign(models.Model):
     class Meta:
         verbose_name = "Рекламная компания"
         verbose_name_plural = "Рекламные компании"
+        indexes = [
+            models.Index(fields=["promotion_channel", "budget"], name="crm_campaign_channel_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class PotentialClient(models.Model):
+class PotentialClient(VersionedModel):
     """Модель потенциального клиента"""
 
     full_name = models.CharField(max_length=100, verbose_name="Ф.И.О")
@@ -47,17 +70,73 @@ class PotentialClient(models.Model):
     class Meta:
         verbose_name = "Потенциальный клиент"
         verbose_name_plural = "Потенциальные клиенты"
+        indexes = [
+            models.Index(Lower("email"), name="crm_pc_email_lower_idx"),
+            models.Index(fields=["phone"], name="crm_pc_phone_idx"),
+            # Страница списка по курсору читается только из индекса (PostgreSQL)
+            models.Index(fields=["id"], include=["full_name", "version"], name="crm_pc_list_idx"),
+        ]
 
     def __str__(self):
         return self.full_name
 
 
-class Contract(models.Model):
+class DocumentBlob(models.Model):
+    """Модель файла документа, хранимого один раз по SHA-256 содержимого.
+
+    ref_count - количество контрактов, ссылающихся на файл. Файлы без ссылок
+    удаляются командой cleanup_documents после DOCUMENT_BLOB_GRACE_TIME.
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name="SHA-256")
+    file = models.FileField(upload_to="documents/blobs/", max_length=200, verbose_name="файл")
+    size = models.PositiveBigIntegerField(verbose_name="размер")
+    ref_count = models.PositiveIntegerField(default=0, verbose_name="количество ссылок")
+    touched_at = models.DateTimeField(auto_now_add=True, verbose_name="изменение ссылок")
+
+    class Meta:
+        verbose_name = "Файл документа"
+        verbose_name_plural = "Файлы документов"
+        indexes = [
+            models.Index(fields=["ref_count", "touched_at"], name="crm_blob_unreferenced_idx"),
+        ]
+
+    def __str__(self):
+        return self.sha256
+
+
+class DocumentUpload(models.Model):
+    """Модель незавершенной загрузки документа по частям"""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="пользователь")
+    filename = models.CharField(max_length=200, verbose_name="имя файла")
+    size = models.PositiveBigIntegerField(verbose_name="размер")
+    received = models.PositiveBigIntegerField(default=0, verbose_name="получено байт")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="последняя часть")
+
+    class Meta:
+        verbose_name = "Загрузка документа"
+        verbose_name_plural = "Загрузки документов"
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
+
+
+class Contract(VersionedModel):
     """Модель контракта"""
 
     name = models.CharField(max_length=100, verbose_name="название")
     service = models.ForeignKey(Service, on_delete=models.CASCADE, verbose_name="услуга")
-    document = models.FileField(upload_to="documents/", verbose_name="документ")
+    document = models.FileField(upload_to="documents/", max_length=200, verbose_name="документ")
+    blob = models.ForeignKey(
+        DocumentBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="contracts",
+        verbose_name="файл документа",
+    )
     conclusion_date = models.DateField(verbose_name="дата заключения")
     validity_period = models.PositiveIntegerField(verbose_name="период действия")
     amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="сумма")
@@ -65,12 +144,16 @@ class Contract(models.Model):
     class Meta:
         verbose_name = "Контракт"
         verbose_name_plural = "Контракты"
+        indexes = [
+            models.Index(fields=["conclusion_date", "service"], name="crm_contract_date_idx"),
+            models.Index(fields=["id"], include=["name", "version"], name="crm_contract_list_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class ActiveClient(models.Model):
+class ActiveClient(VersionedModel):
     """Модель активного клиента"""
 
     potential_client = models.OneToOneField(
@@ -84,3 +167,140 @@ class ActiveClient(models.Model):
 
     def __str__(self):
         return self.potential_client.full_name
+
+
+class StatisticsSnapshot(models.Model):
+    """Модель снимка статистики, поддерживаемого сигналами моделей"""
+
+    potential_clients = models.BigIntegerField(default=0, verbose_name="потенциальные клиенты")
+    active_clients = models.BigIntegerField(default=0, verbose_name="активные клиенты")
+    total_income = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="доходы")
+    total_expenses = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="расходы")
+
+    class Meta:
+        verbose_name = "Снимок статистики"
+        verbose_name_plural = "Снимки статистики"
+
+    def __str__(self):
+        return f"Статистика #{self.pk}"
+
+    @property
+    def income_expenses_ratio(self) -> Decimal:
+        if self.total_income <= 0 or self.total_expenses <= 0:
+            return Decimal(0)
+        return round(self.total_income / self.total_expenses, 2)
+
+
+class StatisticsBucket(models.Model):
+    """Модель дневной корзины доходов по кампании, каналу и услуге.
+
+    Нулевой campaign_id и пустой канал соответствуют контрактам,
+    не связанным с активным клиентом.
+    """
+
+    day = models.DateField(verbose_name="день")
+    campaign_id = models.BigIntegerField(default=0, verbose_name="id рекламной кампании")
+    promotion_channel = models.CharField(max_length=100, blank=True, default="", verbose_name="канал продвижения")
+    service_id = models.BigIntegerField(verbose_name="id услуги")
+    contracts = models.BigIntegerField(default=0, verbose_name="контракты")
+    income = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="доходы")
+
+    class Meta:
+        verbose_name = "Корзина статистики"
+        verbose_name_plural = "Корзины статистики"
+        indexes = [
+            models.Index(fields=["campaign_id", "day"], name="crm_bucket_campaign_idx"),
+            models.Index(fields=["promotion_channel", "day"], name="crm_bucket_channel_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "campaign_id", "promotion_channel", "service_id"],
+                name="crm_statisticsbucket_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} / {self.campaign_id} / {self.promotion_channel} / {self.service_id}"
+
+
+class StatisticsContribution(models.Model):
+    """Модель вклада контракта, учтенного в корзинах статистики"""
+
+    contract_id = models.BigIntegerField(unique=True, verbose_name="id контракта")
+    day = models.DateField(verbose_name="день")
+    campaign_id = models.BigIntegerField(default=0, verbose_name="id рекламной кампании")
+    promotion_channel = models.CharField(max_length=100, blank=True, default="", verbose_name="канал продвижения")
+    service_id = models.BigIntegerField(verbose_name="id услуги")
+    amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="сумма")
+
+    class Meta:
+        verbose_name = "Вклад контракта"
+        verbose_name_plural = "Вклады контрактов"
+
+    def __str__(self):
+        return f"Контракт #{self.contract_id}"
+
+
+class TableVersion(models.Model):
+    """Модель счетчика изменений таблицы, увеличиваемого сигналами"""
+
+    table = models.CharField(max_length=100, primary_key=True, verbose_name="таблица")
+    version = models.BigIntegerField(default=0, verbose_name="версия")
+    updated_at = models.DateTimeField(default=timezone.now, verbose_name="дата изменения")
+
+    class Meta:
+        verbose_name = "Версия таблицы"
+        verbose_name_plural = "Версии таблиц"
+
+    def __str__(self):
+        return f"{self.table} v{self.version}"
+
+
+class Job(models.Model):
+    """Модель фоновой задачи очереди в БД.
+
+    Воркер (run_crm_worker) забирает задачи через SELECT ... FOR UPDATE SKIP
+    LOCKED, поэтому несколько воркеров не получают одну задачу. Упавшая задача
+    возвращается в очередь с отложенным run_after, пока не кончатся попытки.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "в очереди"
+        RUNNING = "running", "выполняется"
+        SUCCEEDED = "succeeded", "выполнена"
+        FAILED = "failed", "ошибка"
+
+    kind = models.CharField(max_length=50, verbose_name="тип")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="параметры")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED, verbose_name="статус")
+    priority = models.SmallIntegerField(default=0, verbose_name="приоритет")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="попытки")
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name="максимум попыток")
+    run_after = models.DateTimeField(default=timezone.now, verbose_name="запуск не раньше")
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name="прогресс, %")
+    message = models.CharField(max_length=200, blank=True, verbose_name="состояние")
+    result = models.JSONField(null=True, blank=True, verbose_name="результат")
+    error = models.TextField(blank=True, verbose_name="ошибка")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="пользователь"
+    )
+    worker = models.CharField(max_length=100, blank=True, verbose_name="воркер")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="создана")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="запущена")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="последний сигнал воркера")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="завершена")
+
+    class Meta:
+        verbose_name = "Задача"
+        verbose_name_plural = "Задачи"
+        indexes = [
+            models.Index(fields=["status", "priority", "run_after"], name="crm_job_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk}"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
+
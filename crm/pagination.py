@@ -0,0 +1,152 @@
+import base64
+import binascii
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.http import Http404
+from django.utils.functional import cached_property
+
+
+def encode_cursor(pk: int) -> str:
+    """Кодирование первичного ключа в непрозрачный курсор"""
+
+    return base64.urlsafe_b64encode(str(pk).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Декодирование курсора в первичный ключ"""
+
+    try:
+        padding: str = "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(cursor + padding).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError) as ex:
+        raise Http404("Некорректный курсор страницы") from ex
+
+
+@dataclass
+class KeysetPage:
+    """Страница keyset-пагинации с курсорами соседних страниц"""
+
+    object_list: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+
+class KeysetPaginationMixin:
+    """Миксин keyset-пагинации списков по первичному ключу.
+
+    Страница выбирается условием pk > after (или pk < before) с LIMIT,
+    поэтому не выполняет ни OFFSET, ни COUNT(*) по всей таблице.
+    """
+
+    paginate_by: Optional[int] = None
+    after_kwarg: str = "after"
+    before_kwarg: str = "before"
+
+    def get_paginate_by(self, queryset: QuerySet) -> int:
+        return self.paginate_by or settings.PAGINATE_BY
+
+    def _cursors(self) -> Tuple[Optional[int], Optional[int]]:
+        after: Optional[str] = self.request.GET.get(self.after_kwarg)  # type: ignore
+        before: Optional[str] = self.request.GET.get(self.before_kwarg)  # type: ignore
+        return (decode_cursor(after) if after else None), (decode_cursor(before) if before else None)
+
+    @staticmethod
+    def _page(rows: List[Any], has_next: bool, has_previous: bool) -> Tuple[None, KeysetPage, List[Any], bool]:
+        page = KeysetPage(
+            object_list=rows,
+            next_cursor=encode_cursor(rows[-1].pk) if has_next and rows else None,
+            previous_cursor=encode_cursor(rows[0].pk) if has_previous and rows else None,
+        )
+        return None, page, rows, page.has_other_pages()
+
+    def paginate_queryset(self, queryset: QuerySet, page_size: int) -> Tuple[None, KeysetPage, List[Any], bool]:
+        after_pk, before_pk = self._cursors()
+        queryset = queryset.order_by()
+
+        if before_pk is not None:
+            rows: List[Any] = list(queryset.filter(pk__lt=before_pk).order_by("-pk")[: page_size + 1])
+            has_previous: bool = len(rows) > page_size
+            return self._page(rows[:page_size][::-1], True, has_previous)
+
+        window: QuerySet = queryset.filter(pk__gt=after_pk) if after_pk is not None else queryset
+        rows = list(window.order_by("pk")[: page_size + 1])
+        has_next: bool = len(rows) > page_size
+        rows = rows[:page_size]
+        has_previous = after_pk is not None and bool(rows) and queryset.filter(pk__lt=rows[0].pk).exists()
+        return self._page(rows, has_next, has_previous)
+
+    async def apaginate_queryset(
+        self, queryset: QuerySet, page_size: int
+    ) -> Tuple[None, KeysetPage, List[Any], bool]:
+        """Асинхронный вариант paginate_queryset на aiterator и aexists"""
+
+        after_pk, before_pk = self._cursors()
+        queryset = queryset.order_by()
+
+        if before_pk is not None:
+            window: QuerySet = queryset.filter(pk__lt=before_pk).order_by("-pk")[: page_size + 1]
+            rows: List[Any] = [row async for row in window.aiterator()]
+            has_previous: bool = len(rows) > page_size
+            return self._page(rows[:page_size][::-1], True, has_previous)
+
+        window = queryset.filter(pk__gt=after_pk) if after_pk is not None else queryset
+        rows = [row async for row in window.order_by("pk")[: page_size + 1].aiterator()]
+        has_next: bool = len(rows) > page_size
+        rows = rows[:page_size]
+        has_previous = after_pk is not None and bool(rows) and await queryset.filter(pk__lt=rows[0].pk).aexists()
+        return self._page(rows, has_next, has_previous)
+
+
+def estimated_count(queryset: QuerySet) -> Optional[int]:
+    """Оценка числа строк нефильтрованной таблицы по статистике планировщика.
+
+    На PostgreSQL берется pg_class.reltuples, который обновляют ANALYZE и
+    autovacuum. Для фильтрованных выборок, других СУБД и таблиц без собранной
+    статистики возвращается None.
+    """
+
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql" or queryset.query.where or queryset.query.combinator:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)", [queryset.model._meta.db_table]
+        )
+        row: Optional[Tuple[int]] = cursor.fetchone()
+    # reltuples = -1 у таблиц, для которых ANALYZE еще не выполнялся
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор с оценкой числа строк больших таблиц вместо COUNT(*).
+
+    Точный подсчет выполняется для фильтрованных выборок и таблиц, оценка
+    которых меньше ESTIMATED_COUNT_THRESHOLD.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        estimate: Optional[int] = estimated_count(self.object_list)
+        if estimate is not None and estimate >= settings.ESTIMATED_COUNT_THRESHOLD:
+            return estimate
+        return super().count
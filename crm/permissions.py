@@ -0,0 +1,200 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+
+GLOBAL_VERSION_KEY = "crm:groups:version"
+
+Stamp = Tuple[int, int]
+
+
+def initial_version() -> int:
+    # Версия начинается со времени в микросекундах: после вытеснения ключа старые штампы не повторяются
+    return time.time_ns() // 1000
+
+
+class GroupMembershipCache:
+    """Кэш членства пользователей в группах прав.
+
+    Значения хранятся по ключу (id пользователя, штамп версии) в локальном
+    LRU-кэше процесса и, если задан GROUP_CACHE_ALIAS, в общем кэше Django.
+    Штамп складывается из глобальной версии (переименование и удаление групп)
+    и версии пользователя (изменение его групп), поэтому инвалидация не требует
+    обхода закэшированных значений. Без общего кэша версии видит только процесс,
+    выполнивший запись, поэтому локальные значения живут не дольше
+    GROUP_CACHE_LOCAL_TIMEOUT секунд: отзыв прав доходит до остальных воркеров
+    за это время. Локальные версии пользователей ограничены GROUP_CACHE_SIZE,
+    как и значения: вместе с версией вытесняются значения пользователя.
+    """
+
+    def __init__(self) -> None:
+        self._local: OrderedDict[Tuple[int, Stamp], Tuple[FrozenSet[str], float]] = OrderedDict()
+        self._global_version: int = 0
+        self._user_versions: OrderedDict[int, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @property
+    def shared(self) -> Optional[BaseCache]:
+        alias: Optional[str] = settings.GROUP_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def _user_version_key(user_id: int) -> str:
+        return f"crm:groups:user:{user_id}:version"
+
+    def _stamp(self, user_id: int) -> Stamp:
+        shared: Optional[BaseCache] = self.shared
+        if shared is None:
+            return self._global_version, self._user_versions.get(user_id, 0)
+
+        user_key: str = self._user_version_key(user_id)
+        versions = shared.get_many([GLOBAL_VERSION_KEY, user_key])
+        for key in (GLOBAL_VERSION_KEY, user_key):
+            if key not in versions:
+                shared.add(key, initial_version(), None)
+                versions[key] = shared.get(key)
+        return versions[GLOBAL_VERSION_KEY], versions[user_key]
+
+    async def _astamp(self, user_id: int) -> Stamp:
+        shared: Optional[BaseCache] = self.shared
+        if shared is None:
+            return self._global_version, self._user_versions.get(user_id, 0)
+
+        user_key: str = self._user_version_key(user_id)
+        versions = await shared.aget_many([GLOBAL_VERSION_KEY, user_key])
+        for key in (GLOBAL_VERSION_KEY, user_key):
+            if key not in versions:
+                await shared.aadd(key, initial_version(), None)
+                versions[key] = await shared.aget(key)
+        return versions[GLOBAL_VERSION_KEY], versions[user_key]
+
+    @staticmethod
+    def _shared_key(user_id: int, stamp: Stamp) -> str:
+        return f"crm:groups:{user_id}:{stamp[0]}:{stamp[1]}"
+
+    def _local_get(self, local_key: Tuple[int, Stamp]) -> Optional[FrozenSet[str]]:
+        with self._lock:
+            if local_key not in self._local:
+                return None
+            groups, expires_at = self._local[local_key]
+            if expires_at <= time.monotonic():
+                del self._local[local_key]
+                return None
+            self._local.move_to_end(local_key)
+            self.hits += 1
+            return groups
+
+    def _local_put(self, local_key: Tuple[int, Stamp], groups: FrozenSet[str], shared_hit: bool) -> None:
+        with self._lock:
+            if shared_hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._local[local_key] = (groups, time.monotonic() + settings.GROUP_CACHE_LOCAL_TIMEOUT)
+            while len(self._local) > settings.GROUP_CACHE_SIZE:
+                self._local.popitem(last=False)
+
+    def get_groups(self, user) -> FrozenSet[str]:
+        """Получение названий групп пользователя"""
+
+        if user.pk is None:
+            return frozenset()
+
+        stamp: Stamp = self._stamp(user.pk)
+        local_key: Tuple[int, Stamp] = (user.pk, stamp)
+        groups: Optional[FrozenSet[str]] = self._local_get(local_key)
+        if groups is not None:
+            return groups
+
+        shared: Optional[BaseCache] = self.shared
+        shared_key: str = self._shared_key(user.pk, stamp)
+        groups = shared.get(shared_key) if shared is not None else None
+
+        shared_hit: bool = groups is not None
+        if groups is None:
+            groups = frozenset(user.groups.values_list("name", flat=True))
+            if shared is not None:
+                shared.set(shared_key, groups, settings.GROUP_CACHE_TIMEOUT)
+
+        self._local_put(local_key, groups, shared_hit)
+        return groups
+
+    async def aget_groups(self, user) -> FrozenSet[str]:
+        """Асинхронное получение названий групп пользователя через async ORM и кэш"""
+
+        if user.pk is None:
+            return frozenset()
+
+        stamp: Stamp = await self._astamp(user.pk)
+        local_key: Tuple[int, Stamp] = (user.pk, stamp)
+        groups: Optional[FrozenSet[str]] = self._local_get(local_key)
+        if groups is not None:
+            return groups
+
+        shared: Optional[BaseCache] = self.shared
+        shared_key: str = self._shared_key(user.pk, stamp)
+        groups = await shared.aget(shared_key) if shared is not None else None
+
+        shared_hit: bool = groups is not None
+        if groups is None:
+            groups = frozenset([name async for name in user.groups.values_list("name", flat=True)])
+            if shared is not None:
+                await shared.aset(shared_key, groups, settings.GROUP_CACHE_TIMEOUT)
+
+        self._local_put(local_key, groups, shared_hit)
+        return groups
+
+    @staticmethod
+    def _bump(shared: BaseCache, key: str) -> None:
+        try:
+            shared.incr(key)
+        except ValueError:
+            if not shared.add(key, initial_version(), None):
+                shared.incr(key)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Сброс закэшированных групп пользователя"""
+
+        shared: Optional[BaseCache] = self.shared
+        if shared is not None:
+            # Версии хранятся в общем кэше, локальная версия не используется
+            self._bump(shared, self._user_version_key(user_id))
+            return
+        with self._lock:
+            self._user_versions[user_id] = self._user_versions.pop(user_id, 0) + 1
+            while len(self._user_versions) > settings.GROUP_CACHE_SIZE:
+                evicted, _ = self._user_versions.popitem(last=False)
+                # Версия вытесненного пользователя снова нулевая: его старые значения не должны совпасть со штампом
+                for local_key in [local_key for local_key in self._local if local_key[0] == evicted]:
+                    del self._local[local_key]
+
+    def invalidate_all(self) -> None:
+        """Сброс групп всех пользователей"""
+
+        shared: Optional[BaseCache] = self.shared
+        if shared is not None:
+            self._bump(shared, GLOBAL_VERSION_KEY)
+        with self._lock:
+            self._global_version += 1
+            self._local.clear()
+            self._user_versions.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Счетчики попаданий и промахов кэша"""
+
+        with self._lock:
+            requests: int = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / requests, 4) if requests else 0.0,
+                "size": len(self._local),
+            }
+
+
+group_membership = GroupMembershipCache()
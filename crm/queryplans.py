@@ -0,0 +1,27 @@
+from typing import Sequence, Union
+
+from django.db.models import Prefetch, QuerySet
+
+
+class QueryPlanMixin:
+    """Миксин плана запроса представления.
+
+    Представление объявляет связи, которые использует его шаблон
+    (select_related_fields, prefetch_related_lookups), и поля, которые нужно
+    загрузить (only_fields). План применяется к get_queryset, поэтому число
+    запросов при рендеринге не зависит от количества строк.
+    """
+
+    select_related_fields: Sequence[str] = ()
+    prefetch_related_lookups: Sequence[Union[str, Prefetch]] = ()
+    only_fields: Sequence[str] = ()
+
+    def get_queryset(self) -> QuerySet:
+        queryset: QuerySet = super().get_queryset()  # type: ignore
+        if self.select_related_fields:
+            queryset = queryset.select_related(*self.select_related_fields)
+        if self.prefetch_related_lookups:
+            queryset = queryset.prefetch_related(*self.prefetch_related_lookups)
+        if self.only_fields:
+            queryset = queryset.only(*self.only_fields)
+        return queryset
@@ -0,0 +1,100 @@
+import random
+from contextvars import ContextVar
+from typing import Any, Callable, Optional, Type
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, models
+from django.http import HttpRequest, HttpResponse
+
+# Признак того, что чтение в текущем контексте должно идти с основной БД
+use_primary: ContextVar[bool] = ContextVar("use_primary", default=False)
+# Признак записи в основную БД в текущем контексте
+wrote_primary: ContextVar[bool] = ContextVar("wrote_primary", default=False)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+# Модели crm, которые читаются только с основной БД: очередь задач и загрузки блокируют строки
+PRIMARY_MODELS = ("job", "documentupload")
+
+
+class PrimaryReplicaRouter:
+    """Маршрутизатор чтения моделей crm на реплики.
+
+    Запись всегда идет в основную БД и закрепляет за ней последующее чтение в
+    том же контексте (запросе, команде). Модели других приложений (пользователи,
+    сессии) читаются только с основной БД, чтобы вход и права не зависели от
+    задержки репликации.
+    """
+
+    def db_for_read(self, model: Type[models.Model], **hints: Any) -> str:
+        replicas = settings.REPLICA_DATABASES
+        if not replicas or use_primary.get():
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label != "crm" or model._meta.model_name in PRIMARY_MODELS:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model: Type[models.Model], **hints: Any) -> str:
+        use_primary.set(True)
+        wrote_primary.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: models.Model, obj2: models.Model, **hints: Any) -> Optional[bool]:
+        aliases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, model_name: Optional[str] = None, **hints: Any) -> bool:
+        return db not in settings.REPLICA_DATABASES
+
+
+class PrimaryPinningMiddleware:
+    """Middleware закрепления чтения за основной БД после записи.
+
+    Небезопасные методы и запросы с cookie PRIMARY_COOKIE_NAME читают с
+    основной БД. После записи cookie выставляется на PRIMARY_STICKY_TIME секунд,
+    поэтому пользователь сразу видит свои изменения, пока реплики догоняют.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        self.is_async: bool = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def pinned(request: HttpRequest) -> bool:
+        return request.method not in SAFE_METHODS or settings.PRIMARY_COOKIE_NAME in request.COOKIES
+
+    @staticmethod
+    def remember(response: HttpResponse) -> HttpResponse:
+        if wrote_primary.get():
+            response.set_cookie(
+                settings.PRIMARY_COOKIE_NAME, "1", max_age=settings.PRIMARY_STICKY_TIME, httponly=True, samesite="Lax"
+            )
+        return response
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if self.is_async:
+            return self.__acall__(request)
+
+        primary_token = use_primary.set(self.pinned(request))
+        wrote_token = wrote_primary.set(False)
+        try:
+            return self.remember(self.get_response(request))
+        finally:
+            use_primary.reset(primary_token)
+            wrote_primary.reset(wrote_token)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        primary_token = use_primary.set(self.pinned(request))
+        wrote_token = wrote_primary.set(False)
+        try:
+            return self.remember(await self.get_response(request))
+        finally:
+            use_primary.reset(primary_token)
+            wrote_primary.reset(wrote_token)
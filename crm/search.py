@@ -0,0 +1,185 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Type
+
+from django.db import connection, transaction
+from django.db.models import Model, Q
+from django.urls import reverse
+
+from crm.models import PotentialClient, Contract
+
+SEARCH_TABLE = "crm_search"
+
+# Индексируемые модели: тип результата, представление деталей, поля заголовка и текста
+SEARCH_MODELS: Dict[Type[Model], tuple] = {
+    PotentialClient: ("potential_client", "crm:potential_client_details", "full_name", ("email", "phone")),
+    Contract: ("contract", "crm:contract_details", "name", ()),
+}
+
+
+class SearchResult(NamedTuple):
+    """Результат поиска"""
+
+    kind: str
+    pk: int
+    title: str
+    subtitle: str
+    rank: float
+
+    @property
+    def url(self) -> str:
+        for model_kind, url_name, _, _ in SEARCH_MODELS.values():
+            if model_kind == self.kind:
+                return reverse(url_name, kwargs={"pk": self.pk})
+        return ""
+
+
+# SCHEMA
+def fill_search_table(cursor) -> None:
+    """Заполнение таблицы FTS5 всеми индексируемыми объектами (только SQLite)"""
+
+    cursor.execute(
+        f"INSERT INTO {SEARCH_TABLE} (kind, object_id, title, body) "
+        "SELECT 'potential_client', id, full_name, email || ' ' || phone FROM crm_potentialclient"
+    )
+    cursor.execute(
+        f"INSERT INTO {SEARCH_TABLE} (kind, object_id, title, body) SELECT 'contract', id, name, '' FROM crm_contract"
+    )
+
+
+# INDEX SYNC
+def _document(instance: Model) -> tuple:
+    kind, _, title_field, body_fields = SEARCH_MODELS[type(instance)]
+    body: str = " ".join(str(getattr(instance, field_name) or "") for field_name in body_fields)
+    return kind, instance.pk, getattr(instance, title_field), body
+
+
+def index_objects(instances: Iterable[Model]) -> None:
+    """Добавление или обновление объектов в таблице FTS5 (только SQLite)"""
+
+    if connection.vendor != "sqlite":
+        return
+    documents: List[tuple] = [_document(instance) for instance in instances]
+    if not documents:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {SEARCH_TABLE} WHERE kind = %s AND object_id = %s",
+            [(kind, pk) for kind, pk, _, _ in documents],
+        )
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (kind, object_id, title, body) VALUES (%s, %s, %s, %s)", documents
+        )
+
+
+def unindex_object(instance: Model) -> None:
+    """Удаление объекта из таблицы FTS5 (только SQLite)"""
+
+    if connection.vendor != "sqlite":
+        return
+    kind: str = SEARCH_MODELS[type(instance)][0]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE kind = %s AND object_id = %s", [kind, instance.pk])
+
+
+def rebuild_index() -> None:
+    """Полное перестроение поискового индекса.
+
+    Нужно только SQLite: таблица FTS5 заполняется сигналами и после массовых
+    вставок без них расходится с данными. Триграммные GIN индексы PostgreSQL
+    СУБД поддерживает сама, их перестроение только блокировало бы запись.
+    """
+
+    if connection.vendor != "sqlite":
+        return
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        fill_search_table(cursor)
+
+
+# SEARCH
+def _trigrams(query: str) -> List[str]:
+    trigrams: List[str] = []
+    for word in query.lower().split():
+        trigrams.extend(word[i : i + 3] for i in range(len(word) - 2))
+    return list(dict.fromkeys(trigrams))
+
+
+def _search_sqlite(query: str, kinds: Sequence[str], limit: int) -> List[SearchResult]:
+    trigrams: List[str] = _trigrams(query)
+    kinds_sql: str = ", ".join(["%s"] * len(kinds))
+    with connection.cursor() as cursor:
+        if trigrams:
+            match: str = " OR ".join('"{}"'.format(trigram.replace('"', '""')) for trigram in trigrams)
+            cursor.execute(
+                f"SELECT kind, object_id, title, body, bm25({SEARCH_TABLE}, 0, 0, 10.0, 1.0) AS score "
+                f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND kind IN ({kinds_sql}) "
+                "ORDER BY score LIMIT %s",
+                [match, *kinds, limit],
+            )
+        else:
+            cursor.execute(
+                f"SELECT kind, object_id, title, body, 0 FROM {SEARCH_TABLE} "
+                f"WHERE (title LIKE %s OR body LIKE %s) AND kind IN ({kinds_sql}) LIMIT %s",
+                [f"{query}%", f"{query}%", *kinds, limit],
+            )
+        rows = cursor.fetchall()
+    return [SearchResult(kind, int(pk), title, body, -float(score)) for kind, pk, title, body, score in rows]
+
+
+def _search_postgresql(query: str, kinds: Sequence[str], limit: int) -> List[SearchResult]:
+    prefix: str = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    statements: Dict[str, str] = {
+        "potential_client": (
+            "SELECT 'potential_client', id, full_name, email || ' ' || phone, "
+            "GREATEST(similarity(full_name, %(q)s), similarity(email, %(q)s), "
+            "CASE WHEN phone LIKE %(prefix)s THEN 1 ELSE 0 END) AS rank "
+            "FROM crm_potentialclient "
+            "WHERE full_name %% %(q)s OR email %% %(q)s OR full_name ILIKE %(prefix)s "
+            "OR email ILIKE %(prefix)s OR phone LIKE %(prefix)s "
+            "ORDER BY rank DESC LIMIT %(limit)s"
+        ),
+        "contract": (
+            "SELECT 'contract', id, name, '', "
+            "GREATEST(similarity(name, %(q)s), CASE WHEN name ILIKE %(prefix)s THEN 1 ELSE 0 END) AS rank "
+            "FROM crm_contract WHERE name %% %(q)s OR name ILIKE %(prefix)s "
+            "ORDER BY rank DESC LIMIT %(limit)s"
+        ),
+    }
+    sql: str = " UNION ALL ".join(f"({statements[kind]})" for kind in kinds)
+    with connection.cursor() as cursor:
+        cursor.execute(f"{sql} ORDER BY 5 DESC LIMIT %(limit)s", {"q": query, "prefix": prefix, "limit": limit})
+        rows = cursor.fetchall()
+    return [SearchResult(kind, pk, title, body, float(rank)) for kind, pk, title, body, rank in rows]
+
+
+def _search_fallback(query: str, kinds: Sequence[str], limit: int) -> List[SearchResult]:
+    results: List[SearchResult] = []
+    for model, (kind, _, title_field, body_fields) in SEARCH_MODELS.items():
+        if kind not in kinds:
+            continue
+        condition: Q = Q(**{f"{title_field}__istartswith": query})
+        for field_name in body_fields:
+            condition |= Q(**{f"{field_name}__istartswith": query})
+        for row in model.objects.filter(condition).values("pk", title_field, *body_fields)[:limit]:
+            body: str = " ".join(str(row[field_name]) for field_name in body_fields)
+            results.append(SearchResult(kind, row["pk"], row[title_field], body, 1.0))
+    return results[:limit]
+
+
+def search(query: str, kinds: Optional[Sequence[str]] = None, limit: int = 20) -> List[SearchResult]:
+    """Ранжированный поиск потенциальных клиентов и контрактов.
+
+    На PostgreSQL используются триграммные GIN индексы (pg_trgm), на SQLite -
+    таблица FTS5 с триграммным токенизатором, поэтому совпадают и префиксы,
+    и запросы с опечатками.
+    """
+
+    query = query.strip()
+    kinds = [kind for kind, _, _, _ in SEARCH_MODELS.values() if kinds is None or kind in kinds]
+    if not query or not kinds:
+        return []
+
+    if connection.vendor == "postgresql":
+        return _search_postgresql(query, kinds, limit)
+    if connection.vendor == "sqlite":
+        return _search_sqlite(query, kinds, limit)
+    return _search_fallback(query, kinds, limit)
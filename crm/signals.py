@@ -0,0 +1,336 @@
+from decimal import Decimal
+from typing import Any, Dict, Tuple, Type
+
+from django.contrib.auth.models import Group, User
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models import F, Model
+from django.db.models.signals import m2m_changed, post_delete, post_save, post_migrate, pre_migrate, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from crm.models import (
+    Service,
+    Campaign,
+    PotentialClient,
+    Contract,
+    ActiveClient,
+)
+from crm.permissions import group_membership
+from crm.routers import use_primary
+from crm import caching, dbpool, documents, fragments, search, statistics, versioning
+
+# Отправляется после bulk_create, который не вызывает post_save: sender - модель, instances - созданные объекты
+post_bulk_create = Signal()
+
+
+# GROUP MEMBERSHIP
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_user_groups(sender, instance, action: str, reverse: bool, pk_set, **kwargs) -> None:
+    """Сброс кэша групп при изменении состава групп пользователя"""
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        group_membership.invalidate_user(instance.pk)
+    elif pk_set:
+        for user_id in pk_set:
+            group_membership.invalidate_user(user_id)
+    else:
+        group_membership.invalidate_all()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_all_groups(sender, **kwargs) -> None:
+    """Сброс кэша групп при переименовании или удалении группы"""
+
+    group_membership.invalidate_all()
+
+
+# STATISTICS
+# Поля, предыдущие значения которых нужны для инкрементального обновления статистики
+TRACKED_FIELDS: Dict[Type[Model], Tuple[str, ...]] = {
+    PotentialClient: ("campaign_id",),
+    ActiveClient: ("contract_id", "potential_client_id"),
+    Contract: ("amount", "blob_id"),
+    Campaign: ("budget", "promotion_channel"),
+}
+
+
+def _amount(value) -> Decimal:
+    return Decimal(str(value or 0))
+
+
+@receiver(pre_save, sender=PotentialClient)
+@receiver(pre_save, sender=ActiveClient)
+@receiver(pre_save, sender=Contract)
+@receiver(pre_save, sender=Campaign)
+def remember_previous_values(sender, instance, **kwargs) -> None:
+    """Запоминание значений отслеживаемых полей до сохранения"""
+
+    fields: Tuple[str, ...] = TRACKED_FIELDS[sender]
+    previous: Dict[str, Any] = {}
+    if instance.pk is not None:
+        previous = sender.objects.filter(pk=instance.pk).values(*fields).first() or {}
+    instance._statistics_previous = previous  # pylint: disable=protected-access
+
+
+def _previous(instance) -> Dict[str, Any]:
+    return getattr(instance, "_statistics_previous", {})
+
+
+@receiver(post_save, sender=PotentialClient)
+@receiver(post_save, sender=ActiveClient)
+@receiver(post_save, sender=Contract)
+@receiver(post_save, sender=Campaign)
+def update_snapshot_on_save(sender, instance, created: bool, **kwargs) -> None:
+    """Изменение счетчиков снимка статистики при сохранении"""
+
+    counter, amount_field = statistics.SNAPSHOT_COUNTERS[sender]
+    if amount_field is None:
+        if created:
+            statistics.apply_delta(**{counter: 1})
+        return
+
+    previous: Decimal = _amount(_previous(instance).get(amount_field))
+    statistics.apply_delta(**{counter: _amount(getattr(instance, amount_field)) - previous})
+
+
+@receiver(post_delete, sender=PotentialClient)
+@receiver(post_delete, sender=ActiveClient)
+@receiver(post_delete, sender=Contract)
+@receiver(post_delete, sender=Campaign)
+def update_snapshot_on_delete(sender, instance, **kwargs) -> None:
+    """Изменение счетчиков снимка статистики при удалении"""
+
+    counter, amount_field = statistics.SNAPSHOT_COUNTERS[sender]
+    delta = -1 if amount_field is None else -_amount(getattr(instance, amount_field))
+    statistics.apply_delta(**{counter: delta})
+
+
+@receiver(post_bulk_create)
+def update_snapshot_on_bulk_create(sender, instances, **kwargs) -> None:
+    """Изменение счетчиков снимка статистики после массового создания"""
+
+    if sender not in statistics.SNAPSHOT_COUNTERS or not instances:
+        return
+    counter, amount_field = statistics.SNAPSHOT_COUNTERS[sender]
+    if amount_field is None:
+        statistics.apply_delta(**{counter: len(instances)})
+    else:
+        statistics.apply_delta(**{counter: sum(_amount(getattr(instance, amount_field)) for instance in instances)})
+
+
+@receiver(post_save, sender=Contract)
+@receiver(post_delete, sender=Contract)
+def update_buckets_on_contract_change(sender, instance, **kwargs) -> None:
+    """Пересчет корзин статистики при изменении контракта"""
+
+    statistics.refresh_contracts([instance.pk])
+
+
+@receiver(post_save, sender=ActiveClient)
+@receiver(post_delete, sender=ActiveClient)
+def update_buckets_on_active_client_change(sender, instance, **kwargs) -> None:
+    """Пересчет корзин статистики при привязке контракта к клиенту"""
+
+    statistics.refresh_contracts([instance.contract_id, _previous(instance).get("contract_id")])
+
+
+@receiver(post_bulk_create, sender=Contract)
+@receiver(post_bulk_create, sender=ActiveClient)
+def update_buckets_on_bulk_create(sender, instances, **kwargs) -> None:
+    """Пересчет корзин статистики после массового создания контрактов и активных клиентов"""
+
+    attribute: str = "pk" if sender is Contract else "contract_id"
+    statistics.refresh_contracts(getattr(instance, attribute) for instance in instances)
+
+
+@receiver(post_save, sender=PotentialClient)
+def update_buckets_on_potential_client_change(sender, instance, created: bool, **kwargs) -> None:
+    """Пересчет корзин статистики при смене кампании клиента"""
+
+    previous: Dict[str, Any] = _previous(instance)
+    if created or previous.get("campaign_id", instance.campaign_id) == instance.campaign_id:
+        return
+    statistics.refresh_contracts(
+        ActiveClient.objects.filter(potential_client=instance.pk).values_list("contract_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Campaign)
+def update_buckets_on_campaign_change(sender, instance, created: bool, **kwargs) -> None:
+    """Пересчет корзин статистики при смене канала продвижения кампании"""
+
+    previous: Dict[str, Any] = _previous(instance)
+    if created or previous.get("promotion_channel", instance.promotion_channel) == instance.promotion_channel:
+        return
+    contract_ids = Contract.objects.filter(activeclient__potential_client__campaign=instance.pk).values_list(
+        "pk", flat=True
+    )
+    statistics.refresh_contracts(contract_ids.iterator())
+
+
+# SEARCH INDEX
+@receiver(post_save, sender=PotentialClient)
+@receiver(post_save, sender=Contract)
+def index_search_document(sender, instance, **kwargs) -> None:
+    """Обновление документа поискового индекса при сохранении"""
+
+    search.index_objects([instance])
+
+
+@receiver(post_bulk_create, sender=PotentialClient)
+@receiver(post_bulk_create, sender=Contract)
+def index_search_documents(sender, instances, **kwargs) -> None:
+    """Добавление документов в поисковый индекс после массового создания"""
+
+    search.index_objects(instances)
+
+
+@receiver(post_delete, sender=PotentialClient)
+@receiver(post_delete, sender=Contract)
+def unindex_search_document(sender, instance, **kwargs) -> None:
+    """Удаление документа из поискового индекса"""
+
+    search.unindex_object(instance)
+
+
+# DOCUMENT BLOBS
+@receiver(post_save, sender=Contract)
+def update_blob_references_on_save(sender, instance, **kwargs) -> None:
+    """Перенос ссылки контракта со старого файла документа на новый"""
+
+    previous_blob_id = _previous(instance).get("blob_id")
+    if previous_blob_id != instance.blob_id:
+        documents.retain_blob(instance.blob_id)
+        documents.release_blob(previous_blob_id)
+
+
+@receiver(post_delete, sender=Contract)
+def release_blob_on_delete(sender, instance, **kwargs) -> None:
+    """Освобождение файла документа удаленного контракта"""
+
+    documents.release_blob(instance.blob_id)
+
+
+@receiver(post_bulk_create, sender=Contract)
+def retain_blobs_on_bulk_create(sender, instances, **kwargs) -> None:
+    """Учет ссылок на файлы документов после массового создания контрактов"""
+
+    for instance in instances:
+        documents.retain_blob(instance.blob_id)
+
+
+# VERSIONS
+VERSIONED_MODELS: Tuple[Type[Model], ...] = (Service, Campaign, PotentialClient, Contract, ActiveClient)
+
+
+@receiver(pre_save, sender=Service)
+@receiver(pre_save, sender=Campaign)
+@receiver(pre_save, sender=PotentialClient)
+@receiver(pre_save, sender=Contract)
+@receiver(pre_save, sender=ActiveClient)
+def stamp_change(sender, instance, raw: bool, **kwargs) -> None:
+    """Отметка времени изменения и увеличение версии объекта в БД"""
+
+    if raw:
+        return
+    instance.updated_at = timezone.now()
+    if not instance._state.adding:  # pylint: disable=protected-access
+        instance.version = F("version") + 1
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=Campaign)
+@receiver(post_save, sender=PotentialClient)
+@receiver(post_save, sender=Contract)
+@receiver(post_save, sender=ActiveClient)
+def bump_version_on_save(sender, instance, **kwargs) -> None:
+    """Увеличение версии таблицы и поколения пространства ключей после сохранения объекта"""
+
+    if not isinstance(instance.version, int):
+        # Выражение F("version") + 1 заменяется отложенным полем, загружаемым из БД при обращении
+        del instance.version
+    versioning.bump_table_version(sender)
+    caching.bump_generation_on_commit(caching.model_namespace(sender))
+
+
+@receiver(post_delete, sender=Service)
+@receiver(post_delete, sender=Campaign)
+@receiver(post_delete, sender=PotentialClient)
+@receiver(post_delete, sender=Contract)
+@receiver(post_delete, sender=ActiveClient)
+def bump_version_on_delete(sender, instance, **kwargs) -> None:
+    """Увеличение версии таблицы и поколения пространства ключей после удаления объекта"""
+
+    versioning.bump_table_version(sender)
+    caching.bump_generation_on_commit(caching.model_namespace(sender))
+
+
+@receiver(post_bulk_create)
+def bump_version_on_bulk_create(sender, instances, **kwargs) -> None:
+    """Увеличение версии таблицы и поколения пространства ключей один раз после массового создания"""
+
+    if sender in VERSIONED_MODELS and instances:
+        versioning.bump_table_version(sender)
+        caching.bump_generation_on_commit(caching.model_namespace(sender))
+
+
+# ROW FRAGMENTS
+@receiver(post_save, sender=PotentialClient)
+@receiver(post_save, sender=ActiveClient)
+def invalidate_fragments_on_save(sender, instance, **kwargs) -> None:
+    """Сброс разметки строк, которые выводят данные сохраненного объекта, после фиксации.
+
+    Разметка самого объекта не сбрасывается: его версия выросла, и ключ уже другой.
+    """
+
+    fragments.invalidate_dependents_on_commit(sender, [instance], [_previous(instance)])
+
+
+@receiver(post_delete, sender=Service)
+@receiver(post_delete, sender=Campaign)
+@receiver(post_delete, sender=PotentialClient)
+@receiver(post_delete, sender=Contract)
+@receiver(post_delete, sender=ActiveClient)
+def invalidate_fragments_on_delete(sender, instance, **kwargs) -> None:
+    """Сброс разметки удаленного объекта и строк, которые выводят его данные, после фиксации"""
+
+    if isinstance(instance.__dict__.get("version"), int):
+        key: str = fragments.object_fragment_key(instance)
+        transaction.on_commit(lambda: fragments.fragment_cache().delete(key))
+    fragments.invalidate_dependents_on_commit(sender, [instance])
+
+
+@receiver(post_bulk_create)
+def invalidate_fragments_on_bulk_create(sender, instances, **kwargs) -> None:
+    """Сброс разметки строк, которые выводят данные массово созданных объектов"""
+
+    if sender in VERSIONED_MODELS and instances:
+        fragments.invalidate_dependents_on_commit(sender, instances)
+
+
+# DATABASE CONNECTIONS
+@receiver(request_started)
+def count_request(sender, **kwargs) -> None:
+    """Учет запроса для доли переиспользования соединений с БД"""
+
+    dbpool.stats.request()
+
+
+# REPLICAS
+@receiver(pre_migrate)
+def read_primary_during_migrate(sender, **kwargs) -> None:
+    """Чтение миграций данных с основной БД: на репликах еще нет новых таблиц"""
+
+    use_primary.set(True)
+
+
+@receiver(post_migrate)
+def read_replicas_after_migrate(sender, **kwargs) -> None:
+    """Возврат чтения на реплики после миграций"""
+
+    use_primary.set(False)
@@ -0,0 +1,55 @@
+// Подсказки для выпадающих списков внешних ключей с атрибутом data-autocomplete-url.
+// Перед списком добавляется поле поиска, варианты загружаются с сервера по мере ввода.
+(function () {
+  "use strict";
+
+  function bind(select) {
+    var input = document.createElement("input");
+    var minLength = parseInt(select.dataset.autocompleteMinLength || "1", 10);
+    var timer = null;
+    var request = 0;
+
+    input.type = "search";
+    input.placeholder = "Search…";
+    input.autocomplete = "off";
+    select.parentNode.insertBefore(input, select);
+
+    function render(results) {
+      var selected = select.options[select.selectedIndex];
+      Array.prototype.slice.call(select.options).forEach(function (option) {
+        if (option !== selected && option.value !== "") {
+          select.removeChild(option);
+        }
+      });
+      results.forEach(function (result) {
+        if (selected && String(result.id) === selected.value) {
+          return;
+        }
+        select.appendChild(new Option(result.text, result.id));
+      });
+    }
+
+    input.addEventListener("input", function () {
+      clearTimeout(timer);
+      if (input.value.trim().length < minLength) {
+        return;
+      }
+      timer = setTimeout(function () {
+        var current = ++request;
+        var url = select.dataset.autocompleteUrl + "?q=" + encodeURIComponent(input.value.trim());
+        fetch(url, {credentials: "same-origin", headers: {"Accept": "application/json"}})
+          .then(function (response) { return response.json(); })
+          .then(function (data) {
+            // Ответы на устаревшие запросы игнорируются
+            if (current === request) {
+              render(data.results);
+            }
+          });
+      }, 250);
+    });
+  }
+
+  document.addEventListener("DOMContentLoaded", function () {
+    document.querySelectorAll("select[data-autocomplete-url]").forEach(bind);
+  });
+})();
@@ -0,0 +1,332 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Any, DefaultDict, Dict, Iterable, List, Optional, Set, Tuple, Type, Union
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, QuerySet, Sum
+from django.db.models.functions import TruncMonth
+
+from crm.models import (
+    Campaign,
+    PotentialClient,
+    Contract,
+    ActiveClient,
+    StatisticsSnapshot,
+    StatisticsBucket,
+    StatisticsContribution,
+)
+
+SNAPSHOT_PK = 1
+
+Number = Union[int, Decimal]
+
+# Поле снимка и суммируемое поле модели (None - количество записей)
+SNAPSHOT_COUNTERS: Dict[Type[models.Model], tuple] = {
+    PotentialClient: ("potential_clients", None),
+    ActiveClient: ("active_clients", None),
+    Contract: ("total_income", "amount"),
+    Campaign: ("total_expenses", "budget"),
+}
+
+
+# Пространства ключей моделей, запись в которые меняет статистику
+STATISTICS_NAMESPACES: Tuple[str, ...] = tuple(model._meta.model_name for model in SNAPSHOT_COUNTERS)
+
+
+def compute_statistics() -> Dict[str, Number]:
+    """Расчет счетчиков статистики агрегатами по полным таблицам"""
+
+    return {
+        "potential_clients": PotentialClient.objects.count(),
+        "active_clients": ActiveClient.objects.count(),
+        "total_income": Contract.objects.aggregate(total=Sum("amount"))["total"] or Decimal(0),
+        "total_expenses": Campaign.objects.aggregate(total=Sum("budget"))["total"] or Decimal(0),
+    }
+
+
+def get_snapshot() -> StatisticsSnapshot:
+    """Получение снимка статистики, при отсутствии - с построением"""
+
+    snapshot = StatisticsSnapshot.objects.filter(pk=SNAPSHOT_PK).first()
+    if snapshot is None:
+        rebuild_snapshot()
+        snapshot = StatisticsSnapshot.objects.get(pk=SNAPSHOT_PK)
+    return snapshot
+
+
+async def acompute_statistics() -> Dict[str, Number]:
+    """Асинхронный расчет счетчиков статистики через acount и aaggregate"""
+
+    income = await Contract.objects.aaggregate(total=Sum("amount"))
+    expenses = await Campaign.objects.aaggregate(total=Sum("budget"))
+    return {
+        "potential_clients": await PotentialClient.objects.acount(),
+        "active_clients": await ActiveClient.objects.acount(),
+        "total_income": income["total"] or Decimal(0),
+        "total_expenses": expenses["total"] or Decimal(0),
+    }
+
+
+async def aget_snapshot() -> StatisticsSnapshot:
+    """Асинхронное получение снимка статистики, при отсутствии - с построением"""
+
+    snapshot: Optional[StatisticsSnapshot] = await StatisticsSnapshot.objects.filter(pk=SNAPSHOT_PK).afirst()
+    if snapshot is None:
+        snapshot, _ = await StatisticsSnapshot.objects.aget_or_create(
+            pk=SNAPSHOT_PK, defaults=await acompute_statistics()
+        )
+    return snapshot
+
+
+def apply_delta(**deltas: Number) -> None:
+    """Атомарное изменение счетчиков снимка на указанные величины"""
+
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    updated: int = StatisticsSnapshot.objects.filter(pk=SNAPSHOT_PK).update(
+        **{name: F(name) + delta for name, delta in deltas.items()}
+    )
+    if not updated:
+        rebuild_snapshot()
+
+
+def rebuild_snapshot() -> Dict[str, tuple]:
+    """Пересчет снимка с нуля.
+
+    Строка снимка блокируется до расчета агрегатов: apply_delta параллельной
+    транзакции ждет блокировку и применяется поверх пересчитанных значений, а
+    не затирается ими. Возвращает расхождения в виде
+    {поле: (значение в снимке, фактическое значение)}.
+    """
+
+    with transaction.atomic():
+        snapshot: Optional[StatisticsSnapshot] = (
+            StatisticsSnapshot.objects.select_for_update().filter(pk=SNAPSHOT_PK).first()
+        )
+        if snapshot is None:
+            try:
+                with transaction.atomic():
+                    StatisticsSnapshot.objects.create(pk=SNAPSHOT_PK, **compute_statistics())
+                return {}
+            except IntegrityError:
+                # Снимок одновременно создала другая транзакция
+                snapshot = StatisticsSnapshot.objects.select_for_update().get(pk=SNAPSHOT_PK)
+
+        actual: Dict[str, Number] = compute_statistics()
+        drift: Dict[str, tuple] = {
+            name: (getattr(snapshot, name), value)
+            for name, value in actual.items()
+            if getattr(snapshot, name) != value
+        }
+        if drift:
+            StatisticsSnapshot.objects.filter(pk=SNAPSHOT_PK).update(**actual)
+    return drift
+
+
+# STATISTICS BUCKETS
+# Ключ корзины: день, id кампании, канал продвижения, id услуги
+BucketKey = Tuple[Any, int, str, int]
+
+CONTRIBUTION_FIELDS: Dict[str, Any] = {
+    "campaign": F("activeclient__potential_client__campaign_id"),
+    "channel": F("activeclient__potential_client__campaign__promotion_channel"),
+}
+
+
+def _bucket_key(day, campaign_id: Optional[int], channel: Optional[str], service_id: int) -> BucketKey:
+    return day, campaign_id or 0, channel or "", service_id
+
+
+def _key_filter(key: BucketKey) -> Dict[str, Any]:
+    day, campaign_id, channel, service_id = key
+    return {"day": day, "campaign_id": campaign_id, "promotion_channel": channel, "service_id": service_id}
+
+
+def _contract_contributions(contract_ids: Iterable[int]) -> Dict[int, Tuple[BucketKey, Decimal]]:
+    rows = Contract.objects.filter(pk__in=contract_ids).values(
+        "pk", "conclusion_date", "service_id", "amount", **CONTRIBUTION_FIELDS
+    )
+    return {
+        row["pk"]: (
+            _bucket_key(row["conclusion_date"], row["campaign"], row["channel"], row["service_id"]),
+            Decimal(row["amount"]),
+        )
+        for row in rows
+    }
+
+
+def _apply_bucket_delta(key: BucketKey, contracts: int, income: Decimal) -> None:
+    lookup: Dict[str, Any] = _key_filter(key)
+    changes: Dict[str, Any] = {"contracts": F("contracts") + contracts, "income": F("income") + income}
+
+    if not StatisticsBucket.objects.filter(**lookup).update(**changes):
+        try:
+            with transaction.atomic():
+                StatisticsBucket.objects.create(**lookup, contracts=contracts, income=income)
+        except IntegrityError:
+            StatisticsBucket.objects.filter(**lookup).update(**changes)
+
+    if contracts < 0:
+        StatisticsBucket.objects.filter(**lookup, contracts__lte=0).delete()
+
+
+def refresh_contracts(contract_ids: Iterable[int]) -> None:
+    """Пересчет вклада контрактов в дневные корзины статистики.
+
+    Учтенный вклад каждого контракта хранится в StatisticsContribution, поэтому
+    обновление не зависит от порядка сигналов и затрагивает только корзины
+    перечисленных контрактов.
+    """
+
+    ids: Set[int] = {contract_id for contract_id in contract_ids if contract_id is not None}
+    if not ids:
+        return
+
+    with transaction.atomic():
+        previous: Dict[int, StatisticsContribution] = {
+            contribution.contract_id: contribution
+            for contribution in StatisticsContribution.objects.select_for_update().filter(contract_id__in=ids)
+        }
+        actual: Dict[int, Tuple[BucketKey, Decimal]] = _contract_contributions(ids)
+
+        deltas: DefaultDict[BucketKey, List[Any]] = defaultdict(lambda: [0, Decimal(0)])
+        changed: List[int] = []
+        for contract_id in ids:
+            old: Optional[StatisticsContribution] = previous.get(contract_id)
+            old_state: Optional[Tuple[BucketKey, Decimal]] = None
+            if old is not None:
+                old_key: BucketKey = _bucket_key(old.day, old.campaign_id, old.promotion_channel, old.service_id)
+                old_state = (old_key, old.amount)
+            new_state: Optional[Tuple[BucketKey, Decimal]] = actual.get(contract_id)
+            if old_state == new_state:
+                continue
+
+            changed.append(contract_id)
+            if old_state is not None:
+                deltas[old_state[0]][0] -= 1
+                deltas[old_state[0]][1] -= old_state[1]
+            if new_state is not None:
+                deltas[new_state[0]][0] += 1
+                deltas[new_state[0]][1] += new_state[1]
+
+        if not changed:
+            return
+
+        StatisticsContribution.objects.filter(contract_id__in=changed).delete()
+        StatisticsContribution.objects.bulk_create(
+            [
+                StatisticsContribution(
+                    contract_id=contract_id, amount=actual[contract_id][1], **_key_filter(actual[contract_id][0])
+                )
+                for contract_id in changed
+                if contract_id in actual
+            ]
+        )
+        for key, (contracts, income) in deltas.items():
+            if contracts or income:
+                _apply_bucket_delta(key, contracts, income)
+
+
+def rebuild_buckets(batch_size: int = 5000) -> int:
+    """Пересчет дневных корзин статистики с нуля.
+
+    Возвращает количество корзин, значения которых разошлись с фактическими.
+    """
+
+    with transaction.atomic():
+        stored: Dict[BucketKey, Tuple[int, Decimal]] = {
+            _bucket_key(bucket.day, bucket.campaign_id, bucket.promotion_channel, bucket.service_id): (
+                bucket.contracts,
+                bucket.income,
+            )
+            for bucket in StatisticsBucket.objects.iterator(chunk_size=batch_size)
+        }
+
+        StatisticsContribution.objects.all().delete()
+        buckets: DefaultDict[BucketKey, List[Any]] = defaultdict(lambda: [0, Decimal(0)])
+        contributions: List[StatisticsContribution] = []
+        rows = Contract.objects.values("pk", "conclusion_date", "service_id", "amount", **CONTRIBUTION_FIELDS)
+        for row in rows.iterator(chunk_size=batch_size):
+            key: BucketKey = _bucket_key(row["conclusion_date"], row["campaign"], row["channel"], row["service_id"])
+            buckets[key][0] += 1
+            buckets[key][1] += row["amount"]
+            contributions.append(
+                StatisticsContribution(contract_id=row["pk"], amount=row["amount"], **_key_filter(key))
+            )
+            if len(contributions) >= batch_size:
+                StatisticsContribution.objects.bulk_create(contributions)
+                contributions = []
+        StatisticsContribution.objects.bulk_create(contributions)
+
+        StatisticsBucket.objects.all().delete()
+        StatisticsBucket.objects.bulk_create(
+            [
+                StatisticsBucket(contracts=contracts, income=income, **_key_filter(key))
+                for key, (contracts, income) in buckets.items()
+            ],
+            batch_size=batch_size,
+        )
+
+    actual: Dict[BucketKey, Tuple[int, Decimal]] = {key: (value[0], value[1]) for key, value in buckets.items()}
+    return sum(1 for key in stored.keys() | actual.keys() if stored.get(key) != actual.get(key))
+
+
+def income_expenses_ratio(income: Optional[Decimal], expenses: Optional[Decimal]) -> Decimal:
+    """Отношение доходов к расходам с округлением до сотых"""
+
+    if not income or not expenses or income <= 0 or expenses <= 0:
+        return Decimal(0)
+    return round(income / expenses, 2)
+
+
+def get_breakdown(start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, Any]:
+    """Разбивка доходов по кампаниям, каналам и месяцам за период.
+
+    Доходы суммируются по дневным корзинам, расходы берутся из бюджетов кампаний.
+    """
+
+    buckets: QuerySet = StatisticsBucket.objects.all()
+    if start:
+        buckets = buckets.filter(day__gte=start)
+    if end:
+        buckets = buckets.filter(day__lte=end)
+    sums: Dict[str, Any] = {"income": Sum("income"), "contracts": Sum("contracts")}
+
+    by_campaign: List[Dict[str, Any]] = list(
+        buckets.exclude(campaign_id=0).values("campaign_id").annotate(**sums).order_by("campaign_id")
+    )
+    campaigns: Dict[int, Campaign] = Campaign.objects.only("name", "budget").in_bulk(
+        [row["campaign_id"] for row in by_campaign]
+    )
+    for row in by_campaign:
+        campaign: Optional[Campaign] = campaigns.get(row["campaign_id"])
+        row["name"] = campaign.name if campaign else f"#{row['campaign_id']}"
+        row["expenses"] = campaign.budget if campaign else Decimal(0)
+        row["ratio"] = income_expenses_ratio(row["income"], row["expenses"])
+
+    by_channel: List[Dict[str, Any]] = list(
+        buckets.exclude(promotion_channel="").values("promotion_channel").annotate(**sums).order_by("promotion_channel")
+    )
+    channel_budgets: Dict[str, Decimal] = dict(
+        Campaign.objects.filter(promotion_channel__in=[row["promotion_channel"] for row in by_channel])
+        .values("promotion_channel")
+        .annotate(budget=Sum("budget"))
+        .values_list("promotion_channel", "budget")
+    )
+    for row in by_channel:
+        row["expenses"] = channel_budgets.get(row["promotion_channel"], Decimal(0))
+        row["ratio"] = income_expenses_ratio(row["income"], row["expenses"])
+
+    by_month: List[Dict[str, Any]] = list(
+        buckets.annotate(month=TruncMonth("day")).values("month").annotate(**sums).order_by("month")
+    )
+
+    return {
+        "by_campaign": by_campaign,
+        "by_channel": by_channel,
+        "by_month": by_month,
+        "totals": buckets.aggregate(**sums),
+    }
@@ -0,0 +1,87 @@
+from dataclasses import asdict
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from crm.documents import cleanup_documents
+from crm.imports import ImportReport, import_leads
+from crm.jobs import Progress, job_handler
+from crm.models import Campaign, Job
+from crm.search import rebuild_index
+from crm.statistics import rebuild_buckets, rebuild_snapshot
+
+IMPORTS_DIR = "imports"
+
+
+@job_handler("import_leads")
+def import_leads_job(job: Job, progress: Progress) -> Dict[str, Any]:
+    """Импорт потенциальных клиентов из файла, сохраненного в хранилище.
+
+    Контрольная точка лежит рядом с файлом, поэтому повтор задачи продолжает
+    импорт с последней записанной пачки. После успешного импорта файл и
+    контрольная точка удаляются, а отчет об ошибках остается.
+    """
+
+    payload: Dict[str, Any] = job.payload
+    path = Path(default_storage.path(payload["path"]))
+    checkpoint: Path = path.with_name(f"{path.name}.checkpoint")
+    errors_name: str = f"{payload['path']}.errors.csv"
+    campaign: Optional[Campaign] = Campaign.objects.filter(pk=payload.get("campaign")).first()
+    size: int = path.stat().st_size or 1
+
+    errors_path: str = default_storage.path(errors_name)
+    with path.open("rb") as stream, open(errors_path, "a", encoding="utf-8", newline="") as errors:
+
+        def report_progress(report: ImportReport) -> None:
+            progress(stream.tell() * 100 / size, f"Обработано строк: {report.skipped + report.processed}")
+
+        report: ImportReport = import_leads(
+            stream,
+            payload["format"],
+            campaign=campaign,
+            chunk_size=settings.IMPORT_CHUNK_SIZE,
+            errors_file=errors,
+            checkpoint_path=checkpoint,
+            progress=report_progress,
+        )
+
+    with open(errors_path, encoding="utf-8") as errors:
+        lines: List[str] = [line.rstrip("\r\n") for line in islice(errors, settings.IMPORT_REPORTED_ERRORS + 1)]
+    path.unlink(missing_ok=True)
+    checkpoint.unlink(missing_ok=True)
+    return {
+        **asdict(report),
+        "rows_per_second": report.rows_per_second,
+        "errors_file": errors_name,
+        "error_lines": lines[1:],
+    }
+
+
+@job_handler("rebuild_statistics")
+def rebuild_statistics_job(job: Job, progress: Progress) -> Dict[str, Any]:
+    """Пересчет снимка и корзин статистики"""
+
+    drift: Dict[str, tuple] = rebuild_snapshot()
+    progress(50, "Снимок статистики пересчитан", force=True)
+    return {
+        "snapshot_drift": {field_name: [str(value) for value in values] for field_name, values in drift.items()},
+        "buckets_drift": rebuild_buckets(),
+    }
+
+
+@job_handler("rebuild_search_index")
+def rebuild_search_index_job(job: Job, progress: Progress) -> None:
+    """Перестроение поискового индекса"""
+
+    rebuild_index()
+
+
+@job_handler("cleanup_documents")
+def cleanup_documents_job(job: Job, progress: Progress) -> Dict[str, int]:
+    """Очистка брошенных загрузок и файлов документов без ссылок"""
+
+    uploads, blobs = cleanup_documents()
+    return {"uploads": uploads, "blobs": blobs}
@@ -0,0 +1,47 @@
+from typing import Callable, List
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from crm.datagen import generate_crm_data
+
+
+class QueryCountAssertionsMixin:
+    """Миксин проверок количества запросов представлений"""
+
+    def capture_crm_queries(self, make_request: Callable) -> List[str]:
+        """SQL запросов к таблицам crm, выполненных при запросе к представлению"""
+
+        with CaptureQueriesContext(connection) as queries:
+            response = make_request()
+            self.assertEqual(response.status_code, 200)  # type: ignore
+        return [query["sql"] for query in queries.captured_queries if '"crm_' in query["sql"]]
+
+    def assertConstantQueries(self, make_request: Callable, add_rows: Callable[[int], None], rows: int = 5):
+        """Проверка, что число запросов не растет с количеством строк.
+
+        Первый запрос прогревает кэши (сессии, группы прав), затем число
+        запросов сравнивается до и после добавления строк.
+        """
+
+        make_request()
+        before: List[str] = self.capture_crm_queries(make_request)
+        add_rows(rows)
+        after: List[str] = self.capture_crm_queries(make_request)
+        self.assertEqual(len(before), len(after), "\n".join(after))  # type: ignore
+
+
+class ScaledDataMixin:
+    """Миксин тестов на синтетических данных масштаба data_scale.
+
+    Данные генерируются один раз на класс с фиксированным seed, поэтому
+    тесты и замеры производительности работают с одинаковым набором.
+    """
+
+    data_scale: str = "tiny"
+    data_seed: int = 0
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()  # type: ignore
+        cls.generation_report = generate_crm_data(cls.data_scale, cls.data_seed, write_documents=False)
@@ -0,0 +1,113 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from crm.models import ActiveClient, Campaign, Contract, PotentialClient, Service
+from crm.pagination import EstimatedCountPaginator, estimated_count
+from crm.tests.helpers import QueryCountAssertionsMixin
+
+
+class TestAdmin(QueryCountAssertionsMixin, TestCase):
+    """Класс тестов производительности админки"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+        "04-campaigns.json",
+        "05-potential_clients.json",
+        "06-contracts.json",
+        "07-active_clients.json",
+    ]
+
+    def setUp(self):
+        self.client.force_login(User.objects.get(username="admin"))
+
+    def test_changelists_join_foreign_keys(self):
+        """Тест независимости числа запросов списков админки от количества строк"""
+
+        def add_potential_clients(rows: int) -> None:
+            campaign = Campaign.objects.first()
+            PotentialClient.objects.bulk_create(
+                PotentialClient(
+                    full_name=f"Extra {i}", phone=f"7999100000{i}", email=f"extra{i}@example.com", campaign=campaign
+                )
+                for i in range(rows)
+            )
+
+        def add_active_clients(rows: int) -> None:
+            for i in range(rows):
+                potential_client = PotentialClient.objects.create(
+                    full_name=f"Active {i}",
+                    phone=f"7999200000{i}",
+                    email=f"active{i}@example.com",
+                    campaign=Campaign.objects.first(),
+                )
+                contract = Contract.objects.create(
+                    name=f"Contract {i}",
+                    service=Service.objects.first(),
+                    document="documents/contract.pdf",
+                    conclusion_date="2024-01-01",
+                    validity_period=12,
+                    amount=100,
+                )
+                ActiveClient.objects.create(potential_client=potential_client, contract=contract)
+
+        for model_name, add_rows in (
+            ("campaign", None),
+            ("potentialclient", add_potential_clients),
+            ("contract", None),
+            ("activeclient", add_active_clients),
+        ):
+            with self.subTest(model_name):
+                url: str = reverse(f"admin:crm_{model_name}_changelist")
+                if add_rows is None:
+                    # COUNT(*) пагинатора и выборка страницы с присоединенными FK
+                    self.assertEqual(len(self.capture_crm_queries(lambda: self.client.get(url))), 2)
+                else:
+                    self.assertConstantQueries(lambda: self.client.get(url), add_rows)
+
+    def test_estimated_count_fallback(self):
+        """Тест точного подсчета, когда оценка по статистике СУБД недоступна"""
+
+        queryset = PotentialClient.objects.all()
+
+        self.assertIsNone(estimated_count(queryset.filter(pk__gt=1)))
+        self.assertEqual(EstimatedCountPaginator(queryset.order_by("pk"), 2).count, queryset.count())
+
+    @override_settings(ADMIN_SEARCH_LIMIT=10)
+    def test_indexed_search_and_autocomplete(self):
+        """Тест поиска в списке и автодополнения через поисковый индекс"""
+
+        client = PotentialClient.objects.first()
+
+        response = self.client.get(reverse("admin:crm_potentialclient_changelist"), {"q": client.full_name})
+        self.assertContains(response, client.email)
+
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "term": client.full_name,
+                "app_label": "crm",
+                "model_name": "activeclient",
+                "field_name": "potential_client",
+            },
+        )
+        self.assertIn(str(client.pk), [row["id"] for row in response.json()["results"]])
+
+    @override_settings(ADMIN_SEARCH_LIMIT=1)
+    def test_truncated_search_reported(self):
+        """Тест предупреждения об обрезанных результатах поиска"""
+
+        response = self.client.get(reverse("admin:crm_potentialclient_changelist"), {"q": "client"})
+
+        self.assertContains(response, "Показаны 1 лучших совпадений")
+
+    def test_name_search_ignores_case(self):
+        """Тест префиксного поиска услуг без учета регистра"""
+
+        service = Service.objects.first()
+
+        response = self.client.get(reverse("admin:crm_service_changelist"), {"q": service.name[:3].swapcase()})
+
+        self.assertContains(response, service.name)
@@ -0,0 +1,121 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse_lazy
+
+from crm.models import PotentialClient, StatisticsSnapshot
+from crm.pagination import encode_cursor
+
+
+class TestAsyncViews(TestCase):
+    """Класс тестов асинхронных представлений списков, деталей и статистики"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+        "04-campaigns.json",
+        "05-potential_clients.json",
+        "06-contracts.json",
+        "07-active_clients.json",
+    ]
+
+    async def login(self, username: str) -> None:
+        await self.async_client.aforce_login(await User.objects.aget(username=username))
+
+    async def test_list_contract_by_manager(self):
+        """Тест получения списка контрактов под аккаунтом менеджера"""
+
+        await self.login("manager")
+
+        response = await self.async_client.get(reverse_lazy("crm:async_contracts"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "New contract")
+
+    async def test_list_contract_by_not_manager(self):
+        """Тест получения списка контрактов под невалидным аккаунтом"""
+
+        await self.login("operator")
+
+        response = await self.async_client.get(reverse_lazy("crm:async_contracts"))
+
+        self.assertEqual(response.status_code, 403)
+
+    async def test_list_by_anonymous(self):
+        """Тест перенаправления анонимного пользователя на страницу входа"""
+
+        response = await self.async_client.get(reverse_lazy("crm:async_services"))
+
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(PAGINATE_BY=2)
+    async def test_list_potential_client_keyset_pages(self):
+        """Тест постраничного вывода потенциальных клиентов по курсорам"""
+
+        await self.login("manager")
+
+        response = await self.async_client.get(reverse_lazy("crm:async_potential_clients"))
+        page = response.context["page_obj"]
+
+        self.assertEqual([client.pk for client in page], [1, 3])
+        self.assertEqual(page.next_cursor, encode_cursor(3))
+
+        response = await self.async_client.get(
+            reverse_lazy("crm:async_potential_clients"), {"after": page.next_cursor}
+        )
+
+        self.assertEqual([client.pk for client in response.context["page_obj"]], [4, 5])
+        self.assertTrue(response.context["page_obj"].has_previous())
+
+    async def test_list_active_client_by_admin(self):
+        """Тест получения списка активных клиентов под аккаунтом админа"""
+
+        await self.login("admin")
+        potential_client = await PotentialClient.objects.aget(pk=1)
+
+        response = await self.async_client.get(reverse_lazy("crm:async_active_clients"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, potential_client.full_name)
+
+    async def test_list_active_client_by_not_admin(self):
+        """Тест получения списка активных клиентов под аккаунтом без статуса суперпользователя"""
+
+        await self.login("manager")
+
+        response = await self.async_client.get(reverse_lazy("crm:async_active_clients"))
+
+        self.assertEqual(response.status_code, 403)
+
+    async def test_details_active_client_by_admin(self):
+        """Тест получения деталей активного клиента со связанными объектами"""
+
+        await self.login("admin")
+
+        response = await self.async_client.get(reverse_lazy("crm:async_active_client_details", kwargs={"pk": 1}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "New potential client")
+        self.assertContains(response, "New contract")
+
+    async def test_details_not_found(self):
+        """Тест получения деталей несуществующего контракта"""
+
+        await self.login("manager")
+
+        response = await self.async_client.get(reverse_lazy("crm:async_contract_details", kwargs={"pk": 999}))
+
+        self.assertEqual(response.status_code, 404)
+
+    async def test_statistics(self):
+        """Тест статистики с построением отсутствующего снимка"""
+
+        await self.login("operator")
+        await StatisticsSnapshot.objects.all().adelete()
+        potential_clients = await PotentialClient.objects.acount()
+
+        response = await self.async_client.get(reverse_lazy("crm:async_statistics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f"Total clients attracted: {potential_clients}")
+        self.assertTrue(await StatisticsSnapshot.objects.aexists())
@@ -0,0 +1,100 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse_lazy
+
+from crm.models import Contract
+from crm.tests.helpers import QueryCountAssertionsMixin
+
+
+class TestAutocomplete(QueryCountAssertionsMixin, TestCase):
+    """Класс тестов подсказок для полей внешних ключей"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+        "04-campaigns.json",
+        "05-potential_clients.json",
+        "06-contracts.json",
+        "07-active_clients.json",
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        """Объявление подготовленных юзеров с группами прав"""
+
+        super().setUpClass()
+        cls.manager = User.objects.get(username="manager")
+        cls.operator = User.objects.get(username="operator")
+
+    def test_prefix_search(self):
+        """Тест поиска по префиксу без учета регистра одним запросом"""
+
+        self.client.force_login(self.manager)
+        url = reverse_lazy("crm:autocomplete_contract")
+        self.client.get(url, {"q": "s"})
+
+        queries = self.capture_crm_queries(lambda: self.client.get(url, {"q": "sAmE"}))
+        response = self.client.get(url, {"q": "sAmE"})
+
+        self.assertEqual(len(queries), 1)
+        self.assertIn("UPPER", queries[0])
+        self.assertEqual([row["text"] for row in response.json()["results"]], ["Same contract", "Same test contract"])
+        self.assertEqual(self.client.get(url, {"q": ""}).json(), {"results": []})
+
+    def test_free_contracts(self):
+        """Тест подсказок только свободных контрактов для конвертации клиента"""
+
+        self.client.force_login(self.manager)
+        url = reverse_lazy("crm:autocomplete_free_contract")
+        self.client.get(url, {"q": "s"})
+
+        queries = self.capture_crm_queries(lambda: self.client.get(url, {"q": "s"}))
+        response = self.client.get(url, {"q": "s"})
+
+        self.assertEqual([row["id"] for row in response.json()["results"]], [3, 6])
+        self.assertIn("NOT EXISTS", queries[0])
+
+    def test_permissions(self):
+        """Тест доступа к подсказкам только группам, заполняющим поле"""
+
+        self.client.force_login(self.operator)
+
+        self.assertEqual(self.client.get(reverse_lazy("crm:autocomplete_contract"), {"q": "s"}).status_code, 403)
+        self.assertEqual(self.client.get(reverse_lazy("crm:autocomplete_campaign"), {"q": "n"}).status_code, 200)
+
+    def test_form_renders_only_selected_option(self):
+        """Тест формы, выводящей только выбранный вариант вместо всех строк связанной таблицы"""
+
+        self.client.force_login(self.manager)
+        contract = Contract.objects.get(pk=7)
+
+        response = self.client.get(reverse_lazy("crm:create_active_client", kwargs={"pk": 6}))
+        self.assertContains(response, 'data-autocomplete-url="/autocomplete/free-contracts/"')
+        self.assertNotContains(response, "Same contract")
+        self.assertContains(response, "crm/autocomplete.js")
+
+        response = self.client.get(reverse_lazy("crm:contract_update", kwargs={"pk": contract.pk}))
+        self.assertContains(response, f'<option value="{contract.service_id}" selected>{contract.service}</option>')
+        self.assertEqual(response.content.count(b"<option"), 1)
+
+        response = self.client.post(reverse_lazy("crm:create_active_client", kwargs={"pk": 6}), {"contract": 1})
+        self.assertFormError(
+            response.context["form"],
+            "contract",
+            "Select a valid choice. That choice is not one of the available choices.",
+        )
+
+    def test_invalid_value(self):
+        """Тест ошибки поля вместо ошибки сервера при значении, не являющемся ключом"""
+
+        self.client.force_login(User.objects.get(username="marketer"))
+
+        response = self.client.post(reverse_lazy("crm:create_campaign"), {"name": "Campaign", "service": "abc"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(
+            response.context["form"],
+            "service",
+            "Select a valid choice. That choice is not one of the available choices.",
+        )
@@ -0,0 +1,71 @@
+import asyncio
+
+from django.test import TestCase
+
+from crm.benchmarks import benchmark_routes, compare_results, load_test, named_routes, percentile
+from crm.tests.helpers import ScaledDataMixin
+
+
+class TestBenchmarks(ScaledDataMixin, TestCase):
+    """Класс тестов бенчмарка маршрутов"""
+
+    def test_percentile(self):
+        """Тест процентилей методом ближайшего ранга"""
+
+        values = [float(value) for value in range(1, 101)]
+
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 95), 95.0)
+        self.assertEqual(percentile([7.0], 99), 7.0)
+
+    def test_benchmark_all_routes(self):
+        """Тест замера всех именованных маршрутов на синтетических данных"""
+
+        results = benchmark_routes(iterations=1)
+
+        self.assertEqual(set(results), {name for name, _ in named_routes()})
+        for name, result in results.items():
+            self.assertEqual(result.status, 200, name)
+            self.assertGreater(result.queries, 0, name)
+            self.assertLessEqual(result.p50_ms, result.max_ms)
+
+    def test_compare_results(self):
+        """Тест поиска регрессий относительно базового замера"""
+
+        baseline = {"10k": {"services": {"p50_ms": 10, "p95_ms": 20, "queries": 4, "peak_memory_kb": 100}}}
+        current = {"10k": {"services": {"p50_ms": 11, "p95_ms": 30, "queries": 5, "peak_memory_kb": 100}}}
+
+        regressions = compare_results(baseline, current, threshold=0.2)
+
+        self.assertEqual([regression.metric for regression in regressions], ["p95_ms", "queries"])
+        self.assertAlmostEqual(regressions[0].change, 0.5)
+
+    async def test_load_test(self):
+        """Тест нагрузки keep-alive соединениями с ответами фиксированной длины и chunked"""
+
+        responses = [
+            b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok",
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n2\r\nok\r\n0\r\n\r\n",
+            b"HTTP/1.1 500 Error\r\nContent-Length: 0\r\nConnection: close\r\n\r\n",
+        ]
+
+        async def handle(reader, writer):
+            try:
+                for response in responses:
+                    await reader.readuntil(b"\r\n\r\n")
+                    writer.write(response)
+                    await writer.drain()
+            except (asyncio.IncompleteReadError, ConnectionResetError):
+                # Нагрузка завершилась и клиент закрыл keep-alive соединение посреди серии ответов
+                pass
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            result = await load_test(f"http://127.0.0.1:{port}/services/", "sessionid=x", 2, 0.2)
+
+        self.assertGreater(result.requests, 0)
+        self.assertGreater(result.errors, 0)
+        self.assertAlmostEqual(result.requests, 2 * result.errors, delta=4)
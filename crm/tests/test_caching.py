@@ -0,0 +1,67 @@
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import TestCase, override_settings
+from django.urls import reverse_lazy
+
+from crm.caching import GENERATION_KEY, bump_generation, get_generations
+from crm.models import PotentialClient
+
+
+class TestCacheNamespaces(TestCase):
+    """Класс тестов поколений пространств ключей моделей"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+        "04-campaigns.json",
+        "05-potential_clients.json",
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.get(username="manager")
+
+    def test_write_invalidates_statistics(self):
+        """Тест сброса закэшированной статистики записью в модель после фиксации"""
+
+        self.client.force_login(self.manager)
+        self.assertContains(self.client.get(reverse_lazy("crm:statistics")), "Total clients attracted: 6")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PotentialClient.objects.filter(pk=1).delete()
+        with mock.patch("crm.caching.start_background_refresh") as refresh:
+            response = self.client.get(reverse_lazy("crm:statistics"))
+
+        refresh.assert_not_called()
+        self.assertContains(response, "Total clients attracted: 5")
+
+    def test_generation_not_reused_after_eviction(self):
+        """Тест нового поколения после вытеснения счетчика из кэша"""
+
+        generation = get_generations(("contract",))
+        cache.clear()
+
+        self.assertEqual(get_generations(("contract",)), get_generations(("contract",)))
+        self.assertNotEqual(get_generations(("contract",)), generation)
+
+    def test_file_cache_shared_between_processes(self):
+        """Тест смены поколения, записанной другим процессом через общий файловый кэш"""
+
+        with tempfile.TemporaryDirectory() as location:
+            backend = {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location}
+            with override_settings(CACHES={"default": backend}):
+                generations = get_generations(("campaign", "contract"))
+                other_process = FileBasedCache(location, {})
+
+                other_process.incr(GENERATION_KEY.format(namespace="contract"))
+                changed = get_generations(("campaign", "contract"))
+                bump_generation("campaign")
+
+                self.assertNotEqual(changed, generations)
+                self.assertEqual(changed.split(".")[0], generations.split(".")[0])
+                self.assertNotEqual(get_generations(("campaign", "contract")).split(".")[0], generations.split(".")[0])
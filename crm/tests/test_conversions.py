@@ -0,0 +1,100 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse_lazy
+
+from crm.conversions import convert_potential_clients, validate_conversions
+from crm.models import ActiveClient
+from crm.statistics import get_snapshot
+
+
+class TestBulkConversion(TestCase):
+    """Класс тестов массовой конвертации потенциальных клиентов"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+        "04-campaigns.json",
+        "05-potential_clients.json",
+        "06-contracts.json",
+        "07-active_clients.json",
+    ]
+    url = reverse_lazy("crm:bulk_create_active_clients")
+
+    @classmethod
+    def setUpClass(cls):
+        """Объявление подготовленных юзеров с группами прав"""
+
+        super().setUpClass()
+        cls.manager = User.objects.get(username="manager")
+        cls.operator = User.objects.get(username="operator")
+
+    def test_convert_with_conflicts(self):
+        """Тест создания допустимых строк и отчета о конфликтах по каждой строке"""
+
+        active_clients: int = get_snapshot().active_clients
+        conversions = [(5, 3), (6, 3), (1, 6), (7, 1), (99, 6), (6, 99), (6, 6)]
+
+        with self.assertNumQueries(1):
+            validate_conversions(conversions)
+        report = convert_potential_clients(conversions)
+
+        self.assertEqual(
+            [(client.potential_client_id, client.contract_id) for client in report.created], [(5, 3), (6, 6)]
+        )
+        self.assertEqual(
+            [(conflict.row, conflict.error) for conflict in report.conflicts],
+            [
+                (2, "Контракт повторяется в запросе"),
+                (3, "Потенциальный клиент уже стал активным"),
+                (4, "Контракт уже привязан к активному клиенту"),
+                (5, "Потенциальный клиент не найден"),
+                (6, "Контракт не найден"),
+            ],
+        )
+        self.assertTrue(ActiveClient.objects.filter(potential_client=6, contract=6).exists())
+        self.assertEqual(get_snapshot().active_clients, active_clients + 2)
+
+    def test_bulk_view_form(self):
+        """Тест формы массовой конвертации под аккаунтом менеджера"""
+
+        self.client.force_login(self.manager)
+
+        response = self.client.post(self.url, {"conversions": "5,3\n7,4\n"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["report"].created), 1)
+        self.assertContains(response, "Контракт уже привязан к активному клиенту")
+
+        response = self.client.post(self.url, {"conversions": "5;3"})
+        self.assertFormError(
+            response.context["form"], "conversions", "Строка 1: нужны id потенциального клиента и id контракта"
+        )
+
+    def test_bulk_view_json(self):
+        """Тест JSON API массовой конвертации"""
+
+        self.client.force_login(self.manager)
+        conversions = [{"potential_client": 5, "contract": 3}, {"potential_client": 6, "contract": 1}]
+
+        response = self.client.post(self.url, json.dumps({"conversions": conversions}), content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([(row["potential_client"], row["contract"]) for row in data["created"]], [(5, 3)])
+        self.assertEqual(data["conflicts"][0]["row"], 2)
+
+        response = self.client.post(self.url, json.dumps({"conversions": []}), content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_view_by_not_manager(self):
+        """Тест массовой конвертации под невалидным аккаунтом"""
+
+        self.client.force_login(self.operator)
+
+        response = self.client.post(self.url, {"conversions": "5,3"})
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(ActiveClient.objects.filter(potential_client=5).exists())
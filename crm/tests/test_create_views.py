@@ -197,6 +197,19 @@ class TestCreateViews(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertTrue(ActiveClient.objects.filter(potential_client=potential_client.pk).exists())
 
+    def test_create_active_client_for_missing_potential_client(self):
+        """Тест ответа 404 при создании активного клиента для несуществующего потенциального клиента"""
+
+        self.client.force_login(self.manager)
+
+        response = self.client.post(
+            reverse_lazy("crm:create_active_client", kwargs={"pk": 999}),
+            data={"contract": Contract.objects.get(pk=6).pk},
+        )
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(ActiveClient.objects.filter(potential_client_id=999).exists())
+
     def test_create_active_client_by_not_manager(self):
         """Тест создания активного клиента под невалидным аккаунтом"""
 
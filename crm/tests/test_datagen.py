@@ -0,0 +1,81 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from crm.caching import get_generations
+from crm.datagen import SCALES, generate_crm_data
+from crm.models import Campaign, PotentialClient, Contract, ActiveClient, StatisticsSnapshot, TableVersion
+from crm.search import search
+from crm.statistics import compute_statistics
+from crm.tests.helpers import ScaledDataMixin
+
+
+class TestDataGenerator(ScaledDataMixin, TestCase):
+    """Класс тестов генератора синтетических данных"""
+
+    def test_scale_counts(self):
+        """Тест количества записей масштаба"""
+
+        scale = SCALES[self.data_scale]
+
+        self.assertEqual(self.generation_report.created, scale)
+        self.assertEqual(PotentialClient.objects.count(), scale["potential_clients"])
+        self.assertEqual(ActiveClient.objects.count(), scale["active_clients"])
+        self.assertEqual(
+            Contract.objects.filter(document__startswith="documents/generated/").count(), scale["contracts"]
+        )
+
+    def test_statistics_and_search_rebuilt(self):
+        """Тест пересчета снимка статистики и поискового индекса после генерации"""
+
+        snapshot = StatisticsSnapshot.objects.get()
+        client = PotentialClient.objects.first()
+
+        self.assertEqual(snapshot.potential_clients, compute_statistics()["potential_clients"])
+        self.assertEqual(snapshot.total_income, compute_statistics()["total_income"])
+        self.assertIn(client.pk, [result.pk for result in search(client.email, ["potential_client"])])
+
+    def test_seed_is_reproducible(self):
+        """Тест одинаковых данных при одинаковом seed"""
+
+        first = list(Campaign.objects.order_by("pk").values_list("promotion_channel", "budget"))
+        Campaign.objects.all().delete()
+
+        generate_crm_data(self.data_scale, self.data_seed, write_documents=False, rebuild=False)
+
+        self.assertEqual(list(Campaign.objects.order_by("pk").values_list("promotion_channel", "budget")), first)
+
+    def test_versions_and_generations_bumped(self):
+        """Тест смены версий таблиц и поколений кэша дополненных моделей"""
+
+        table = TableVersion.objects.get(table=Campaign._meta.db_table).version
+        generations = get_generations(("campaign", "service"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_crm_data(self.data_scale, counts={"services": 0}, write_documents=False, rebuild=False)
+
+        self.assertGreater(TableVersion.objects.get(table=Campaign._meta.db_table).version, table)
+        self.assertNotEqual(get_generations(("campaign",)), generations.split(".")[0])
+        self.assertEqual(get_generations(("service",)), generations.split(".")[1])
+
+    def test_command_with_custom_counts(self):
+        """Тест команды генерации с переопределенным количеством записей"""
+
+        out = StringIO()
+
+        call_command(
+            "generate_crm_data",
+            "--scale",
+            "tiny",
+            "--potential-clients",
+            "10",
+            "--active-clients",
+            "5",
+            "--no-documents",
+            stdout=out,
+        )
+
+        self.assertIn("potential_clients: 10", out.getvalue())
+        self.assertIn("active_clients: 5", out.getvalue())
+        self.assertEqual(StatisticsSnapshot.objects.get().potential_clients, PotentialClient.objects.count())
@@ -0,0 +1,75 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.sqlite3 import base as sqlite_base
+from django.test import TestCase
+from django.urls import reverse_lazy
+
+from crm.dbpool import ConnectionStatsMixin, pool_stats, server_stats, stats
+
+
+class StatsDatabaseWrapper(ConnectionStatsMixin, sqlite_base.DatabaseWrapper):
+    """Бэкенд SQLite со статистикой соединений для тестов"""
+
+
+class TestConnectionStats(TestCase):
+    """Класс тестов статистики соединений с БД"""
+
+    fixtures = ["01-groups.json", "02-users.json"]
+
+    def setUp(self):
+        stats.reset()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.wrapper = StatsDatabaseWrapper(
+            {**connection.settings_dict, "NAME": Path(directory.name) / "stats.sqlite3", "CONN_HEALTH_CHECKS": True},
+            alias="stats",
+        )
+        self.addCleanup(self.wrapper.close)
+
+    def test_opened_connections(self):
+        """Тест учета открытия соединений и доли переиспользования"""
+
+        for _ in range(4):
+            stats.request()
+        self.wrapper.ensure_connection()
+        self.wrapper.ensure_connection()
+
+        data = stats.snapshot()["stats"]
+        self.assertEqual(data["opened"], 1)
+        self.assertGreater(data["connect_time"], 0)
+        self.assertEqual(data["reuse_ratio"], 0.75)
+
+    def test_health_check_failure(self):
+        """Тест учета соединений, закрытых после неудачной проверки"""
+
+        self.wrapper.ensure_connection()
+        self.wrapper.health_check_done = False
+        with mock.patch.object(self.wrapper, "is_usable", return_value=False):
+            self.wrapper.close_if_health_check_failed()
+
+        self.assertIsNone(self.wrapper.connection)
+        self.assertEqual(stats.snapshot()["stats"]["health_check_failures"], 1)
+
+    def test_without_pool_and_server_stats(self):
+        """Тест отсутствия статистики пула и сервера вне PostgreSQL"""
+
+        self.assertIsNone(pool_stats(connection))
+        self.assertIsNone(server_stats(connection))
+
+    def test_metrics_and_command(self):
+        """Тест счетчиков соединений на странице метрик и отчета команды"""
+
+        self.client.force_login(User.objects.get(username="admin"))
+        response = self.client.get(reverse_lazy("crm:metrics"))
+        output = StringIO()
+        call_command("dbpool_stats", "--json", stdout=output)
+
+        self.assertContains(response, "# TYPE crm_db_connection_reuse_ratio gauge")
+        self.assertEqual(stats.requests, 1)
+        self.assertIn('"conn_health_checks"', output.getvalue())
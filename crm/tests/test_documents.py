@@ -0,0 +1,165 @@
+import hashlib
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse_lazy
+
+from django.utils import timezone
+
+from crm.documents import cleanup_documents, hash_states, store_blob
+from crm.models import Contract, DocumentBlob, DocumentUpload, Service
+
+
+class TestDocumentUploads(TestCase):
+    """Класс тестов загрузки документов по частям и их дедупликации"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        """Объявление подготовленных юзеров с группами прав"""
+
+        super().setUpClass()
+        cls.manager = User.objects.get(username="manager")
+        cls.operator = User.objects.get(username="operator")
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name, DOCUMENT_CHUNK_MAX_SIZE=4)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_login(self.manager)
+
+    def put_part(self, upload_id, content: bytes, start: int, size: int):
+        return self.client.put(
+            reverse_lazy("crm:document_upload_part", kwargs={"pk": upload_id}),
+            data=content,
+            content_type="application/octet-stream",
+            headers={"Content-Range": f"bytes {start}-{start + len(content) - 1}/{size}"},
+        )
+
+    def create_contract(self, name: str, **document):
+        data = {
+            "name": name,
+            "service": Service.objects.get(pk=7).pk,
+            "conclusion_date": "2020-01-01",
+            "validity_period": 12,
+            "amount": 100,
+            **document,
+        }
+        return self.client.post(reverse_lazy("crm:create_contract"), data=data)
+
+    def test_chunked_upload(self):
+        """Тест загрузки по частям с продолжением после неверного смещения"""
+
+        content = b"%PDF-scan-0123456789"
+        response = self.client.post(
+            reverse_lazy("crm:document_upload"), {"filename": "scan.PDF", "size": len(content)}
+        )
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.json()["id"]
+
+        self.assertEqual(self.put_part(upload_id, content[:4], 0, len(content)).json()["offset"], 4)
+        conflict = self.put_part(upload_id, content[8:12], 8, len(content))
+        self.assertEqual(conflict.status_code, 409)
+        self.assertEqual(conflict.json()["offset"], 4)
+        self.assertEqual(self.put_part(upload_id, content[4:10], 4, len(content)).status_code, 413)
+
+        status = self.client.get(reverse_lazy("crm:document_upload_part", kwargs={"pk": upload_id}))
+        for start in range(status.json()["offset"], len(content), 4):
+            response = self.put_part(upload_id, content[start : start + 4], start, len(content))
+
+        sha256 = hashlib.sha256(content).hexdigest()
+        self.assertEqual(response.json()["sha256"], sha256)
+        blob = DocumentBlob.objects.get(sha256=sha256)
+        self.assertEqual(blob.file.name, f"documents/blobs/{sha256[:2]}/{sha256}.pdf")
+        with default_storage.open(blob.file.name) as file:
+            self.assertEqual(file.read(), content)
+        self.assertFalse(DocumentUpload.objects.exists())
+
+        response = self.create_contract("Chunked", document_sha256=sha256)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Contract.objects.get(name="Chunked").document.name, blob.file.name)
+
+    def test_upload_not_allowed(self):
+        """Тест запрета загрузки документов не менеджеру"""
+
+        self.client.force_login(self.operator)
+        response = self.client.post(reverse_lazy("crm:document_upload"), {"filename": "scan.pdf", "size": 10})
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_deduplicated_references(self):
+        """Тест хранения одинаковых документов один раз и подсчета ссылок"""
+
+        for name in ("First", "Second"):
+            self.create_contract(name, document=ContentFile(b"same scan", name="scan.pdf"))
+        blob = DocumentBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(
+            set(Contract.objects.filter(name__in=["First", "Second"]).values_list("blob", flat=True)), {blob.pk}
+        )
+
+        second = Contract.objects.get(name="Second")
+        self.client.post(
+            reverse_lazy("crm:contract_update", kwargs={"pk": second.pk}),
+            {
+                "name": "Second",
+                "service": second.service_id,
+                "conclusion_date": "2020-01-01",
+                "validity_period": 12,
+                "amount": 100,
+                "document": ContentFile(b"other scan", name="other.pdf"),
+            },
+        )
+        Contract.objects.get(name="First").delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 0)
+
+        with override_settings(DOCUMENT_BLOB_GRACE_TIME=0):
+            self.assertEqual(cleanup_documents(), (0, 1))
+        self.assertFalse(default_storage.exists(blob.file.name))
+        self.assertEqual(DocumentBlob.objects.get().ref_count, 1)
+
+    def test_incremental_hash(self):
+        """Тест SHA-256 по частям без повторного чтения файла и с дочитыванием в другом процессе"""
+
+        content = b"0123456789abcdef"
+        upload_ids = [
+            self.client.post(reverse_lazy("crm:document_upload"), {"filename": f"{index}.pdf", "size": 16}).json()["id"]
+            for index in range(2)
+        ]
+
+        with mock.patch("crm.documents._hash_range") as hash_range:
+            for start in range(0, 16, 4):
+                response = self.put_part(upload_ids[0], content[start : start + 4], start, 16)
+        hash_range.assert_not_called()
+        self.assertEqual(response.json()["sha256"], hashlib.sha256(content).hexdigest())
+
+        self.put_part(upload_ids[1], content[:4], 0, 16)
+        self.put_part(upload_ids[1], content[4:8], 4, 16)
+        hash_states.discard(uuid.UUID(upload_ids[1]))
+        self.put_part(upload_ids[1], content[8:12], 8, 16)
+        response = self.put_part(upload_ids[1], content[12:], 12, 16)
+        self.assertEqual(response.json()["sha256"], hashlib.sha256(content).hexdigest())
+
+    def test_deduplicated_blob_kept_by_cleanup(self):
+        """Тест продления льготного времени файла без ссылок при повторной загрузке"""
+
+        blob = store_blob([b"old scan"], "scan.pdf")
+        DocumentBlob.objects.filter(pk=blob.pk).update(touched_at=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(store_blob([b"old scan"], "copy.pdf").pk, blob.pk)
+        self.assertEqual(cleanup_documents(), (0, 0))
+        self.assertTrue(default_storage.exists(blob.file.name))
@@ -0,0 +1,127 @@
+import os
+import tempfile
+from urllib.parse import quote
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse_lazy
+
+from crm.documents import store_blob
+from crm.models import Contract, Service
+
+
+class TestContractDocumentDownload(TestCase):
+    """Класс тестов скачивания документа контракта"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+    ]
+    content = b"%PDF-1.4 contract scan"
+
+    @classmethod
+    def setUpClass(cls):
+        """Объявление подготовленных юзеров с группами прав"""
+
+        super().setUpClass()
+        cls.manager = User.objects.get(username="manager")
+        cls.operator = User.objects.get(username="operator")
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.blob = store_blob([self.content], "scan.pdf")
+        self.contract = Contract.objects.create(
+            name="Scan",
+            service=Service.objects.get(pk=7),
+            document=self.blob.file.name,
+            blob=self.blob,
+            conclusion_date="2020-01-01",
+            validity_period=12,
+            amount=100,
+        )
+        self.url = reverse_lazy("crm:contract_document", kwargs={"pk": self.contract.pk})
+        self.client.force_login(self.manager)
+
+    def test_download(self):
+        """Тест отдачи документа с ETag по SHA-256 и повторного запроса с If-None-Match"""
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(response["ETag"], f'"{self.blob.sha256}"')
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn(f"contract_{self.contract.pk}.pdf", response["Content-Disposition"])
+
+        self.assertEqual(self.client.get(self.url, headers={"If-None-Match": response["ETag"]}).status_code, 304)
+
+    def test_range_requests(self):
+        """Тест частичной отдачи документа по заголовку Range"""
+
+        response = self.client.get(self.url, headers={"Range": "bytes=2-5"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.content[2:6])
+        self.assertEqual(response["Content-Range"], f"bytes 2-5/{len(self.content)}")
+
+        response = self.client.get(self.url, headers={"Range": "bytes=-4"})
+        self.assertEqual(b"".join(response.streaming_content), self.content[-4:])
+
+        response = self.client.get(self.url, headers={"Range": "bytes=1000-"})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.content)}")
+
+        response = self.client.get(self.url, headers={"Range": "bytes=2-5", "If-Range": '"stale"'})
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DOCUMENT_SENDFILE="nginx")
+    def test_sendfile(self):
+        """Тест передачи отдачи файла nginx через X-Accel-Redirect"""
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected/{self.blob.file.name}")
+        self.assertEqual(response.content, b"")
+
+    def test_sendfile_non_ascii_name(self):
+        """Тест передачи веб-серверу файла с именем не в ASCII"""
+
+        name = default_storage.save("documents/договор.pdf", ContentFile(self.content))
+        Contract.objects.filter(pk=self.contract.pk).update(document=name, blob=None)
+
+        with self.settings(DOCUMENT_SENDFILE="nginx"):
+            response = self.client.get(self.url)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected/{quote(name)}")
+
+        with self.settings(DOCUMENT_SENDFILE="apache"):
+            response = self.client.get(self.url)
+        self.assertEqual(response["X-Sendfile"].encode("latin-1"), os.fsencode(default_storage.path(name)))
+
+    def test_download_not_allowed(self):
+        """Тест запрета скачивания документа не менеджеру и отсутствующего файла"""
+
+        self.client.force_login(self.operator)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.client.force_login(self.manager)
+        default_storage.delete(self.blob.file.name)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_download_without_blob(self):
+        """Тест отдачи документа, сохраненного до хранения без дубликатов"""
+
+        name = default_storage.save("documents/legacy.pdf", ContentFile(self.content))
+        Contract.objects.filter(pk=self.contract.pk).update(document=name, blob=None)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["ETag"].startswith('"'))
@@ -0,0 +1,110 @@
+import csv
+import io
+import zipfile
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse_lazy
+
+from crm.models import ActiveClient, Contract
+
+
+class TestExportViews(TestCase):
+    """Класс тестов потоковой выгрузки списков"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+        "04-campaigns.json",
+        "05-potential_clients.json",
+        "06-contracts.json",
+        "07-active_clients.json",
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        """Объявление подготовленных юзеров с группами прав"""
+
+        super().setUpClass()
+        cls.admin = User.objects.get(username="admin")
+        cls.manager = User.objects.get(username="manager")
+        cls.operator = User.objects.get(username="operator")
+
+    def test_export_contracts_csv_by_manager(self):
+        """Тест выгрузки контрактов в CSV под аккаунтом менеджера"""
+
+        self.client.force_login(self.manager)
+
+        response = self.client.get(reverse_lazy("crm:contracts_export"))
+        with CaptureQueriesContext(connection) as context:
+            content: str = b"".join(response.streaming_content).decode("utf-8-sig")
+
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="contracts.csv"')
+        self.assertEqual(rows[0][:2], ["ID", "Name"])
+        self.assertEqual(len(rows) - 1, Contract.objects.count())
+        self.assertIn("New contract", [row[1] for row in rows])
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_export_active_clients_xlsx_by_admin(self):
+        """Тест выгрузки активных клиентов в XLSX под аккаунтом администратора"""
+
+        self.client.force_login(self.admin)
+
+        response = self.client.get(reverse_lazy("crm:active_clients_export"), {"format": "xlsx"})
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        sheet: str = archive.read("xl/worksheets/sheet1.xml").decode()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(archive.testzip())
+        self.assertIn("[Content_Types].xml", archive.namelist())
+        self.assertEqual(sheet.count("<row>"), ActiveClient.objects.count() + 1)
+        self.assertIn(ActiveClient.objects.select_related("contract").first().contract.name, sheet)
+
+    def test_export_neutralizes_formulas(self):
+        """Тест экранирования значений, которые табличный редактор выполнил бы как формулу"""
+
+        Contract.objects.filter(pk=1).update(name='=HYPERLINK("http://example.com")')
+        Contract.objects.filter(pk=2).update(name="@SUM(A1)")
+        self.client.force_login(self.manager)
+
+        response = self.client.get(reverse_lazy("crm:contracts_export"))
+        names = [row[1] for row in csv.reader(io.StringIO(b"".join(response.streaming_content).decode("utf-8-sig")))]
+        response = self.client.get(reverse_lazy("crm:contracts_export"), {"format": "xlsx"})
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        sheet: str = archive.read("xl/worksheets/sheet1.xml").decode()
+
+        self.assertIn('\'=HYPERLINK("http://example.com")', names)
+        self.assertIn("'@SUM(A1)", names)
+        self.assertIn(">'@SUM(A1)<", sheet)
+
+    def test_export_unknown_format(self):
+        """Тест выгрузки в неизвестном формате"""
+
+        self.client.force_login(self.manager)
+
+        response = self.client.get(reverse_lazy("crm:contracts_export"), {"format": "pdf"})
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_contracts_by_not_manager(self):
+        """Тест выгрузки контрактов под невалидным аккаунтом"""
+
+        self.client.force_login(self.operator)
+
+        response = self.client.get(reverse_lazy("crm:contracts_export"))
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_active_clients_by_not_superuser(self):
+        """Тест выгрузки активных клиентов под аккаунтом без статуса суперпользователя"""
+
+        self.client.force_login(self.manager)
+
+        response = self.client.get(reverse_lazy("crm:active_clients_export"))
+
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,137 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse_lazy
+
+from crm import fragments
+from crm.conversions import convert_potential_clients
+from crm.models import ActiveClient, Contract, PotentialClient
+
+
+class TestFragments(TestCase):
+    """Класс тестов кэша разметки строк списков"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+        "04-campaigns.json",
+        "05-potential_clients.json",
+        "06-contracts.json",
+        "07-active_clients.json",
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        """Объявление подготовленных юзеров с группами прав"""
+
+        super().setUpClass()
+        cls.admin = User.objects.get(username="admin")
+        cls.manager = User.objects.get(username="manager")
+
+    def setUp(self):
+        """Очистка кэша и счетчиков попаданий"""
+
+        cache.clear()
+        fragments.stats.reset()
+
+    def test_rows_from_cache(self):
+        """Тест чтения строк из кэша при повторном запросе"""
+
+        self.client.force_login(self.manager)
+        url = reverse_lazy("crm:contracts")
+        first = self.client.get(url)
+        second = self.client.get(url)
+        rows = Contract.objects.count()
+
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(fragments.stats.snapshot()["crm:contracts"], {"hits": rows, "misses": rows, "hit_ratio": 0.5})
+
+    def test_changed_object_rendered(self):
+        """Тест новой разметки строки после изменения объекта"""
+
+        self.client.force_login(self.manager)
+        url = reverse_lazy("crm:contracts")
+        self.client.get(url)
+
+        contract = Contract.objects.get(pk=1)
+        contract.name = "Renamed contract"
+        contract.save()
+
+        self.assertContains(self.client.get(url), "Renamed contract")
+        self.assertEqual(fragments.stats.snapshot()["crm:contracts"]["misses"], Contract.objects.count() + 1)
+
+    def test_related_object_invalidation(self):
+        """Тест сброса строк активных клиентов при изменении потенциального клиента"""
+
+        self.client.force_login(self.admin)
+        url = reverse_lazy("crm:active_clients")
+        self.client.get(url)
+
+        potential_client = ActiveClient.objects.select_related("potential_client").first().potential_client
+        potential_client.full_name = "Renamed client"
+        with self.captureOnCommitCallbacks(execute=True):
+            potential_client.save()
+
+        self.assertContains(self.client.get(url), "Renamed client")
+
+    def test_conversion_invalidation(self):
+        """Тест сброса строки потенциального клиента при конвертации и удалении активного клиента"""
+
+        self.client.force_login(self.manager)
+        url = reverse_lazy("crm:potential_clients")
+        convert_url = reverse_lazy("crm:create_active_client", kwargs={"pk": 5})
+        self.assertContains(self.client.get(url), convert_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            convert_potential_clients([(5, 3)])
+        self.assertNotContains(self.client.get(url), convert_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ActiveClient.objects.get(potential_client_id=5).delete()
+        self.assertContains(self.client.get(url), convert_url)
+
+    def test_deleted_object_invalidation(self):
+        """Тест удаления разметки удаленного объекта из кэша"""
+
+        self.client.force_login(self.manager)
+        self.client.get(reverse_lazy("crm:potential_clients"))
+        potential_client = PotentialClient.objects.get(pk=6)
+        key = fragments.object_fragment_key(potential_client)
+        cached = cache.get(key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            potential_client.delete()
+
+        self.assertIsNotNone(cached)
+        self.assertIsNone(cache.get(key))
+
+    def test_invalidation_after_commit(self):
+        """Тест сброса разметки зависимых строк только после фиксации транзакции"""
+
+        self.client.force_login(self.admin)
+        self.client.get(reverse_lazy("crm:active_clients"))
+        active_client = ActiveClient.objects.first()
+        key = fragments.object_fragment_key(active_client)
+        potential_client = active_client.potential_client
+        potential_client.full_name = "Renamed client"
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            potential_client.save()
+            self.assertIsNotNone(cache.get(key))
+
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(key))
+
+    def test_hit_ratio_metrics(self):
+        """Тест доли попаданий в метриках"""
+
+        self.client.force_login(self.manager)
+        self.client.get(reverse_lazy("crm:contracts"))
+        self.client.get(reverse_lazy("crm:contracts"))
+        self.client.force_login(self.admin)
+
+        response = self.client.get(reverse_lazy("crm:metrics"))
+
+        self.assertContains(response, 'crm_fragment_hit_ratio{view="crm:contracts"} 0.5')
@@ -0,0 +1,146 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse_lazy
+
+from crm.jobs import run_next_job
+from crm.models import Job, PotentialClient
+from crm.statistics import get_snapshot
+
+LEADS_CSV = """full_name,phone,email,campaign
+Lead One,70000000001,lead1@example.com,1
+Lead Two,70000000002,LEAD2@example.com,1
+Lead Duplicate,70000000003,lead1@example.com,1
+Lead Existing,70000000004,potentialclient@gmail.com,1
+Lead Invalid,70000000005,not-an-email,1
+Lead Without Campaign,70000000006,lead6@example.com,99
+"""
+
+
+class TestImportLeads(TestCase):
+    """Класс тестов импорта потенциальных клиентов"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+        "04-campaigns.json",
+        "05-potential_clients.json",
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = Path(self.directory.name) / "leads.csv"
+        self.path.write_text(LEADS_CSV, encoding="utf-8")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_import_command(self):
+        """Тест импорта с дедупликацией и отчетом об ошибках"""
+
+        out = StringIO()
+
+        call_command("import_leads", str(self.path), "--chunk-size", "2", stdout=out)
+
+        self.assertIn("создано: 2, дублей: 2, ошибок: 2", out.getvalue())
+        self.assertTrue(PotentialClient.objects.filter(email="lead2@example.com").exists())
+        self.assertEqual(get_snapshot().potential_clients, PotentialClient.objects.count())
+
+        errors = (Path(self.directory.name) / "leads.csv.errors.csv").read_text(encoding="utf-8")
+        self.assertIn("not-an-email", errors)
+        self.assertIn("Рекламная кампания не найдена", errors)
+
+    def test_import_resumes_from_checkpoint(self):
+        """Тест продолжения импорта с контрольной точки"""
+
+        checkpoint = Path(self.directory.name) / "leads.csv.checkpoint"
+        checkpoint.write_text(json.dumps({"line": 3}), encoding="utf-8")
+        out = StringIO()
+
+        call_command("import_leads", str(self.path), stdout=out)
+
+        self.assertIn("пропущено по контрольной точке: 2", out.getvalue())
+        self.assertFalse(PotentialClient.objects.filter(email="lead2@example.com").exists())
+        self.assertEqual(PotentialClient.objects.get(email="lead1@example.com").full_name, "Lead Duplicate")
+        self.assertFalse(checkpoint.exists())
+
+    def test_resumed_import_writes_errors_header_once(self):
+        """Тест единственного заголовка в отчете об ошибках после продолжения импорта"""
+
+        errors_path = Path(self.directory.name) / "leads.csv.errors.csv"
+        errors_path.write_text('line,error,row\r\n2,"""interrupted""","{}"\r\n', encoding="utf-8")
+        checkpoint = Path(self.directory.name) / "leads.csv.checkpoint"
+        checkpoint.write_text(json.dumps({"line": 3}), encoding="utf-8")
+
+        call_command("import_leads", str(self.path), stdout=StringIO())
+
+        lines = errors_path.read_text(encoding="utf-8").splitlines()
+        self.assertEqual(lines.count("line,error,row"), 1)
+        self.assertIn("interrupted", lines[1])
+        self.assertIn("not-an-email", "\n".join(lines[2:]))
+
+    def test_duplicate_email_in_other_case(self):
+        """Тест распознавания дубля, сохраненного вручную с email в другом регистре"""
+
+        PotentialClient.objects.create(
+            full_name="Manual Lead", phone="70000000020", email="Lead1@Example.com", campaign_id=1
+        )
+        out = StringIO()
+
+        call_command("import_leads", str(self.path), stdout=out)
+
+        self.assertIn("создано: 1, дублей: 3", out.getvalue())
+        self.assertFalse(PotentialClient.objects.filter(email="lead1@example.com").exists())
+
+    def test_import_jsonl(self):
+        """Тест импорта JSONL с кампанией по умолчанию"""
+
+        path = Path(self.directory.name) / "leads.jsonl"
+        path.write_text(
+            '{"full_name": "Json Lead", "phone": "70000000010", "email": "json@example.com"}\nnot json\n',
+            encoding="utf-8",
+        )
+        out = StringIO()
+
+        call_command("import_leads", str(path), "--campaign", "1", stdout=out)
+
+        self.assertIn("создано: 1, дублей: 0, ошибок: 1", out.getvalue())
+        self.assertEqual(PotentialClient.objects.get(email="json@example.com").campaign_id, 1)
+
+    def test_import_view_by_operator(self):
+        """Тест загрузки файла под аккаунтом оператора"""
+
+        self.client.force_login(User.objects.get(username="operator"))
+        upload = SimpleUploadedFile("leads.csv", LEADS_CSV.encode(), content_type="text/csv")
+
+        with override_settings(MEDIA_ROOT=self.directory.name):
+            response = self.client.post(reverse_lazy("crm:import_potential_clients"), {"file": upload})
+            job = Job.objects.get()
+            self.assertRedirects(response, reverse_lazy("crm:job_details", kwargs={"pk": job.pk}))
+            self.assertFalse(PotentialClient.objects.filter(email="lead1@example.com").exists())
+
+            job = run_next_job("test")
+
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
+        self.assertEqual(job.result["created"], 2)
+        response = self.client.get(reverse_lazy("crm:job_details", kwargs={"pk": job.pk}))
+        self.assertContains(response, "Created: 2")
+        self.assertContains(response, "not-an-email")
+
+    def test_import_view_by_not_operator(self):
+        """Тест загрузки файла под невалидным аккаунтом"""
+
+        self.client.force_login(User.objects.get(username="marketer"))
+        upload = SimpleUploadedFile("leads.csv", LEADS_CSV.encode(), content_type="text/csv")
+
+        response = self.client.post(reverse_lazy("crm:import_potential_clients"), {"file": upload})
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(PotentialClient.objects.filter(email="lead1@example.com").exists())
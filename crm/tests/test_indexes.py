@@ -0,0 +1,90 @@
+from typing import Optional
+
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.db.models.functions import Lower
+from django.test import RequestFactory, TestCase
+
+from crm.models import Campaign, PotentialClient, Contract
+from crm.views import ContractListView, PotentialClientListView, ServiceListView
+
+
+class TestQueryPlans(TestCase):
+    """Класс тестов использования индексов горячими запросами"""
+
+    fixtures = [
+        "03-services.json",
+        "04-campaigns.json",
+        "05-potential_clients.json",
+        "06-contracts.json",
+    ]
+
+    def explain(self, queryset: QuerySet) -> str:
+        """План запроса. На PostgreSQL последовательное сканирование отключается,
+        чтобы на маленьких таблицах планировщик выбирал индекс, если он подходит."""
+
+        if connection.vendor == "postgresql":
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+                return queryset.explain()
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset: QuerySet, index_name: Optional[str] = None):
+        plan: str = self.explain(queryset)
+
+        if connection.vendor == "postgresql":
+            self.assertNotIn("Seq Scan", plan)
+            self.assertIn("Index", plan)
+        elif connection.vendor == "sqlite":
+            for line in plan.splitlines():
+                if " SCAN " in f" {line} ":
+                    self.assertIn("USING", line, plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+        else:
+            self.skipTest(f"Проверка плана не поддерживается для {connection.vendor}")
+
+        if index_name:
+            self.assertIn(index_name, plan)
+
+    def test_potential_client_by_email(self):
+        """Тест поиска потенциального клиента по email"""
+
+        queryset = PotentialClient.objects.annotate(email_lower=Lower("email"))
+        self.assertUsesIndex(queryset.filter(email_lower="potentialclient@gmail.com"), "crm_pc_email_lower_idx")
+
+    def test_potential_client_by_phone(self):
+        """Тест поиска потенциального клиента по телефону"""
+
+        self.assertUsesIndex(PotentialClient.objects.filter(phone="89999999999"), "crm_pc_phone_idx")
+
+    def test_contracts_by_conclusion_date(self):
+        """Тест выборки контрактов за период"""
+
+        self.assertUsesIndex(
+            Contract.objects.filter(conclusion_date__range=("2024-04-01", "2024-04-30")), "crm_contract_date_idx"
+        )
+
+    def test_campaigns_by_promotion_channel(self):
+        """Тест выборки кампаний по каналу продвижения"""
+
+        self.assertUsesIndex(
+            Campaign.objects.filter(promotion_channel="New promotion channel"), "crm_campaign_channel_idx"
+        )
+
+    def test_keyset_list_pages(self):
+        """Тест выборки страницы списка по курсору запросом самого представления"""
+
+        views = {
+            "crm_pc_list_idx": PotentialClientListView,
+            "crm_contract_list_idx": ContractListView,
+            None: ServiceListView,
+        }
+        for index_name, view_class in views.items():
+            with self.subTest(view=view_class.__name__):
+                view = view_class()
+                view.setup(RequestFactory().get("/"))
+                queryset = view.get_queryset().filter(pk__gt=1).order_by("pk")[:50]
+                # Индексы с INCLUDE создаются только там, где они поддерживаются
+                covering = index_name if connection.features.supports_covering_indexes else None
+                self.assertUsesIndex(queryset, covering)
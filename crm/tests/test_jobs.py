@@ -0,0 +1,202 @@
+from concurrent.futures import Executor, Future
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse_lazy
+from django.utils import timezone
+
+from crm.jobs import (
+    JOB_HANDLERS,
+    Worker,
+    claim_job,
+    enqueue,
+    job_handler,
+    requeue_stale_jobs,
+    run_job,
+    run_next_job,
+)
+from crm.models import Job
+
+
+@job_handler("test_progress")
+def progress_job(job, progress):
+    """Задача с отчетом о прогрессе"""
+
+    progress(50, "Половина", force=True)
+    return {"value": job.payload["value"] * 2}
+
+
+@job_handler("test_failing")
+def failing_job(job, progress):
+    """Задача, завершающаяся ошибкой"""
+
+    raise RuntimeError("boom")
+
+
+class InlineExecutor(Executor):
+    """Пул, выполняющий задачи сразу в вызывающем потоке"""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+class TestJobs(TestCase):
+    """Класс тестов очереди фоновых задач"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        """Объявление подготовленных юзеров"""
+
+        super().setUpClass()
+        cls.operator = User.objects.get(username="operator")
+        cls.manager = User.objects.get(username="manager")
+
+    def test_run_job(self):
+        """Тест выполнения задачи с результатом и прогрессом"""
+
+        job = enqueue("test_progress", {"value": 21}, user=self.operator)
+
+        job = run_next_job("test")
+
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
+        self.assertEqual(job.result, {"value": 42})
+        self.assertEqual((job.progress, job.message, job.attempts), (100, "Половина", 1))
+        self.assertIsNone(run_next_job("test"))
+
+    @override_settings(JOB_RETRY_DELAY=10)
+    def test_retry_and_fail(self):
+        """Тест повтора упавшей задачи с задержкой и отметки об ошибке после последней попытки"""
+
+        job = enqueue("test_failing", max_attempts=2)
+
+        job = run_next_job("test")
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertIn("RuntimeError: boom", job.error)
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=5))
+        self.assertIsNone(claim_job("test"))
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        job = run_next_job("test")
+        self.assertEqual((job.status, job.attempts), (Job.Status.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_claim_order_and_stale_jobs(self):
+        """Тест захвата по приоритету, защиты от двойного захвата и возврата зависших задач"""
+
+        low = enqueue("test_progress", {"value": 1})
+        high = enqueue("test_progress", {"value": 2}, priority=10)
+
+        self.assertEqual(claim_job("first"), high)
+        self.assertEqual(claim_job("second"), low)
+        self.assertIsNone(claim_job("third"))
+
+        Job.objects.filter(pk=high.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(claim_job("third"), high)
+
+    def test_stale_job_out_of_attempts(self):
+        """Тест отметки об ошибке зависшей задачи, исчерпавшей попытки"""
+
+        job = enqueue("test_progress", {"value": 1}, max_attempts=1)
+        claim_job("first")
+
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(claim_job("second"))
+
+    def test_late_result_of_requeued_job(self):
+        """Тест игнорирования результата захвата, после которого задача была возвращена в очередь"""
+
+        enqueue("test_progress", {"value": 1})
+        first = claim_job("first")
+        Job.objects.filter(pk=first.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        requeue_stale_jobs()
+        second = claim_job("second")
+
+        job = run_job(first)
+
+        self.assertEqual((job.status, job.worker, job.attempts), (Job.Status.RUNNING, "second", 2))
+        self.assertEqual(run_job(second).status, Job.Status.SUCCEEDED)
+
+    def test_worker_stops_after_crashed_job(self):
+        """Тест остановки воркера, когда задача из пула завершилась исключением"""
+
+        enqueue("test_progress", {"value": 1})
+        out = StringIO()
+        worker = Worker(concurrency=1, log=out.write)
+
+        class CrashingExecutor(InlineExecutor):
+            def submit(self, fn, /, *args, **kwargs):
+                worker.stop()
+                future = Future()
+                future.set_exception(RuntimeError("pool crashed"))
+                return future
+
+        with mock.patch.object(Worker, "create_executor", return_value=CrashingExecutor()):
+            self.assertEqual(worker.run(), 1)
+        self.assertIn("pool crashed", out.getvalue())
+
+    def test_enqueue_unknown_kind(self):
+        """Тест постановки задачи неизвестного типа"""
+
+        self.assertNotIn("unknown", JOB_HANDLERS)
+        with self.assertRaises(ValueError):
+            enqueue("unknown")
+
+    def test_worker_command(self):
+        """Тест воркера, завершающегося после опустошения очереди"""
+
+        jobs = [enqueue("test_progress", {"value": value}) for value in range(3)]
+        out = StringIO()
+
+        # Задачи выполняются в текущем потоке: соединения других потоков не видят транзакцию теста
+        with mock.patch.object(Worker, "create_executor", return_value=InlineExecutor()):
+            call_command("run_crm_worker", "--burst", "--concurrency", "2", stdout=out)
+
+        self.assertIn("выполнено задач: 3", out.getvalue())
+        self.assertEqual(
+            [job.result["value"] for job in Job.objects.filter(pk__in=[job.pk for job in jobs]).order_by("pk")],
+            [0, 2, 4],
+        )
+
+    def test_rebuild_statistics_in_background(self):
+        """Тест постановки пересчета статистики в очередь"""
+
+        out = StringIO()
+        call_command("rebuild_statistics", "--background", stdout=out)
+
+        job = Job.objects.get()
+        self.assertEqual(job.kind, "rebuild_statistics")
+        self.assertEqual(run_next_job("test").status, Job.Status.SUCCEEDED)
+
+    def test_job_view_permissions(self):
+        """Тест доступа к статусу задачи автору и суперпользователю"""
+
+        job = enqueue("test_progress", {"value": 1}, user=self.operator)
+        url = reverse_lazy("crm:job_details", kwargs={"pk": job.pk})
+
+        self.client.force_login(self.operator)
+        response = self.client.get(url)
+        self.assertContains(response, "Status: в очереди")
+        self.assertContains(response, 'http-equiv="refresh"')
+
+        self.client.force_login(self.manager)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.client.force_login(User.objects.create_superuser("root", "root@example.com", "root"))
+        self.assertEqual(self.client.get(url).status_code, 200)
@@ -1,8 +1,11 @@
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse_lazy
 
 from crm.models import PotentialClient
+from crm.pagination import encode_cursor
 
 
 class TestListViews(TestCase):
@@ -134,3 +137,50 @@ class TestListViews(TestCase):
         with self.assertRaises(AssertionError):
             self.assertEqual(response.status_code, 200)
             self.assertContains(response, potential_client_pk)
+
+    @override_settings(PAGINATE_BY=2)
+    def test_list_potential_client_keyset_pages(self):
+        """Тест постраничного вывода потенциальных клиентов по курсорам"""
+
+        self.client.force_login(self.manager)
+
+        response = self.client.get(reverse_lazy("crm:potential_clients"))
+        page = response.context["page_obj"]
+
+        self.assertEqual([client.pk for client in page], [1, 3])
+        self.assertFalse(page.has_previous())
+        self.assertEqual(page.next_cursor, encode_cursor(3))
+
+        response = self.client.get(reverse_lazy("crm:potential_clients"), {"after": page.next_cursor})
+        page = response.context["page_obj"]
+
+        self.assertEqual([client.pk for client in page], [4, 5])
+        self.assertContains(response, f"?before={encode_cursor(4)}")
+        self.assertContains(response, f"?after={encode_cursor(5)}")
+
+        response = self.client.get(reverse_lazy("crm:potential_clients"), {"before": page.previous_cursor})
+
+        self.assertEqual([client.pk for client in response.context["page_obj"]], [1, 3])
+
+    @override_settings(PAGINATE_BY=2)
+    def test_list_potential_client_without_offset_and_count(self):
+        """Тест отсутствия OFFSET и COUNT в запросах страницы"""
+
+        self.client.force_login(self.manager)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse_lazy("crm:potential_clients"), {"after": encode_cursor(3)})
+
+        self.assertEqual(response.status_code, 200)
+        for query in queries.captured_queries:
+            self.assertNotIn("OFFSET", query["sql"].upper())
+            self.assertNotIn("COUNT(", query["sql"].upper())
+
+    def test_list_potential_client_invalid_cursor(self):
+        """Тест обработки некорректного курсора"""
+
+        self.client.force_login(self.manager)
+
+        response = self.client.get(reverse_lazy("crm:potential_clients"), {"after": "not a cursor"})
+
+        self.assertEqual(response.status_code, 404)
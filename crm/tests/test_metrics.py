@@ -0,0 +1,97 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse_lazy
+
+from crm.metrics import registry
+
+
+@override_settings(METRICS_SAMPLE_RATE=1.0)
+class TestRequestMetrics(TestCase):
+    """Класс тестов метрик запросов"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+        "04-campaigns.json",
+        "05-potential_clients.json",
+        "06-contracts.json",
+        "07-active_clients.json",
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        """Объявление подготовленных юзеров с группами прав"""
+
+        super().setUpClass()
+        cls.admin = User.objects.get(username="admin")
+        cls.manager = User.objects.get(username="manager")
+
+    def setUp(self):
+        registry.reset()
+
+    def test_sampled_request(self):
+        """Тест замера запросов, рендеринга и размера ответа"""
+
+        self.client.force_login(self.manager)
+
+        response = self.client.get(reverse_lazy("crm:contracts"))
+        totals, samples = registry.snapshot()
+
+        self.assertEqual(totals["crm:contracts"]["requests"], 1)
+        self.assertEqual(len(samples), 1)
+        self.assertEqual(samples[0].view, "crm:contracts")
+        self.assertGreater(samples[0].queries, 0)
+        self.assertGreater(samples[0].render_time, 0)
+        self.assertGreaterEqual(samples[0].query_time, samples[0].slowest_query)
+        self.assertEqual(samples[0].response_bytes, len(response.content))
+
+    def test_streaming_request(self):
+        """Тест замера потокового ответа после его отправки"""
+
+        self.client.force_login(self.manager)
+
+        response = self.client.get(reverse_lazy("crm:contracts_export"))
+        self.assertEqual(registry.snapshot()[1], [])
+        content = b"".join(response.streaming_content)
+        sample = registry.snapshot()[1][0]
+
+        self.assertEqual(sample.response_bytes, len(content))
+        self.assertGreater(sample.queries, 0)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_not_sampled_request(self):
+        """Тест подсчета запроса без подробного замера"""
+
+        self.client.force_login(self.manager)
+
+        self.client.get(reverse_lazy("crm:contracts"))
+        totals, samples = registry.snapshot()
+
+        self.assertEqual(totals["crm:contracts"]["requests"], 1)
+        self.assertEqual(totals["crm:contracts"]["sampled"], 0)
+        self.assertEqual(samples, [])
+
+    def test_metrics_by_superuser(self):
+        """Тест получения метрик в формате Prometheus под аккаунтом суперпользователя"""
+
+        self.client.force_login(self.manager)
+        self.client.get(reverse_lazy("crm:contracts"))
+        self.client.force_login(self.admin)
+
+        response = self.client.get(reverse_lazy("crm:metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertContains(response, "# TYPE crm_requests_total counter")
+        self.assertContains(response, 'crm_requests_total{view="crm:contracts"} 1')
+        self.assertContains(response, 'crm_request_duration_seconds{view="crm:contracts",quantile="0.95"}')
+
+    def test_metrics_by_not_superuser(self):
+        """Тест получения метрик под аккаунтом без статуса суперпользователя"""
+
+        self.client.force_login(self.manager)
+
+        response = self.client.get(reverse_lazy("crm:metrics"))
+
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,130 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse_lazy
+
+from crm.permissions import GLOBAL_VERSION_KEY, group_membership
+
+
+class TestGroupMembershipCache(TestCase):
+    """Класс тестов кэша членства пользователей в группах"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+    ]
+
+    def setUp(self):
+        group_membership.invalidate_all()
+        self.operator = User.objects.get(username="operator")
+
+    def test_groups_are_cached(self):
+        """Тест повторного получения групп без запроса к БД"""
+
+        with self.assertNumQueries(1):
+            groups = group_membership.get_groups(self.operator)
+        with self.assertNumQueries(0):
+            self.assertEqual(group_membership.get_groups(self.operator), groups)
+
+        stats = group_membership.stats()
+        self.assertGreaterEqual(stats["hits"], 1)
+        self.assertGreaterEqual(stats["misses"], 1)
+
+    def test_invalidation_on_groups_change(self):
+        """Тест сброса кэша при добавлении пользователя в группу"""
+
+        manager_group = Group.objects.get(name="Manager")
+        self.assertNotIn("Manager", group_membership.get_groups(self.operator))
+
+        self.operator.groups.add(manager_group)
+
+        self.assertIn("Manager", group_membership.get_groups(self.operator))
+
+    def test_invalidation_on_group_rename(self):
+        """Тест сброса кэша при переименовании группы"""
+
+        group = Group.objects.get(name="Operator")
+        self.assertIn("Operator", group_membership.get_groups(self.operator))
+
+        group.name = "Renamed"
+        group.save()
+
+        self.assertIn("Renamed", group_membership.get_groups(self.operator))
+
+    @override_settings(
+        GROUP_CACHE_ALIAS="default",
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "groups"}},
+    )
+    def test_shared_tier(self):
+        """Тест получения групп из общего кэша после сброса локального"""
+
+        groups = group_membership.get_groups(self.operator)
+        group_membership._local.clear()  # pylint: disable=protected-access
+
+        with self.assertNumQueries(0):
+            self.assertEqual(group_membership.get_groups(self.operator), groups)
+
+        self.operator.groups.clear()
+
+        self.assertEqual(group_membership.get_groups(self.operator), frozenset())
+
+    def test_local_tier_expires(self):
+        """Тест повторного чтения групп из БД после истечения локального значения"""
+
+        group_membership.get_groups(self.operator)
+        expired = time.monotonic() + settings.GROUP_CACHE_LOCAL_TIMEOUT + 1
+
+        with mock.patch("crm.permissions.time.monotonic", return_value=expired), self.assertNumQueries(1):
+            group_membership.get_groups(self.operator)
+
+    @override_settings(
+        GROUP_CACHE_ALIAS="default",
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "groups"}},
+    )
+    def test_evicted_version_not_reused(self):
+        """Тест нового штампа после вытеснения версий из общего кэша"""
+
+        group_membership.get_groups(self.operator)
+        stamp = group_membership._stamp(self.operator.pk)  # pylint: disable=protected-access
+        cache.delete_many([GLOBAL_VERSION_KEY, group_membership._user_version_key(self.operator.pk)])
+
+        self.assertNotEqual(group_membership._stamp(self.operator.pk), stamp)  # pylint: disable=protected-access
+        self.assertNotIn(0, stamp)
+
+    @override_settings(GROUP_CACHE_ALIAS=None, GROUP_CACHE_SIZE=2)
+    def test_user_versions_are_bounded(self):
+        """Тест ограничения локальных версий пользователей и сброса значений вытесненного пользователя"""
+
+        group_membership.get_groups(self.operator)
+        group_membership.invalidate_user(self.operator.pk)
+        groups = group_membership.get_groups(self.operator)
+        for user_id in (-1, -2):
+            group_membership.invalidate_user(user_id)
+
+        self.assertEqual(len(group_membership._user_versions), 2)  # pylint: disable=protected-access
+        self.assertNotIn(self.operator.pk, group_membership._user_versions)  # pylint: disable=protected-access
+        with self.assertNumQueries(1):
+            self.assertEqual(group_membership.get_groups(self.operator), groups)
+
+    def test_view_access_after_group_removal(self):
+        """Тест запрета доступа после исключения пользователя из группы"""
+
+        self.client.force_login(self.operator)
+        self.assertEqual(self.client.get(reverse_lazy("crm:create_potential_client")).status_code, 200)
+
+        self.operator.groups.clear()
+
+        self.assertEqual(self.client.get(reverse_lazy("crm:create_potential_client")).status_code, 403)
+
+    async def test_async_groups(self):
+        """Тест асинхронного получения групп с тем же кэшем"""
+
+        groups = await group_membership.aget_groups(self.operator)
+
+        self.assertIn("Operator", groups)
+        self.assertEqual(group_membership.get_groups(self.operator), groups)
+        self.assertEqual(await group_membership.aget_groups(self.operator), groups)
@@ -0,0 +1,108 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse_lazy
+from django.views.generic import DetailView, ListView
+
+from crm import urls
+from crm.models import Service, Campaign, PotentialClient, Contract, ActiveClient
+from crm.queryplans import QueryPlanMixin
+from crm.tests.helpers import QueryCountAssertionsMixin
+
+
+class TestQueryPlans(QueryCountAssertionsMixin, TestCase):
+    """Класс тестов планов запросов представлений списков и деталей"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+        "04-campaigns.json",
+        "05-potential_clients.json",
+        "06-contracts.json",
+        "07-active_clients.json",
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        """Объявление подготовленных юзеров с группами прав"""
+
+        super().setUpClass()
+        cls.admin = User.objects.get(username="admin")
+        cls.marketer = User.objects.get(username="marketer")
+        cls.manager = User.objects.get(username="manager")
+
+    def add_services(self, rows: int) -> None:
+        Service.objects.bulk_create(
+            [Service(name=f"Service {i}", description="", cost=Decimal(i)) for i in range(rows)]
+        )
+
+    def add_campaigns(self, rows: int) -> None:
+        service = Service.objects.first()
+        for i in range(rows):
+            Campaign.objects.create(name=f"Campaign {i}", service=service, promotion_channel="Web", budget=1)
+
+    def add_contracts(self, rows: int) -> None:
+        service = Service.objects.first()
+        for i in range(rows):
+            Contract.objects.create(
+                name=f"Contract {i}",
+                service=service,
+                document="documents/contract.pdf",
+                conclusion_date=date(2024, 5, 1),
+                validity_period=12,
+                amount=Decimal(100),
+            )
+
+    def add_active_clients(self, rows: int) -> None:
+        campaign = Campaign.objects.first()
+        self.add_contracts(rows)
+        contracts = Contract.objects.filter(activeclient__isnull=True).order_by("-pk")[:rows]
+        for i, contract in enumerate(contracts):
+            potential_client = PotentialClient.objects.create(
+                full_name=f"Client {i}", phone=f"7999000000{i}", email=f"client{i}@example.com", campaign=campaign
+            )
+            ActiveClient.objects.create(potential_client=potential_client, contract=contract)
+
+    def test_list_and_detail_views_declare_query_plan(self):
+        """Тест наличия плана запроса у представлений списков и деталей"""
+
+        for pattern in urls.urlpatterns:
+            view_class = getattr(pattern.callback, "view_class", None)
+            if view_class is not None and issubclass(view_class, (ListView, DetailView)):
+                self.assertTrue(issubclass(view_class, QueryPlanMixin), view_class.__name__)
+
+    def test_list_views_constant_queries(self):
+        """Тест независимости числа запросов списков от количества строк"""
+
+        cases = (
+            ("crm:services", self.marketer, self.add_services),
+            ("crm:campaigns", self.marketer, self.add_campaigns),
+            ("crm:potential_clients", self.manager, self.add_active_clients),
+            ("crm:contracts", self.manager, self.add_contracts),
+            ("crm:active_clients", self.admin, self.add_active_clients),
+        )
+        for url_name, user, add_rows in cases:
+            with self.subTest(url_name):
+                self.client.force_login(user)
+                self.assertConstantQueries(lambda: self.client.get(reverse_lazy(url_name)), add_rows)
+
+    def test_detail_views_single_query(self):
+        """Тест загрузки объекта деталей со связями одним запросом"""
+
+        active_client = ActiveClient.objects.first()
+        cases = (
+            ("crm:campaign_details", self.marketer, Campaign.objects.first().pk),
+            ("crm:potential_client_details", User.objects.get(username="operator"), active_client.potential_client_id),
+            ("crm:contract_details", self.manager, active_client.contract_id),
+            ("crm:active_client_details", self.admin, active_client.pk),
+        )
+        for url_name, user, pk in cases:
+            with self.subTest(url_name):
+                self.client.force_login(user)
+                url = reverse_lazy(url_name, kwargs={"pk": pk})
+                self.client.get(url)
+
+                self.assertEqual(len(self.capture_crm_queries(lambda: self.client.get(url))), 1)
@@ -0,0 +1,107 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse_lazy
+
+from crm.models import Service
+from crm.routers import PrimaryPinningMiddleware, PrimaryReplicaRouter, use_primary, wrote_primary
+from crm.signals import read_primary_during_migrate, read_replicas_after_migrate
+
+
+@override_settings(REPLICA_DATABASES=["replica_1", "replica_2"], PRIMARY_COOKIE_NAME="crm_primary")
+class TestPrimaryReplicaRouter(SimpleTestCase):
+    """Класс тестов маршрутизации чтения на реплики"""
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        for variable in (use_primary, wrote_primary):
+            self.addCleanup(variable.reset, variable.set(False))
+
+    def read_alias(self, request):
+        """Псевдоним БД, с которой представление прочитало бы услуги"""
+
+        aliases = []
+
+        def view(request):
+            aliases.append(self.router.db_for_read(Service))
+            if request.method == "POST":
+                self.router.db_for_write(Service)
+            return HttpResponse()
+
+        response = PrimaryPinningMiddleware(view)(request)
+        return aliases[0], response
+
+    def test_routing(self):
+        """Тест чтения моделей crm с реплик и записи в основную БД"""
+
+        self.assertIn(self.router.db_for_read(Service), ("replica_1", "replica_2"))
+        self.assertEqual(self.router.db_for_read(User), "default")
+        self.assertFalse(self.router.allow_migrate("replica_1", "crm"))
+        self.assertTrue(self.router.allow_migrate("default", "crm"))
+
+        self.assertEqual(self.router.db_for_write(Service), "default")
+        self.assertEqual(self.router.db_for_read(Service), "default")
+
+    def test_migrations_read_primary(self):
+        """Тест чтения с основной БД во время миграций"""
+
+        read_primary_during_migrate(sender=None)
+        self.assertEqual(self.router.db_for_read(Service), "default")
+
+        read_replicas_after_migrate(sender=None)
+        self.assertIn(self.router.db_for_read(Service), ("replica_1", "replica_2"))
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas(self):
+        """Тест чтения с основной БД без настроенных реплик"""
+
+        self.assertEqual(self.router.db_for_read(Service), "default")
+
+    def test_sticky_primary_after_write(self):
+        """Тест закрепления чтения за основной БД после записи"""
+
+        alias, response = self.read_alias(self.factory.post("/services/create/"))
+        self.assertEqual(alias, "default")
+        self.assertEqual(response.cookies["crm_primary"]["max-age"], 5)
+        self.assertFalse(use_primary.get())
+
+        request = self.factory.get("/services/")
+        request.COOKIES["crm_primary"] = "1"
+        alias, response = self.read_alias(request)
+        self.assertEqual(alias, "default")
+        self.assertNotIn("crm_primary", response.cookies)
+
+        alias, _ = self.read_alias(self.factory.get("/services/"))
+        self.assertIn(alias, ("replica_1", "replica_2"))
+
+
+@skipUnless(settings.REPLICA_DATABASES, "реплики не настроены (DB_REPLICA_HOSTS)")
+class TestReplicaViews(TestCase):
+    """Класс тестов чтения представлений с реплик, в тестах реплики зеркалируют default"""
+
+    databases = "__all__"
+    fixtures = ["01-groups.json", "02-users.json", "03-services.json"]
+
+    def test_read_your_writes(self):
+        """Тест чтения списка с реплики и с основной БД сразу после записи"""
+
+        self.client.force_login(User.objects.get(username="marketer"))
+        replica = settings.REPLICA_DATABASES[0]
+
+        with override_settings(REPLICA_DATABASES=[replica]), CaptureQueriesContext(connections[replica]) as queries:
+            self.client.get(reverse_lazy("crm:services"))
+        self.assertTrue(any("crm_service" in query["sql"] for query in queries))
+
+        response = self.client.post(
+            reverse_lazy("crm:create_service"), {"name": "Replica", "description": "Replica", "cost": "10.00"}
+        )
+        self.assertIn(settings.PRIMARY_COOKIE_NAME, response.cookies)
+        with override_settings(REPLICA_DATABASES=[replica]), CaptureQueriesContext(connections[replica]) as queries:
+            self.client.get(reverse_lazy("crm:services"))
+        self.assertFalse(any("crm_service" in query["sql"] for query in queries))
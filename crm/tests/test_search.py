@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse_lazy
+
+from crm.models import PotentialClient
+from crm.search import rebuild_index, search
+
+
+class TestSearch(TestCase):
+    """Класс тестов поиска потенциальных клиентов и контрактов"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+        "04-campaigns.json",
+        "05-potential_clients.json",
+        "06-contracts.json",
+    ]
+
+    def test_prefix_search(self):
+        """Тест поиска по началу имени"""
+
+        results = search("Upda", ["potential_client"])
+
+        self.assertEqual(results[0].pk, 7)
+
+    def test_typo_tolerant_search(self):
+        """Тест поиска с опечаткой"""
+
+        results = search("Updtaed potential", ["potential_client"])
+
+        self.assertEqual(results[0].title, "Updated potential client")
+
+    def test_search_by_email(self):
+        """Тест поиска по email"""
+
+        results = search("potentialclient@gmail", ["potential_client"])
+
+        self.assertIn(1, [result.pk for result in results])
+
+    def test_index_follows_changes(self):
+        """Тест синхронизации поискового индекса с изменениями модели"""
+
+        potential_client = PotentialClient.objects.get(pk=5)
+        potential_client.full_name = "Zebrafish"
+        potential_client.save()
+
+        self.assertEqual(search("Zebrafish", ["potential_client"])[0].pk, 5)
+
+        potential_client.delete()
+
+        self.assertEqual(search("Zebrafish", ["potential_client"]), [])
+
+    def test_rebuild_after_bulk_insert(self):
+        """Тест перестроения таблицы FTS5 после вставки без сигналов"""
+
+        PotentialClient.objects.bulk_create(
+            [PotentialClient(full_name="Bulk Zebrafish", phone="1", email="bulk@example.com", campaign_id=1)]
+        )
+        self.assertEqual(search("Zebrafish", ["potential_client"]), [])
+
+        rebuild_index()
+
+        self.assertEqual(len(search("Zebrafish", ["potential_client"])), 1)
+        self.assertEqual(len(search("Upda", ["potential_client"])), 1)
+
+    def test_rebuild_skipped_on_postgresql(self):
+        """Тест отказа от перестроения триграммных индексов PostgreSQL"""
+
+        with mock.patch("crm.search.connection") as connection:
+            connection.vendor = "postgresql"
+            rebuild_index()
+
+        connection.cursor.assert_not_called()
+
+    def test_search_view_by_manager(self):
+        """Тест поиска контрактов под аккаунтом менеджера"""
+
+        self.client.force_login(User.objects.get(username="manager"))
+
+        response = self.client.get(reverse_lazy("crm:search"), {"q": "Same"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Same contract")
+        self.assertContains(response, "Same potential client")
+
+    def test_search_view_by_operator(self):
+        """Тест отсутствия контрактов в результатах поиска оператора"""
+
+        self.client.force_login(User.objects.get(username="operator"))
+
+        response = self.client.get(reverse_lazy("crm:search"), {"q": "Same"})
+
+        self.assertContains(response, "Same potential client")
+        self.assertNotContains(response, "Same contract")
+
+    def test_search_view_by_marketer(self):
+        """Тест поиска под невалидным аккаунтом"""
+
+        self.client.force_login(User.objects.get(username="marketer"))
+
+        response = self.client.get(reverse_lazy("crm:search"), {"q": "Same"})
+
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,258 @@
+import time
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse_lazy
+
+from crm.caching import detached_request
+from crm.models import Campaign, PotentialClient, Contract, ActiveClient, StatisticsSnapshot, StatisticsBucket
+from crm.statistics import compute_statistics, get_snapshot, rebuild_buckets, rebuild_snapshot
+
+
+class TestStatisticsSnapshot(TestCase):
+    """Класс тестов снимка статистики"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+        "04-campaigns.json",
+        "05-potential_clients.json",
+        "06-contracts.json",
+        "07-active_clients.json",
+    ]
+
+    def setUp(self):
+        cache.clear()
+
+    def assertSnapshotActual(self):
+        snapshot = get_snapshot()
+        for field_name, value in compute_statistics().items():
+            with self.subTest(field_name=field_name):
+                self.assertEqual(getattr(snapshot, field_name), value)
+
+    def test_snapshot_after_fixtures(self):
+        """Тест соответствия снимка загруженным данным"""
+
+        self.assertSnapshotActual()
+
+    def test_snapshot_after_changes(self):
+        """Тест инкрементального обновления снимка при изменении моделей"""
+
+        campaign = Campaign.objects.get(pk=1)
+        PotentialClient.objects.create(full_name="Client", phone="1", email="client@example.com", campaign=campaign)
+        campaign.budget = 1000
+        campaign.save()
+        contract = Contract.objects.get(pk=1)
+        contract.amount = "123.45"
+        contract.save()
+        Contract.objects.get(pk=2).delete()
+
+        self.assertSnapshotActual()
+
+    def test_rebuild_keeps_concurrent_delta(self):
+        """Тест пересчета, перед блокировкой которого другая транзакция применила дельту"""
+
+        select_for_update = QuerySet.select_for_update
+        concurrent = []
+
+        def lock_after_concurrent_write(queryset, *args, **kwargs):
+            if queryset.model is StatisticsSnapshot and not concurrent:
+                concurrent.append(
+                    PotentialClient.objects.create(
+                        full_name="Concurrent", phone="1", email="concurrent@example.com", campaign_id=1
+                    )
+                )
+            return select_for_update(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, "select_for_update", lock_after_concurrent_write):
+            drift = rebuild_snapshot()
+
+        self.assertEqual(drift, {})
+        self.assertEqual(get_snapshot().potential_clients, PotentialClient.objects.count())
+        self.assertSnapshotActual()
+
+    def test_rebuild_command_reports_drift(self):
+        """Тест пересчета снимка командой с выводом расхождений"""
+
+        StatisticsSnapshot.objects.update(potential_clients=0)
+        out = StringIO()
+
+        call_command("rebuild_statistics", stdout=out)
+
+        self.assertIn("potential_clients: 0 -> 6", out.getvalue())
+        self.assertSnapshotActual()
+
+    def test_statistics_view_reads_snapshot(self):
+        """Тест получения статистики одним запросом к снимку"""
+
+        self.client.force_login(User.objects.get(username="manager"))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse_lazy("crm:statistics"))
+
+        crm_queries = [query["sql"] for query in queries.captured_queries if '"crm_' in query["sql"]]
+        self.assertEqual(len(crm_queries), 1)
+        self.assertIn("crm_statisticssnapshot", crm_queries[0])
+        self.assertContains(response, "Total clients attracted: 6")
+
+
+class TestStaleWhileRevalidate(TestCase):
+    """Класс тестов кэширования страницы статистики"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+        "04-campaigns.json",
+        "05-potential_clients.json",
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.get(username="manager")
+        self.operator = User.objects.get(username="operator")
+
+    def test_fresh_response_from_cache(self):
+        """Тест получения свежего ответа без обращения к снимку"""
+
+        self.client.force_login(self.manager)
+        self.client.get(reverse_lazy("crm:statistics"))
+        PotentialClient.objects.filter(pk=1).delete()
+
+        with mock.patch("crm.caching.start_background_refresh") as refresh:
+            response = self.client.get(reverse_lazy("crm:statistics"))
+
+        refresh.assert_not_called()
+        self.assertContains(response, "Total clients attracted: 6")
+
+    def test_stale_response_refreshed_once(self):
+        """Тест отдачи устаревшего ответа с единственным фоновым обновлением"""
+
+        self.client.force_login(self.manager)
+        self.client.get(reverse_lazy("crm:statistics"))
+        PotentialClient.objects.filter(pk=1).delete()
+
+        with mock.patch("crm.caching.time.time", return_value=time.time() + 60 * 60):
+            with mock.patch("crm.caching.start_background_refresh") as refresh:
+                first = self.client.get(reverse_lazy("crm:statistics"))
+                second = self.client.get(reverse_lazy("crm:statistics"))
+
+            self.assertContains(first, "Total clients attracted: 6")
+            self.assertContains(second, "Total clients attracted: 6")
+            refresh.assert_called_once()
+
+            refresh.call_args.args[0]()
+            response = self.client.get(reverse_lazy("crm:statistics"))
+
+        self.assertContains(response, "Total clients attracted: 5")
+
+    def test_locked_miss_serves_previous_generation(self):
+        """Тест отдачи ответа прошлого поколения, пока новое вычисляет другой воркер"""
+
+        self.client.force_login(self.manager)
+        self.client.get(reverse_lazy("crm:statistics"))
+        with self.captureOnCommitCallbacks(execute=True):
+            PotentialClient.objects.filter(pk=1).delete()
+
+        with mock.patch.object(caches[settings.SWR_CACHE_ALIAS], "add", return_value=False):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse_lazy("crm:statistics"))
+
+        self.assertContains(response, "Total clients attracted: 6")
+        self.assertFalse([query for query in queries.captured_queries if "crm_statisticssnapshot" in query["sql"]])
+
+    def test_refresh_uses_detached_request(self):
+        """Тест фонового обновления с копией запроса вместо исходного объекта"""
+
+        request = RequestFactory().head("/statistics/", {"page": "2"})
+        request.user = self.manager
+
+        clone = detached_request(request)
+
+        self.assertIsNot(clone, request)
+        self.assertEqual(clone.method, "GET")
+        self.assertEqual(clone.get_full_path(), "/statistics/?page=2")
+        self.assertEqual(clone.user, self.manager)
+
+    def test_cache_varies_by_role(self):
+        """Тест раздельного кэширования для разных ролей"""
+
+        self.client.force_login(self.manager)
+        self.client.get(reverse_lazy("crm:statistics"))
+        PotentialClient.objects.filter(pk=1).delete()
+
+        self.client.force_login(self.operator)
+        response = self.client.get(reverse_lazy("crm:statistics"))
+
+        self.assertContains(response, "Total clients attracted: 5")
+
+
+class TestStatisticsBuckets(TestCase):
+    """Класс тестов дневных корзин статистики"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+        "04-campaigns.json",
+        "05-potential_clients.json",
+        "06-contracts.json",
+        "07-active_clients.json",
+    ]
+
+    def setUp(self):
+        cache.clear()
+
+    def assertBucketsActual(self):
+        self.assertEqual(rebuild_buckets(), 0)
+
+    def test_buckets_after_fixtures(self):
+        """Тест соответствия корзин загруженным данным"""
+
+        self.assertBucketsActual()
+        self.assertEqual(StatisticsBucket.objects.filter(campaign_id=1).count(), 2)
+
+    def test_buckets_after_changes(self):
+        """Тест инкрементального обновления корзин при изменении моделей"""
+
+        ActiveClient.objects.create(potential_client_id=6, contract_id=6)
+        self.assertBucketsActual()
+
+        campaign = Campaign.objects.get(pk=1)
+        campaign.promotion_channel = "Other channel"
+        campaign.save()
+        self.assertBucketsActual()
+
+        contract = Contract.objects.get(pk=1)
+        contract.conclusion_date = "2024-05-01"
+        contract.amount = 1
+        contract.save()
+        self.assertBucketsActual()
+
+        ActiveClient.objects.get(pk=5).delete()
+        self.assertBucketsActual()
+
+        campaign.delete()
+        self.assertBucketsActual()
+        self.assertFalse(StatisticsBucket.objects.exclude(campaign_id=0).exists())
+
+    def test_breakdown_view(self):
+        """Тест разбивки статистики по кампаниям, каналам и месяцам"""
+
+        self.client.force_login(User.objects.get(username="marketer"))
+
+        response = self.client.get(reverse_lazy("crm:statistics_breakdown"), {"start": "2024-04-05"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["by_campaign"][0]["income"], 2750)
+        self.assertContains(response, "New promotion channel: income 2750.00, expenses 750.01, ratio 3.67")
+        self.assertContains(response, "2024-04: income 14250.00, contracts 5")
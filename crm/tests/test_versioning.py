@@ -0,0 +1,107 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse_lazy
+
+from crm.conversions import convert_potential_clients
+from crm.models import ActiveClient, Contract, Service, TableVersion
+
+
+class TestVersioning(TestCase):
+    """Класс тестов версий объектов и условных GET-запросов"""
+
+    fixtures = [
+        "01-groups.json",
+        "02-users.json",
+        "03-services.json",
+        "04-campaigns.json",
+        "05-potential_clients.json",
+        "06-contracts.json",
+        "07-active_clients.json",
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        """Объявление подготовленных юзеров с группами прав"""
+
+        super().setUpClass()
+        cls.admin = User.objects.get(username="admin")
+        cls.manager = User.objects.get(username="manager")
+
+    def test_version_increment(self):
+        """Тест увеличения версии объекта и счетчика таблицы при сохранении"""
+
+        contract = Contract.objects.get(pk=1)
+        table_version = TableVersion.objects.get(table=Contract._meta.db_table).version
+
+        contract.name = "Renamed contract"
+        contract.save()
+
+        self.assertEqual(contract.version, 2)
+        self.assertEqual(Contract.objects.get(pk=1).version, 2)
+        self.assertEqual(TableVersion.objects.get(table=Contract._meta.db_table).version, table_version + 1)
+
+    def test_detail_not_modified(self):
+        """Тест ответа 304 на деталь одним запросом без рендеринга шаблона"""
+
+        self.client.force_login(self.manager)
+        url = reverse_lazy("crm:contract_details", kwargs={"pk": 1})
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertTemplateNotUsed("crm/contract_detail.html"), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len([query for query in queries.captured_queries if '"crm_' in query["sql"]]), 1)
+
+    def test_detail_etag_changes(self):
+        """Тест смены ETag детали при изменении объекта и связанного объекта"""
+
+        self.client.force_login(self.manager)
+        url = reverse_lazy("crm:contract_details", kwargs={"pk": 1})
+        first = self.client.get(url)["ETag"]
+
+        contract = Contract.objects.get(pk=1)
+        contract.name = "Renamed contract"
+        contract.save()
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first)
+
+        service = Service.objects.get(pk=contract.service_id)
+        service.name = "Renamed service"
+        service.save()
+        third = self.client.get(url, HTTP_IF_NONE_MATCH=second["ETag"])
+
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(first, second["ETag"])
+        self.assertEqual(third.status_code, 200)
+        self.assertNotEqual(second["ETag"], third["ETag"])
+
+    def test_list_etag_changes(self):
+        """Тест смены ETag списка при создании, удалении и массовой конвертации"""
+
+        self.client.force_login(self.admin)
+        url = reverse_lazy("crm:active_clients")
+        first = self.client.get(url)
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        convert_potential_clients([(5, 3)])
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        ActiveClient.objects.get(potential_client_id=5).delete()
+        third = self.client.get(url, HTTP_IF_NONE_MATCH=second["ETag"])
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(third.status_code, 200)
+        self.assertEqual(len({first["ETag"], second["ETag"], third["ETag"]}), 3)
+
+    def test_last_modified(self):
+        """Тест ответа 304 по заголовку If-Modified-Since"""
+
+        self.client.force_login(self.manager)
+        url = reverse_lazy("crm:contracts")
+        response = self.client.get(url)
+
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 304)
@@ -1,13 +1,19 @@
-from django.conf import settings
 from django.urls import path
-from django.views.decorators.cache import cache_page
 
+from crm.caching import stale_while_revalidate
+from crm.statistics import STATISTICS_NAMESPACES
 from crm.views import (
     CreateServiceView,
     CreateCampaignView,
     CreatePotentialClientView,
     CreateContractView,
     CreateActiveClientView,
+    BulkConversionView,
+    PotentialClientImportView,
+    DocumentUploadView,
+    DocumentUploadPartView,
+    ContractDocumentView,
+    JobDetailView,
 
     ServiceListView,
     CampaignListView,
@@ -15,6 +21,12 @@ from crm.views import (
     ContractListView,
     ActiveClientListView,
 
+    ServiceExportView,
+    CampaignExportView,
+    PotentialClientExportView,
+    ContractExportView,
+    ActiveClientExportView,
+
     ServiceDetailView,
     CampaignDetailView,
     PotentialClientDetailView,
@@ -34,6 +46,24 @@ from crm.views import (
     ActiveClientUpdateView,
 
     StatisticsView,
+    StatisticsBreakdownView,
+    SearchView,
+    AutocompleteView,
+    MetricsView,
+
+    AsyncServiceListView,
+    AsyncCampaignListView,
+    AsyncPotentialClientListView,
+    AsyncContractListView,
+    AsyncActiveClientListView,
+
+    AsyncServiceDetailView,
+    AsyncCampaignDetailView,
+    AsyncPotentialClientDetailView,
+    AsyncContractDetailView,
+    AsyncActiveClientDetailView,
+
+    AsyncStatisticsView,
 )
 
 app_name = "crm"
@@ -44,6 +74,11 @@ urlpatterns = [
     path("create-potential-client/", CreatePotentialClientView.as_view(), name="create_potential_client"),
     path("create-contract/", CreateContractView.as_view(), name="create_contract"),
     path("create-active-client/<int:pk>", CreateActiveClientView.as_view(), name="create_active_client"),
+    path("active-clients/bulk-create/", BulkConversionView.as_view(), name="bulk_create_active_clients"),
+    path("potential-clients/import/", PotentialClientImportView.as_view(), name="import_potential_clients"),
+    path("documents/uploads/", DocumentUploadView.as_view(), name="document_upload"),
+    path("documents/uploads/<uuid:pk>/", DocumentUploadPartView.as_view(), name="document_upload_part"),
+    path("jobs/<int:pk>/", JobDetailView.as_view(), name="job_details"),
 
     path("services/", ServiceListView.as_view(), name="services"),
     path("campaigns/", CampaignListView.as_view(), name="campaigns"),
@@ -51,10 +86,17 @@ urlpatterns = [
     path("contracts/", ContractListView.as_view(), name="contracts"),
     path("active-clients/", ActiveClientListView.as_view(), name="active_clients"),
 
+    path("services/export/", ServiceExportView.as_view(), name="services_export"),
+    path("campaigns/export/", CampaignExportView.as_view(), name="campaigns_export"),
+    path("potential-clients/export/", PotentialClientExportView.as_view(), name="potential_clients_export"),
+    path("contracts/export/", ContractExportView.as_view(), name="contracts_export"),
+    path("active-clients/export/", ActiveClientExportView.as_view(), name="active_clients_export"),
+
     path("services/<int:pk>/", ServiceDetailView.as_view(), name="service_details"),
     path("campaigns/<int:pk>/", CampaignDetailView.as_view(), name="campaign_details"),
     path("potential-clients/<int:pk>/", PotentialClientDetailView.as_view(), name="potential_client_details"),
     path("contracts/<int:pk>/", ContractDetailView.as_view(), name="contract_details"),
+    path("contracts/<int:pk>/document/", ContractDocumentView.as_view(), name="contract_document"),
     path("active-clients/<int:pk>/", ActiveClientDetailView.as_view(), name="active_client_details"),
 
     path("services/<int:pk>/delete/", ServiceDeleteView.as_view(), name="service_delete"),
@@ -69,5 +111,48 @@ urlpatterns = [
     path("contracts/<int:pk>/update/", ContractUpdateView.as_view(), name="contract_update"),
     path("active-clients/<int:pk>/update/", ActiveClientUpdateView.as_view(), name="active_client_update"),
 
-    path("statistics/", cache_page(settings.CACHE_TIME)(StatisticsView.as_view()), name="statistics"),
+    path(
+        "statistics/",
+        stale_while_revalidate(namespaces=STATISTICS_NAMESPACES)(StatisticsView.as_view()),
+        name="statistics",
+    ),
+    path(
+        "statistics/breakdown/",
+        stale_while_revalidate(namespaces=STATISTICS_NAMESPACES)(StatisticsBreakdownView.as_view()),
+        name="statistics_breakdown",
+    ),
+
+    path("search/", SearchView.as_view(), name="search"),
+    path("autocomplete/services/", AutocompleteView.as_view(source="service"), name="autocomplete_service"),
+    path("autocomplete/campaigns/", AutocompleteView.as_view(source="campaign"), name="autocomplete_campaign"),
+    path(
+        "autocomplete/potential-clients/",
+        AutocompleteView.as_view(source="potential_client"),
+        name="autocomplete_potential_client",
+    ),
+    path("autocomplete/contracts/", AutocompleteView.as_view(source="contract"), name="autocomplete_contract"),
+    path(
+        "autocomplete/free-contracts/",
+        AutocompleteView.as_view(source="free_contract"),
+        name="autocomplete_free_contract",
+    ),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+
+    path("async/services/", AsyncServiceListView.as_view(), name="async_services"),
+    path("async/campaigns/", AsyncCampaignListView.as_view(), name="async_campaigns"),
+    path("async/potential-clients/", AsyncPotentialClientListView.as_view(), name="async_potential_clients"),
+    path("async/contracts/", AsyncContractListView.as_view(), name="async_contracts"),
+    path("async/active-clients/", AsyncActiveClientListView.as_view(), name="async_active_clients"),
+
+    path("async/services/<int:pk>/", AsyncServiceDetailView.as_view(), name="async_service_details"),
+    path("async/campaigns/<int:pk>/", AsyncCampaignDetailView.as_view(), name="async_campaign_details"),
+    path(
+        "async/potential-clients/<int:pk>/",
+        AsyncPotentialClientDetailView.as_view(),
+        name="async_potential_client_details",
+    ),
+    path("async/contracts/<int:pk>/", AsyncContractDetailView.as_view(), name="async_contract_details"),
+    path("async/active-clients/<int:pk>/", AsyncActiveClientDetailView.as_view(), name="async_active_client_details"),
+
+    path("async/statistics/", AsyncStatisticsView.as_view(), name="async_statistics"),
 ]
@@ -0,0 +1,129 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.generic.detail import SingleObjectMixin
+
+from crm.models import TableVersion
+
+# ETag и время последнего изменения данных страницы
+Stamp = Tuple[str, Optional[datetime]]
+# Заголовки условного запроса, при которых ответ 304 вероятен
+CONDITIONAL_HEADERS = ("HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE")
+
+
+def bump_table_version(model: Type[models.Model]) -> None:
+    """Атомарное увеличение счетчика изменений таблицы модели"""
+
+    table: str = model._meta.db_table
+    now = timezone.now()
+    if TableVersion.objects.filter(table=table).update(version=F("version") + 1, updated_at=now):
+        return
+    try:
+        with transaction.atomic():
+            TableVersion.objects.create(table=table, version=1, updated_at=now)
+    except IntegrityError:
+        TableVersion.objects.filter(table=table).update(version=F("version") + 1, updated_at=now)
+
+
+def related_model(model: Type[models.Model], path: str) -> Type[models.Model]:
+    """Модель на конце пути связей вида potential_client__campaign"""
+
+    for name in path.split("__"):
+        model = model._meta.get_field(name).related_model
+    return model
+
+
+class ConditionalGetMixin:
+    """Миксин ответов 304 на условные GET-запросы к спискам и деталям.
+
+    Деталь получает ETag из версий объекта и объектов, присоединенных через
+    select_related_fields. Условный запрос проверяется одним запросом values()
+    без создания моделей, безусловный берет версии из объекта, который все равно
+    загружается для шаблона. Список -
+    из счетчиков TableVersion своей таблицы, присоединенных таблиц и таблиц
+    version_models, от которых зависит шаблон. Если ETag или Last-Modified
+    совпадают с заголовками запроса, шаблон не рендерится и queryset не
+    выполняется.
+    """
+
+    version_models: Sequence[Type[models.Model]] = ()
+
+    def get_related_paths(self) -> List[str]:
+        return [path for path in getattr(self, "select_related_fields", ()) if isinstance(path, str)]
+
+    def get_object_stamp(self) -> Optional[Stamp]:
+        """Версии объекта и связанных объектов одним запросом values() без создания моделей"""
+
+        paths: List[str] = ["", *(f"{path}__" for path in self.get_related_paths())]
+        fields: List[str] = [f"{path}{name}" for path in paths for name in ("version", "updated_at")]
+        pk: Any = self.kwargs.get(self.pk_url_kwarg)  # type: ignore
+        row: Optional[Dict[str, Any]] = self.get_queryset().filter(pk=pk).values(*fields).first()  # type: ignore
+        if row is None:
+            return None
+        return self.make_stamp([(row[f"{path}version"], row[f"{path}updated_at"]) for path in paths])
+
+    def get_loaded_object_stamp(self) -> Stamp:
+        """Версии уже загруженного объекта: безусловный запрос не делает отдельного запроса за ETag"""
+
+        self.object = self.get_object()  # type: ignore
+        instances: List[Optional[models.Model]] = [self.object]
+        for path in self.get_related_paths():
+            instance: Optional[models.Model] = self.object
+            for name in path.split("__"):
+                instance = getattr(instance, name, None)
+            instances.append(instance)
+        return self.make_stamp(
+            [(instance.version, instance.updated_at) if instance else (None, None) for instance in instances]
+        )
+
+    @staticmethod
+    def make_stamp(versions: Sequence[Tuple[Optional[int], Optional[datetime]]]) -> Stamp:
+        modified: List[datetime] = [updated_at for _, updated_at in versions if updated_at]
+        return ".".join(str(version) for version, _ in versions), max(modified, default=None)
+
+    def get_object(self, queryset: Optional[models.QuerySet] = None) -> models.Model:
+        if queryset is None and getattr(self, "object", None) is not None:
+            return self.object  # type: ignore
+        return super().get_object(queryset)  # type: ignore
+
+    def get_list_stamp(self) -> Stamp:
+        model: Type[models.Model] = self.model  # type: ignore
+        dependencies = [model, *(related_model(model, path) for path in self.get_related_paths()), *self.version_models]
+        tables: List[str] = sorted({dependency._meta.db_table for dependency in dependencies})
+        rows: Dict[str, Tuple[int, datetime]] = {
+            table: (version, updated_at)
+            for table, version, updated_at in TableVersion.objects.filter(table__in=tables).values_list(
+                "table", "version", "updated_at"
+            )
+        }
+        versions: str = ".".join(str(rows.get(table, (0, None))[0]) for table in tables)
+        return versions, max((updated_at for _, updated_at in rows.values()), default=None)
+
+    def get_stamp(self) -> Optional[Stamp]:
+        if isinstance(self, SingleObjectMixin):
+            conditional: bool = any(header in self.request.META for header in CONDITIONAL_HEADERS)  # type: ignore
+            return self.get_object_stamp() if conditional else self.get_loaded_object_stamp()
+        return self.get_list_stamp()
+
+    def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        stamp: Optional[Stamp] = self.get_stamp()
+        if stamp is None:
+            return super().get(request, *args, **kwargs)  # type: ignore
+
+        etag: str = quote_etag(stamp[0])
+        last_modified: Optional[int] = int(stamp[1].timestamp()) if stamp[1] else None
+        response: Optional[HttpResponse] = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)  # type: ignore
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        # Ответ зависит от прав пользователя и всегда перепроверяется по ETag
+        response["Cache-Control"] = "private, no-cache"
+        return response
@@ -1,12 +1,26 @@
-from decimal import Decimal
-from typing import List, Tuple, Any, Dict, Literal
-
-from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+import json
+import re
+from dataclasses import asdict
+from pathlib import Path
+from uuid import uuid4
+from typing import List, Tuple, Any, Dict, FrozenSet, Literal, Optional, Sequence, Type
+
+from django.contrib.auth.mixins import AccessMixin, LoginRequiredMixin, UserPassesTestMixin
+from django.conf import settings
+from django.core.files.storage import default_storage
 from django.core.exceptions import ImproperlyConfigured
-from django.db.models import QuerySet, Sum
+from django.db import connection, models
+from django.db.models import Exists, OuterRef, QuerySet
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
+from django.views.generic.base import ContextMixin, TemplateResponseMixin
+from django.views.generic.detail import SingleObjectMixin, SingleObjectTemplateResponseMixin
+from django.views.generic.list import MultipleObjectMixin, MultipleObjectTemplateResponseMixin
 from django.views.generic import (
+    View,
     CreateView,
+    FormView,
     TemplateView,
     ListView,
     DetailView,
@@ -20,7 +34,41 @@ from crm.models import (
     PotentialClient,
     Contract,
     ActiveClient,
+    DocumentUpload,
+    Job,
+    StatisticsSnapshot,
+)
+from crm import dbpool, fragments, metrics
+from crm.documents import UploadError, append_chunk, upload_state
+from crm.downloads import serve_file
+from crm.exports import ExportMixin
+from crm.pagination import KeysetPaginationMixin
+from crm.queryplans import QueryPlanMixin
+from crm.fragments import FragmentCacheMixin
+from crm.versioning import ConditionalGetMixin
+from crm.permissions import group_membership
+from crm.autocomplete import AUTOCOMPLETE_SOURCES, AutocompleteSource, autocomplete
+from crm.conversions import ConversionReport, convert_potential_clients
+from crm.forms import (
+    BreakdownFilterForm,
+    ActiveClientForm,
+    ActiveClientUpdateForm,
+    BulkConversionForm,
+    CampaignForm,
+    ContractForm,
+    DocumentUploadForm,
+    LeadImportForm,
+    PotentialClientForm,
+    SearchForm,
 )
+from crm.imports import detect_format
+from crm.jobs import enqueue
+from crm.search import search
+from crm.tasks import IMPORTS_DIR
+from crm.statistics import aget_snapshot, get_breakdown, get_snapshot
+
+
+CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
 
 
 # PERMISSIONS GROUP CLASSES
@@ -32,7 +80,7 @@ class GroupRequiredMixin(UserPassesTestMixin):
     def test_func(self):
         if not self.group_names:
             raise ImproperlyConfigured("Необходимо установить group_names в вашем представлении")
-        user_groups: List[str] = self.request.user.groups.values_list("name", flat=True)
+        user_groups: FrozenSet[str] = group_membership.get_groups(self.request.user)
         return any(group_name in user_groups for group_name in self.group_names)
 
 
@@ -43,6 +91,40 @@ class SuperUserRequiredMixin(UserPassesTestMixin):
         return self.request.user.is_superuser
 
 
+class AsyncAccessMixin(AccessMixin):
+    """Миксин асинхронной проверки авторизации и прав для асинхронных представлений"""
+
+    async def atest_func(self, user) -> bool:
+        return True
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        # Ленивый request.user выполнил бы синхронный запрос к БД при первом обращении
+        request.user = user
+        if not user.is_authenticated or not await self.atest_func(user):
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncGroupRequiredMixin(AsyncAccessMixin):
+    """Асинхронный миксин проверки наличия пользователя в указанной группе прав group_names"""
+
+    group_names: List[str] = []
+
+    async def atest_func(self, user) -> bool:
+        if not self.group_names:
+            raise ImproperlyConfigured("Необходимо установить group_names в вашем представлении")
+        user_groups: FrozenSet[str] = await group_membership.aget_groups(user)
+        return any(group_name in user_groups for group_name in self.group_names)
+
+
+class AsyncSuperUserRequiredMixin(AsyncAccessMixin):
+    """Асинхронный миксин проверки пользователя на статус суперпользователя"""
+
+    async def atest_func(self, user) -> bool:
+        return user.is_superuser
+
+
 # CREATE VIEWS
 class CreateServiceView(LoginRequiredMixin, GroupRequiredMixin, CreateView):
     """Представление создания услуги"""
@@ -62,7 +144,7 @@ class CreateCampaignView(LoginRequiredMixin, GroupRequiredMixin, CreateView):
         "Marketer",
     ]
     model = Campaign
-    fields: Literal["__all__"] = "__all__"
+    form_class = CampaignForm
     success_url = reverse_lazy("crm:campaigns")
 
 
@@ -73,7 +155,7 @@ class CreatePotentialClientView(LoginRequiredMixin, GroupRequiredMixin, CreateVi
         "Operator",
     ]
     model = PotentialClient
-    fields: Literal["__all__"] = "__all__"
+    form_class = PotentialClientForm
     success_url = reverse_lazy("crm:potential_clients")
 
 
@@ -84,7 +166,7 @@ class CreateContractView(LoginRequiredMixin, GroupRequiredMixin, CreateView):
         "Manager",
     ]
     model = Contract
-    fields: Literal["__all__"] = "__all__"
+    form_class = ContractForm
     success_url = reverse_lazy("crm:contracts")
 
 
@@ -95,68 +177,334 @@ class CreateActiveClientView(LoginRequiredMixin, GroupRequiredMixin, CreateView)
         "Manager",
     ]
     model = ActiveClient
-    fields: Tuple[str] = ("contract",)
+    form_class = ActiveClientForm
     success_url = reverse_lazy("crm:active_clients")
 
     def form_valid(self, form):
-        potential_client_id: int = self.kwargs.get("pk")
-        form.instance.potential_client = PotentialClient.objects.get(pk=potential_client_id)
+        form.instance.potential_client = get_object_or_404(PotentialClient, pk=self.kwargs["pk"])
         return super().form_valid(form)
 
 
+class BulkConversionView(LoginRequiredMixin, GroupRequiredMixin, FormView):
+    """Представление массовой конвертации потенциальных клиентов в активных.
+
+    Принимает форму с парами id или JSON {"conversions": [{"potential_client": id,
+    "contract": id}, ...]} и отвечает отчетом с созданными клиентами и конфликтами.
+    """
+
+    group_names: List[str] = [
+        "Manager",
+    ]
+    form_class = BulkConversionForm
+    template_name = "crm/activeclient_bulk_form.html"
+
+    def post(self, request, *args, **kwargs):
+        if request.content_type != "application/json":
+            return super().post(request, *args, **kwargs)
+
+        try:
+            payload: Any = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({"error": "Некорректный JSON"}, status=400)
+        form = BulkConversionForm({"conversions": payload.get("conversions") if isinstance(payload, dict) else None})
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+        report: ConversionReport = convert_potential_clients(form.cleaned_data["conversions"])
+        return JsonResponse(
+            {
+                "created": [
+                    {"id": client.pk, "potential_client": client.potential_client_id, "contract": client.contract_id}
+                    for client in report.created
+                ],
+                "conflicts": [asdict(conflict) for conflict in report.conflicts],
+            }
+        )
+
+    def form_valid(self, form):
+        report: ConversionReport = convert_potential_clients(form.cleaned_data["conversions"])
+        return self.render_to_response(self.get_context_data(form=form, report=report))
+
+
+class PotentialClientImportView(LoginRequiredMixin, GroupRequiredMixin, FormView):
+    """Представление импорта потенциальных клиентов из CSV/JSONL"""
+
+    group_names: List[str] = [
+        "Operator",
+    ]
+    form_class = LeadImportForm
+    template_name = "crm/potentialclient_import.html"
+
+    def form_valid(self, form):
+        uploaded_file = form.cleaned_data["file"]
+        campaign: Optional[Campaign] = form.cleaned_data["campaign"]
+        name: str = default_storage.save(
+            f"{IMPORTS_DIR}/{uuid4().hex}{Path(uploaded_file.name).suffix.lower()}", uploaded_file
+        )
+
+        job: Job = enqueue(
+            "import_leads",
+            {"path": name, "format": detect_format(uploaded_file.name), "campaign": campaign and campaign.pk},
+            user=self.request.user,
+        )
+        return redirect("crm:job_details", pk=job.pk)
+
+
+# JOBS
+class JobDetailView(LoginRequiredMixin, QueryPlanMixin, DetailView):
+    """Представление статуса фоновой задачи: автору задачи и суперпользователю"""
+
+    model = Job
+    only_fields: Sequence[str] = (
+        "kind",
+        "status",
+        "progress",
+        "message",
+        "result",
+        "error",
+        "attempts",
+        "max_attempts",
+        "created_at",
+        "finished_at",
+    )
+    template_name = "crm/job_detail.html"
+
+    def get_queryset(self) -> QuerySet[Job]:
+        queryset: QuerySet[Job] = super().get_queryset()
+        if self.request.user.is_superuser:
+            return queryset
+        return queryset.filter(user=self.request.user)
+
+
+# DOCUMENT UPLOADS
+class DocumentUploadView(LoginRequiredMixin, GroupRequiredMixin, View):
+    """Представление начала загрузки документа по частям"""
+
+    group_names: List[str] = [
+        "Manager",
+    ]
+
+    def post(self, request, *args, **kwargs) -> JsonResponse:
+        form = DocumentUploadForm(request.POST)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+        upload: DocumentUpload = DocumentUpload.objects.create(user=request.user, **form.cleaned_data)
+        return JsonResponse(upload_state(upload), status=201)
+
+
+class DocumentUploadPartView(LoginRequiredMixin, GroupRequiredMixin, View):
+    """Представление статуса загрузки и приема очередной части (PUT с Content-Range)"""
+
+    group_names: List[str] = [
+        "Manager",
+    ]
+
+    def get_upload(self) -> DocumentUpload:
+        return get_object_or_404(DocumentUpload, pk=self.kwargs["pk"], user=self.request.user)
+
+    def get(self, request, *args, **kwargs) -> JsonResponse:
+        return JsonResponse(upload_state(self.get_upload()))
+
+    def put(self, request, *args, **kwargs) -> JsonResponse:
+        upload: DocumentUpload = self.get_upload()
+        match = CONTENT_RANGE.fullmatch(request.headers.get("Content-Range", ""))
+        if match is None:
+            return JsonResponse({"error": "Нужен заголовок Content-Range: bytes start-end/size"}, status=400)
+        start, end, size = (int(value) for value in match.groups())
+        if size != upload.size or end < start:
+            return JsonResponse({"error": "Неверный диапазон части"}, status=400)
+
+        try:
+            upload, blob = append_chunk(upload.pk, request, start, end - start + 1)
+        except UploadError as error:
+            upload.refresh_from_db()
+            return JsonResponse({"error": str(error), **upload_state(upload)}, status=error.status)
+        return JsonResponse(upload_state(upload, blob))
+
+
+class ContractDocumentView(LoginRequiredMixin, GroupRequiredMixin, View):
+    """Представление скачивания документа контракта с проверкой прав"""
+
+    group_names: List[str] = [
+        "Manager",
+    ]
+
+    def get(self, request, *args, **kwargs) -> HttpResponse:
+        contract: Contract = get_object_or_404(
+            Contract.objects.select_related("blob").only("document", "blob__sha256"), pk=self.kwargs["pk"]
+        )
+        if not contract.document:
+            raise Http404("У контракта нет документа")
+        name: str = contract.document.name
+        sha256: Optional[str] = contract.blob.sha256 if contract.blob is not None else None
+        return serve_file(request, name, f"contract_{contract.pk}{Path(name).suffix}", sha256)
+
+
 # LIST VIEWS
-class ServiceListView(LoginRequiredMixin, GroupRequiredMixin, ListView):
+class ServiceListView(
+    LoginRequiredMixin,
+    GroupRequiredMixin,
+    QueryPlanMixin,
+    ConditionalGetMixin,
+    FragmentCacheMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
     """Представление списка услуг"""
 
     group_names: List[str] = [
         "Marketer",
     ]
     model = Service
+    only_fields: Sequence[str] = ("name", "version")
 
 
-class CampaignListView(LoginRequiredMixin, GroupRequiredMixin, ListView):
+class CampaignListView(
+    LoginRequiredMixin,
+    GroupRequiredMixin,
+    QueryPlanMixin,
+    ConditionalGetMixin,
+    FragmentCacheMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
     """Представление списка рекламной компании"""
 
     group_names: List[str] = [
         "Marketer",
     ]
     model = Campaign
+    only_fields: Sequence[str] = ("name", "version")
 
 
-class PotentialClientListView(LoginRequiredMixin, GroupRequiredMixin, ListView):
+class PotentialClientListView(
+    LoginRequiredMixin,
+    GroupRequiredMixin,
+    QueryPlanMixin,
+    ConditionalGetMixin,
+    FragmentCacheMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
     """Представление списка потенциальных клиентов"""
 
     group_names: List[str] = ["Operator", "Manager"]
     model = PotentialClient
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data()
-        potential_clients = self.get_queryset()
-
-        active_clients: QuerySet = ActiveClient.objects.filter(potential_client__in=potential_clients)
-        active_clients_ids: List[int] = active_clients.values_list("potential_client_id", flat=True)
-
-        context["active_clients_ids"] = active_clients_ids
-        return context
-
-
-class ContractListView(LoginRequiredMixin, GroupRequiredMixin, ListView):
+    only_fields: Sequence[str] = ("full_name", "version")
+    version_models: Sequence[Type[models.Model]] = (ActiveClient,)
+
+    def get_queryset(self) -> QuerySet:
+        return (
+            super()
+            .get_queryset()
+            .annotate(is_active=Exists(ActiveClient.objects.filter(potential_client=OuterRef("pk"))))
+        )
+
+
+class ContractListView(
+    LoginRequiredMixin,
+    GroupRequiredMixin,
+    QueryPlanMixin,
+    ConditionalGetMixin,
+    FragmentCacheMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
     """Представление списка контраков"""
 
     group_names: List[str] = [
         "Manager",
     ]
     model = Contract
+    only_fields: Sequence[str] = ("name", "version")
 
 
-class ActiveClientListView(LoginRequiredMixin, SuperUserRequiredMixin, ListView):
+class ActiveClientListView(
+    LoginRequiredMixin,
+    SuperUserRequiredMixin,
+    QueryPlanMixin,
+    ConditionalGetMixin,
+    FragmentCacheMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
     """Представление списка активных клиентов"""
 
-    queryset = ActiveClient.objects.select_related("potential_client")
+    model = ActiveClient
+    select_related_fields: Sequence[str] = ("potential_client",)
+    only_fields: Sequence[str] = ("potential_client__full_name", "version")
+
+
+# EXPORT VIEWS
+class ServiceExportView(ExportMixin, ServiceListView):
+    """Представление выгрузки списка услуг"""
+
+    export_name: str = "services"
+    export_fields: Sequence[Tuple[str, str]] = (
+        ("id", "ID"),
+        ("name", "Name"),
+        ("description", "Description"),
+        ("cost", "Cost"),
+    )
+
+
+class CampaignExportView(ExportMixin, CampaignListView):
+    """Представление выгрузки списка рекламных компаний"""
+
+    export_name: str = "campaigns"
+    export_fields: Sequence[Tuple[str, str]] = (
+        ("id", "ID"),
+        ("name", "Name"),
+        ("service__name", "Service"),
+        ("promotion_channel", "Promotion channel"),
+        ("budget", "Budget"),
+    )
+
+
+class PotentialClientExportView(ExportMixin, PotentialClientListView):
+    """Представление выгрузки списка потенциальных клиентов"""
+
+    export_name: str = "potential_clients"
+    export_fields: Sequence[Tuple[str, str]] = (
+        ("id", "ID"),
+        ("full_name", "Full name"),
+        ("phone", "Phone"),
+        ("email", "Email"),
+        ("campaign__name", "Campaign"),
+    )
+
+
+class ContractExportView(ExportMixin, ContractListView):
+    """Представление выгрузки списка контрактов"""
+
+    export_name: str = "contracts"
+    export_fields: Sequence[Tuple[str, str]] = (
+        ("id", "ID"),
+        ("name", "Name"),
+        ("service__name", "Service"),
+        ("conclusion_date", "Conclusion date"),
+        ("validity_period", "Validity period"),
+        ("amount", "Amount"),
+        ("document", "Document"),
+    )
+
+
+class ActiveClientExportView(ExportMixin, ActiveClientListView):
+    """Представление выгрузки списка активных клиентов"""
+
+    export_name: str = "active_clients"
+    export_fields: Sequence[Tuple[str, str]] = (
+        ("id", "ID"),
+        ("potential_client__full_name", "Full name"),
+        ("potential_client__phone", "Phone"),
+        ("potential_client__email", "Email"),
+        ("contract__name", "Contract"),
+        ("contract__conclusion_date", "Conclusion date"),
+        ("contract__amount", "Amount"),
+    )
 
 
 # DETAIL VIEWS
-class ServiceDetailView(LoginRequiredMixin, GroupRequiredMixin, DetailView):
+class ServiceDetailView(LoginRequiredMixin, GroupRequiredMixin, QueryPlanMixin, ConditionalGetMixin, DetailView):
     """Представление списка деталей услуги"""
 
     group_names: List[str] = [
@@ -165,37 +513,45 @@ class ServiceDetailView(LoginRequiredMixin, GroupRequiredMixin, DetailView):
     model = Service
 
 
-class CampaignDetailView(LoginRequiredMixin, GroupRequiredMixin, DetailView):
+class CampaignDetailView(LoginRequiredMixin, GroupRequiredMixin, QueryPlanMixin, ConditionalGetMixin, DetailView):
     """Представление списка деталей рекламной компании"""
 
     group_names: List[str] = [
         "Marketer",
     ]
     model = Campaign
+    select_related_fields: Sequence[str] = ("service",)
 
 
-class PotentialClientDetailView(LoginRequiredMixin, GroupRequiredMixin, DetailView):
+class PotentialClientDetailView(
+    LoginRequiredMixin, GroupRequiredMixin, QueryPlanMixin, ConditionalGetMixin, DetailView
+):
     """Представление списка деталей потенциального клиента"""
 
     group_names: List[str] = [
         "Operator",
     ]
     model = PotentialClient
+    select_related_fields: Sequence[str] = ("campaign",)
 
 
-class ContractDetailView(LoginRequiredMixin, GroupRequiredMixin, DetailView):
+class ContractDetailView(LoginRequiredMixin, GroupRequiredMixin, QueryPlanMixin, ConditionalGetMixin, DetailView):
     """Представление списка деталей контракта"""
 
     group_names: List[str] = [
         "Manager",
     ]
     model = Contract
+    select_related_fields: Sequence[str] = ("service",)
 
 
-class ActiveClientDetailView(LoginRequiredMixin, SuperUserRequiredMixin, DetailView):
+class ActiveClientDetailView(
+    LoginRequiredMixin, SuperUserRequiredMixin, QueryPlanMixin, ConditionalGetMixin, DetailView
+):
     """Представление списка деталей активного клиента"""
 
     model = ActiveClient
+    select_related_fields: Sequence[str] = ("potential_client", "contract")
 
 
 # DELETE VIEWS
@@ -254,7 +610,7 @@ class CampaignUpdateView(LoginRequiredMixin, GroupRequiredMixin, UpdateView):
         "Marketer",
     ]
     model = Campaign
-    fields: Literal["__all__"] = "__all__"
+    form_class = CampaignForm
     template_name_suffix = "_update_form"
     success_url = reverse_lazy("crm:campaigns")
 
@@ -266,7 +622,7 @@ class PotentialClientUpdateView(LoginRequiredMixin, GroupRequiredMixin, UpdateVi
         "Operator",
     ]
     model = PotentialClient
-    fields: Literal["__all__"] = "__all__"
+    form_class = PotentialClientForm
     template_name_suffix = "_update_form"
     success_url = reverse_lazy("crm:potential_clients")
 
@@ -278,7 +634,7 @@ class ContractUpdateView(LoginRequiredMixin, GroupRequiredMixin, UpdateView):
         "Manager",
     ]
     model = Contract
-    fields: Literal["__all__"] = "__all__"
+    form_class = ContractForm
     template_name_suffix = "_update_form"
     success_url = reverse_lazy("crm:contracts")
 
@@ -287,11 +643,21 @@ class ActiveClientUpdateView(LoginRequiredMixin, SuperUserRequiredMixin, UpdateV
     """Представление редактирования активного клиента"""
 
     model = ActiveClient
-    fields: Literal["__all__"] = "__all__"
+    form_class = ActiveClientUpdateForm
     template_name_suffix = "_update_form"
     success_url = reverse_lazy("crm:active_clients")
 
 
+class MetricsView(LoginRequiredMixin, SuperUserRequiredMixin, View):
+    """Представление метрик запросов и соединений с БД в текстовом формате Prometheus"""
+
+    def get(self, request, *args, **kwargs) -> HttpResponse:
+        return HttpResponse(
+            metrics.registry.render_prometheus() + dbpool.render_prometheus(connection) + fragments.render_prometheus(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+
 class StatisticsView(LoginRequiredMixin, TemplateView):
     """Представление статистики"""
 
@@ -300,15 +666,216 @@ class StatisticsView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
 
-        potential_clients: int = PotentialClient.objects.count()
-        active_clients: int = ActiveClient.objects.count()
-        total_income: Decimal = Contract.objects.aggregate(Sum('amount')).get('amount__sum')
-        total_expenses: Decimal = Campaign.objects.aggregate(Sum('budget')).get('budget__sum')
+        snapshot: StatisticsSnapshot = get_snapshot()
+
+        context["potential_clients"] = snapshot.potential_clients
+        context["active_clients"] = snapshot.active_clients
+        context["income_expenses_ratio"] = snapshot.income_expenses_ratio
+
+        return context
+
+
+class StatisticsBreakdownView(LoginRequiredMixin, TemplateView):
+    """Представление разбивки статистики по кампаниям, каналам и месяцам"""
+
+    template_name = "crm/statistics_breakdown.html"
+
+    def get_context_data(self, **kwargs) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+
+        form = BreakdownFilterForm(self.request.GET or None)
+        period: Dict[str, Any] = form.cleaned_data if form.is_valid() else {}
+
+        context["form"] = form
+        context.update(get_breakdown(period.get("start"), period.get("end")))
+
+        return context
+
+
+class SearchView(LoginRequiredMixin, GroupRequiredMixin, TemplateView):
+    """Представление поиска потенциальных клиентов и контрактов"""
+
+    group_names: List[str] = ["Operator", "Manager"]
+    template_name = "crm/search.html"
 
-        income_expenses_ratio: Decimal = round((total_income / total_expenses if total_income > 0 else 0), 2)
+    def get_context_data(self, **kwargs) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
 
-        context["potential_clients"] = potential_clients
-        context["active_clients"] = active_clients
-        context["income_expenses_ratio"] = income_expenses_ratio
+        form = SearchForm(self.request.GET or None)
+        kinds: List[str] = ["potential_client"]
+        if "Manager" in group_membership.get_groups(self.request.user):
+            kinds.append("contract")
+
+        context["form"] = form
+        context["results"] = search(form.cleaned_data["q"], kinds, settings.SEARCH_LIMIT) if form.is_valid() else []
 
         return context
+
+
+class AutocompleteView(LoginRequiredMixin, GroupRequiredMixin, View):
+    """JSON-представление подсказок для полей внешних ключей в формах.
+
+    Ищет по префиксу значения без учета регистра по индексу UPPER(поле) и
+    возвращает не больше AUTOCOMPLETE_LIMIT объектов источника source.
+    """
+
+    source: str = ""
+
+    def get_source(self) -> AutocompleteSource:
+        return AUTOCOMPLETE_SOURCES[self.source]
+
+    def test_func(self):
+        if self.request.user.is_superuser:
+            return True
+        self.group_names = list(self.get_source().group_names)
+        return super().test_func()
+
+    def get(self, request, *args, **kwargs) -> JsonResponse:
+        source: AutocompleteSource = self.get_source()
+        query: str = request.GET.get("q", "")
+        objects: List[Any] = []
+        if len(query.strip()) >= settings.AUTOCOMPLETE_MIN_LENGTH:
+            objects = autocomplete(source, query, settings.AUTOCOMPLETE_LIMIT)
+        return JsonResponse({"results": [{"id": obj.pk, "text": getattr(obj, source.field)} for obj in objects]})
+
+
+# ASYNC VIEWS
+class AsyncKeysetListView(
+    QueryPlanMixin,
+    FragmentCacheMixin,
+    KeysetPaginationMixin,
+    MultipleObjectTemplateResponseMixin,
+    MultipleObjectMixin,
+    View,
+):
+    """Асинхронное представление списка с keyset-пагинацией на async ORM"""
+
+    async def get(self, request, *args, **kwargs):
+        queryset: QuerySet = self.get_queryset()
+        paginator, page, rows, is_paginated = await self.apaginate_queryset(queryset, self.get_paginate_by(queryset))
+
+        # Имя шаблона определяется по модели queryset, в контекст попадает уже загруженная страница
+        self.object_list = queryset
+        context: Dict[str, Any] = ContextMixin.get_context_data(
+            self,
+            paginator=paginator,
+            page_obj=page,
+            is_paginated=is_paginated,
+            object_list=rows,
+            rows=await self.aget_fragments(rows),
+        )
+        return self.render_to_response(context)
+
+
+class AsyncDetailView(QueryPlanMixin, SingleObjectTemplateResponseMixin, SingleObjectMixin, View):
+    """Асинхронное представление деталей объекта на async ORM"""
+
+    async def get(self, request, *args, **kwargs):
+        queryset: QuerySet = self.get_queryset()
+        try:
+            self.object = await queryset.aget(pk=self.kwargs.get(self.pk_url_kwarg))
+        except queryset.model.DoesNotExist as ex:
+            raise Http404(f"{queryset.model._meta.verbose_name} не найден") from ex
+        return self.render_to_response(self.get_context_data(object=self.object))
+
+
+class AsyncServiceListView(AsyncGroupRequiredMixin, AsyncKeysetListView):
+    """Асинхронное представление списка услуг"""
+
+    group_names: List[str] = ServiceListView.group_names
+    model = Service
+    only_fields: Sequence[str] = ServiceListView.only_fields
+
+
+class AsyncCampaignListView(AsyncGroupRequiredMixin, AsyncKeysetListView):
+    """Асинхронное представление списка рекламных компаний"""
+
+    group_names: List[str] = CampaignListView.group_names
+    model = Campaign
+    only_fields: Sequence[str] = CampaignListView.only_fields
+
+
+class AsyncPotentialClientListView(AsyncGroupRequiredMixin, AsyncKeysetListView):
+    """Асинхронное представление списка потенциальных клиентов"""
+
+    group_names: List[str] = PotentialClientListView.group_names
+    model = PotentialClient
+    only_fields: Sequence[str] = PotentialClientListView.only_fields
+
+    def get_queryset(self) -> QuerySet:
+        return (
+            super()
+            .get_queryset()
+            .annotate(is_active=Exists(ActiveClient.objects.filter(potential_client=OuterRef("pk"))))
+        )
+
+
+class AsyncContractListView(AsyncGroupRequiredMixin, AsyncKeysetListView):
+    """Асинхронное представление списка контрактов"""
+
+    group_names: List[str] = ContractListView.group_names
+    model = Contract
+    only_fields: Sequence[str] = ContractListView.only_fields
+
+
+class AsyncActiveClientListView(AsyncSuperUserRequiredMixin, AsyncKeysetListView):
+    """Асинхронное представление списка активных клиентов"""
+
+    model = ActiveClient
+    select_related_fields: Sequence[str] = ActiveClientListView.select_related_fields
+    only_fields: Sequence[str] = ActiveClientListView.only_fields
+
+
+class AsyncServiceDetailView(AsyncGroupRequiredMixin, AsyncDetailView):
+    """Асинхронное представление деталей услуги"""
+
+    group_names: List[str] = ServiceDetailView.group_names
+    model = Service
+
+
+class AsyncCampaignDetailView(AsyncGroupRequiredMixin, AsyncDetailView):
+    """Асинхронное представление деталей рекламной компании"""
+
+    group_names: List[str] = CampaignDetailView.group_names
+    model = Campaign
+    select_related_fields: Sequence[str] = CampaignDetailView.select_related_fields
+
+
+class AsyncPotentialClientDetailView(AsyncGroupRequiredMixin, AsyncDetailView):
+    """Асинхронное представление деталей потенциального клиента"""
+
+    group_names: List[str] = PotentialClientDetailView.group_names
+    model = PotentialClient
+    select_related_fields: Sequence[str] = PotentialClientDetailView.select_related_fields
+
+
+class AsyncContractDetailView(AsyncGroupRequiredMixin, AsyncDetailView):
+    """Асинхронное представление деталей контракта"""
+
+    group_names: List[str] = ContractDetailView.group_names
+    model = Contract
+    select_related_fields: Sequence[str] = ContractDetailView.select_related_fields
+
+
+class AsyncActiveClientDetailView(AsyncSuperUserRequiredMixin, AsyncDetailView):
+    """Асинхронное представление деталей активного клиента"""
+
+    model = ActiveClient
+    select_related_fields: Sequence[str] = ActiveClientDetailView.select_related_fields
+
+
+class AsyncStatisticsView(AsyncAccessMixin, TemplateResponseMixin, ContextMixin, View):
+    """Асинхронное представление статистики"""
+
+    template_name = "crm/statistics.html"
+
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+
+        snapshot: StatisticsSnapshot = await aget_snapshot()
+
+        context["potential_clients"] = snapshot.potential_clients
+        context["active_clients"] = snapshot.active_clients
+        context["income_expenses_ratio"] = snapshot.income_expenses_ratio
+
+        return self.render_to_response(context)
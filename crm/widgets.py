@@ -0,0 +1,52 @@
+from typing import Any, Dict, List, Optional, Set
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+
+class AutocompleteSelect(forms.Select):
+    """Выпадающий список внешнего ключа с подсказками с сервера.
+
+    В HTML выводится только выбранный вариант, остальные подгружает скрипт
+    crm/autocomplete.js из JSON-представления источника source по мере ввода,
+    поэтому размер формы не зависит от числа строк связанной таблицы.
+    """
+
+    def __init__(self, source: str, attrs: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(attrs)
+        self.source = source
+
+    class Media:
+        js = ("crm/autocomplete.js",)
+
+    def build_attrs(self, base_attrs: Dict[str, Any], extra_attrs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        attrs: Dict[str, Any] = super().build_attrs(base_attrs, extra_attrs)
+        attrs["data-autocomplete-url"] = reverse(f"crm:autocomplete_{self.source}")
+        attrs["data-autocomplete-min-length"] = settings.AUTOCOMPLETE_MIN_LENGTH
+        return attrs
+
+    def valid_pks(self, value: List[Any]) -> Set[Any]:
+        """Значения, допустимые как первичный ключ: ошибочный ввод показывается ошибкой поля, а не 500"""
+
+        pk_field = self.choices.queryset.model._meta.pk
+        pks: Set[Any] = set()
+        for item in value:
+            if item in (None, ""):
+                continue
+            try:
+                pks.add(pk_field.to_python(item))
+            except ValidationError:
+                continue
+        return pks
+
+    def optgroups(self, name: str, value: List[Any], attrs: Optional[Dict[str, Any]] = None) -> List[tuple]:
+        selected: Set[Any] = self.valid_pks(value)
+        options: List[Dict[str, Any]] = []
+        if not self.is_required or not selected:
+            options.append(self.create_option(name, "", "---------", not selected, 0))
+        if selected:
+            for index, instance in enumerate(self.choices.queryset.filter(pk__in=selected), start=len(options)):
+                options.append(self.create_option(name, instance.pk, str(instance), True, index))
+        return [(None, options, 0)]
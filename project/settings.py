@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+import django
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,6 +46,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "crm.metrics.RequestMetricsMiddleware",
+    "crm.routers.PrimaryPinningMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -74,17 +80,60 @@ WSGI_APPLICATION = "project.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+def env_flag(name: str, default: bool) -> bool:
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
+DB_ENGINE = os.environ.get("DB_ENGINE", "crm.backends.postgresql")
+# Параметры подключения и пул есть только у драйвера PostgreSQL
+DB_IS_POSTGRESQL = "postgresql" in DB_ENGINE
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": "crm",
-        "USER": "postgres",
-        "PASSWORD": "lovelove",
-        "HOST": "localhost",
-        "PORT": "5432",
+        "ENGINE": DB_ENGINE,
+        "NAME": os.environ.get("DB_NAME", "crm"),
+        "USER": os.environ.get("DB_USER", "postgres"),
+        "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+        "HOST": os.environ.get("DB_HOST", "localhost"),
+        "PORT": os.environ.get("DB_PORT", "5432"),
+        # Постоянные соединения переиспользуются между запросами и проверяются перед первым запросом
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": env_flag("DB_CONN_HEALTH_CHECKS", True),
+        "OPTIONS": {"connect_timeout": int(os.environ.get("DB_CONNECT_TIMEOUT", "5"))} if DB_IS_POSTGRESQL else {},
     }
 }
 
+# Покрывающие индексы списков (INCLUDE) нужны PostgreSQL, на SQLite они создаются без неключевых колонок
+SILENCED_SYSTEM_CHECKS = ["models.W040"]
+
+# Пул соединений psycopg 3, при нем постоянные соединения Django отключаются
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "0"))
+if DB_POOL_MAX_SIZE:
+    if django.VERSION < (5, 1) or not DB_IS_POSTGRESQL:
+        raise ImproperlyConfigured("Пул соединений (DB_POOL_MAX_SIZE) требует PostgreSQL, Django 5.1+ и psycopg 3")
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+        "max_size": DB_POOL_MAX_SIZE,
+        "timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+    }
+
+# Реплики для чтения: копии default с другими хостами, в тестах они зеркалируют default
+REPLICA_DATABASES = []
+for number, host in enumerate(filter(None, os.environ.get("DB_REPLICA_HOSTS", "").split(",")), start=1):
+    DATABASES[f"replica_{number}"] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DATABASES.append(f"replica_{number}")
+
+DATABASE_ROUTERS = ["crm.routers.PrimaryReplicaRouter"]
+# Время в секундах, в течение которого после записи чтение идет с основной БД
+PRIMARY_STICKY_TIME = 5
+PRIMARY_COOKIE_NAME = "crm_primary"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -132,4 +181,87 @@ MEDIA_ROOT = BASE_DIR / "uploads"
 FIXTURE_DIRS = ["fixtures"]
 
 LOGIN_URL = "/admin/login/"
+
+# Кэш: locmem - свой в каждом процессе, file - общий каталог воркеров одного хоста,
+# redis - общий сервер (Redis или совместимый, нужен пакет redis)
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "locmem")
+CACHE_LOCATIONS = {"locmem": "crm", "file": str(BASE_DIR / "cache"), "redis": "redis://localhost:6379/0"}
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": os.environ.get("CACHE_LOCATION", CACHE_LOCATIONS[CACHE_BACKEND]),
+        "KEY_PREFIX": os.environ.get("CACHE_KEY_PREFIX", ""),
+        "TIMEOUT": int(os.environ.get("CACHE_TIMEOUT", "300")),
+    }
+}
+# Псевдоним кэша со счетчиками поколений пространств ключей моделей
+GENERATION_CACHE_ALIAS = "default"
+
 CACHE_TIME = 60 * 10
+CACHE_STALE_TIME = 60 * 60
+CACHE_JITTER = 0.1
+CACHE_LOCK_TIME = 60
+# Ожидание ответа, который при промахе кэша вычисляет другой воркер, и интервал проверки
+CACHE_WAIT_TIME = 5
+CACHE_POLL_INTERVAL = 0.05
+SWR_CACHE_ALIAS = "default"
+PAGINATE_BY = 50
+
+# Кэш разметки строк списков: псевдоним кэша и время жизни записи
+FRAGMENT_CACHE_ALIAS = "default"
+FRAGMENT_CACHE_TIME = 60 * 60 * 24
+
+GROUP_CACHE_SIZE = 1024
+GROUP_CACHE_TIMEOUT = 60 * 60
+# Время жизни групп в памяти процесса: без общего кэша это предельная задержка отзыва прав в других воркерах
+GROUP_CACHE_LOCAL_TIMEOUT = 30
+# Общий кэш групп нужен, только если кэш разделяется процессами
+GROUP_CACHE_ALIAS = None if CACHE_BACKEND == "locmem" else "default"
+
+SEARCH_LIMIT = 20
+
+# Число подсказок и минимальная длина запроса автодополнения полей внешних ключей
+AUTOCOMPLETE_LIMIT = 20
+AUTOCOMPLETE_MIN_LENGTH = 1
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_REPORTED_ERRORS = 100
+
+# Число строк, начиная с которого админка показывает оценку pg_class.reltuples вместо COUNT(*)
+ESTIMATED_COUNT_THRESHOLD = 100_000
+# Максимум найденных по поисковому индексу объектов в поиске и автодополнении админки
+ADMIN_SEARCH_LIMIT = 500
+
+# Максимум строк в одном запросе массовой конвертации потенциальных клиентов
+BULK_CONVERSION_MAX_ROWS = 1000
+
+EXPORT_CHUNK_SIZE = 2000
+
+METRICS_SAMPLE_RATE = 0.05
+METRICS_BUFFER_SIZE = 1000
+
+# Загрузка документов по частям: предельные размеры файла и части, блок чтения и сроки хранения
+DOCUMENT_UPLOAD_MAX_SIZE = 2 * 1024**3
+DOCUMENT_CHUNK_MAX_SIZE = 8 * 1024**2
+DOCUMENT_BLOCK_SIZE = 64 * 1024
+DOCUMENT_UPLOAD_EXPIRY = 60 * 60 * 24
+DOCUMENT_BLOB_GRACE_TIME = 60 * 60
+# Количество загрузок, для которых процесс хранит накопленный SHA-256
+DOCUMENT_HASH_STATES = 1000
+
+# Очередь задач: попытки, задержка первого повтора (удваивается), тайм-аут сигнала воркера и
+# минимальный интервал записи прогресса в секундах
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_DELAY = 30
+JOB_STALE_TIMEOUT = 60 * 10
+JOB_PROGRESS_INTERVAL = 1.0
+
+# Передача отдачи документов веб-серверу: "" - отдает Django, "nginx" - X-Accel-Redirect, "apache" - X-Sendfile
+DOCUMENT_SENDFILE = os.environ.get("DOCUMENT_SENDFILE", "")
+# Внутренний location nginx, указывающий на MEDIA_ROOT
+DOCUMENT_SENDFILE_PREFIX = "/protected/"